@@ -0,0 +1,354 @@
+"""Index of executables on $PATH, used to ground prompts and check commands."""
+
+import os
+import re
+import shlex
+import subprocess  # nosec B404
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+import ask.config as config
+from ask.cache import read_json, write_json
+
+module_logger = logger.bind(module=__name__)
+
+INDEX_FILE = "binaries.json"
+# Seconds allowed for each --version or --help call
+DESCRIBE_TIMEOUT = 1.0
+
+# Tools models commonly reach for, with words that make them relevant to a
+# prompt. Only these are ever run to read their version and help text.
+TOOLS: dict[str, tuple[str, ...]] = {
+    "rg": ("search", "grep", "pattern", "text"),
+    "fd": ("find", "file", "files"),
+    "jq": ("json",),
+    "yq": ("yaml", "yml"),
+    "fzf": ("fuzzy", "interactive", "select"),
+    "bat": ("cat", "highlight", "syntax"),
+    "eza": ("ls", "tree"),
+    "tree": ("tree", "directory", "structure"),
+    "htop": ("process", "processes", "cpu", "memory"),
+    "lsof": ("port", "open", "socket"),
+    "ss": ("port", "socket", "connection", "connections"),
+    "rsync": ("sync", "backup", "mirror"),
+    "parallel": ("parallel", "concurrently"),
+    "pv": ("progress",),
+    "zstd": ("compress", "zst", "zstd"),
+    "unzip": ("zip", "unzip"),
+    "7z": ("7z", "7zip", "rar"),
+    "ffmpeg": ("video", "audio", "mp4", "mp3", "convert"),
+    "magick": ("image", "png", "jpg", "jpeg", "resize"),
+    "curl": ("download", "url", "http", "https", "request"),
+    "wget": ("download", "url"),
+    "docker": ("docker", "container", "containers", "image"),
+    "xclip": ("clipboard",),
+    "pbcopy": ("clipboard",),
+    "wl-copy": ("clipboard",),
+}
+# Tools whose version is not printed by --version
+VERSION_ARGS = {"ss": ["-V"], "lsof": ["-v"], "unzip": ["-v"], "7z": []}
+
+VERSION_PATTERN = re.compile(r"\d+\.\d+(?:\.\d+)*")
+# Help text lines that do not describe what the tool does
+BOILERPLATE_PATTERN = re.compile(
+    r"^(usage|options|copyright|see |for more)|(illegal|invalid|unrecognized|unknown) "
+    r"option|mandatory arguments|https?://",
+    re.IGNORECASE,
+)
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9_][\w.+-]*$")
+ASSIGNMENT_PATTERN = re.compile(r"^[A-Za-z_]\w*=")
+
+# Words at the start of a simple command that are not programs on $PATH
+SHELL_BUILTINS = frozenset(
+    "alias bg bind break builtin caller cd command compgen complete compopt "
+    "continue declare dirs disown echo enable eval exec exit export false fc fg "
+    "getopts hash help history jobs kill let local logout mapfile popd printf "
+    "pushd pwd read readarray readonly return set shift shopt source suspend "
+    "test times trap true type typeset ulimit umask unalias unset wait".split()
+)
+# Keywords and wrappers followed by another command
+COMMAND_PREFIXES = frozenset(
+    "if then else elif while until do ! { time sudo doas env nohup nice exec "
+    "command builtin coproc".split()
+)
+# Keywords that end a compound command or start one that is not a program
+NOT_COMMANDS = frozenset("fi done esac } for case select function in".split())
+
+
+def _run(path: str, args: list[str]) -> str:
+    """Run an indexed tool with arguments and return its combined output."""
+    try:
+        # path comes from the index of $PATH and args from VERSION_ARGS, never
+        # from generated text
+        result = subprocess.run(  # nosec B603
+            [path, *args],
+            capture_output=True,
+            text=True,
+            errors="replace",
+            timeout=DESCRIBE_TIMEOUT,
+            stdin=subprocess.DEVNULL,
+            env={"PATH": os.environ.get("PATH", os.defpath), "LC_ALL": "C"},
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return result.stdout + result.stderr
+
+
+def describe(name: str, path: str) -> dict[str, Any]:
+    """Read the version and a one-line summary of a tool.
+
+    Args:
+        name: Tool name, a key of TOOLS
+        path: Path of the executable
+
+    Returns:
+        A dict with the version and summary, either of which may be None
+    """
+    version = None
+    for line in _run(path, VERSION_ARGS.get(name, ["--version"])).splitlines()[:3]:
+        found = VERSION_PATTERN.search(line)
+        if found:
+            version = found.group(0)
+            break
+
+    summary = None
+    for line in _run(path, ["--help"]).splitlines()[:10]:
+        line = line.strip()
+        if (
+            len(line.split()) < 4
+            or line.endswith(":")
+            or line.startswith(("-", f"{name}:"))
+            or "@" in line
+            or BOILERPLATE_PATTERN.search(line)
+            or (os.path.basename(line.split()[0]) == name and re.search(r"[\[<]", line))
+        ):
+            continue
+        summary = line[:80]
+        break
+    return {"version": version, "summary": summary}
+
+
+def command_names(command: str) -> list[str]:
+    """Return the programs a command runs, as far as can be told statically.
+
+    Only the first word of each simple command is considered, after variable
+    assignments and prefixes such as sudo. Paths, variables, functions and
+    coprocesses defined in the command, and anything after a heredoc are
+    ignored.
+
+    Args:
+        command: The bash command
+
+    Returns:
+        Program names in order of first appearance
+    """
+    if "<<" in command:
+        return []
+    lexer = shlex.shlex(
+        command.replace("\\\n", " ").replace("\n", ";"),
+        posix=True,
+        punctuation_chars=True,
+    )
+    lexer.whitespace_split = True
+    try:
+        tokens = list(lexer)
+    except ValueError:
+        return []
+
+    names: list[str] = []
+    # Functions defined in the command, and coprocess names
+    declared: set[str] = set()
+    expect_command = True
+    skip = False
+    for index, word in enumerate(tokens):
+        if skip:
+            skip = False
+            continue
+        if set(word) <= set("();|&") and not set(word) <= set(")"):
+            expect_command = True
+            continue
+        if not expect_command:
+            continue
+        if ASSIGNMENT_PATTERN.match(word) or word in COMMAND_PREFIXES:
+            continue
+        following = tokens[index + 1] if index + 1 < len(tokens) else ""
+        if word == "function":
+            # The body that follows the name runs commands
+            declared.add(following)
+            skip = True
+            continue
+        expect_command = False
+        if following.startswith("(") or following == "{":
+            # f() { ...; } or coproc NAME { ...; }
+            declared.add(word)
+            expect_command = True
+            continue
+        if (
+            word not in NOT_COMMANDS
+            and word not in SHELL_BUILTINS
+            and NAME_PATTERN.match(word)
+            and word not in names
+        ):
+            names.append(word)
+    return [name for name in names if name not in declared]
+
+
+def relevant_tools(prompt: str) -> list[str]:
+    """Return tools named in prompt or related to the words it uses."""
+    words = set(re.findall(r"[a-z0-9+.-]+", prompt.lower()))
+    return [
+        name
+        for name, keywords in TOOLS.items()
+        if name in words or words.intersection(keywords)
+    ]
+
+
+class BinaryIndex:
+    """Executables on $PATH, with version and help details for known tools.
+
+    Directory listings are cached by directory mtime, so only directories that
+    gained or lost files are listed again. Tool details are cached by path and
+    mtime of the executable, so only upgraded tools are run again.
+    """
+
+    def __init__(self, path: Path | None = None, search_path: str | None = None):
+        """Initialize index, loading the cached listings and details."""
+        self.path = path or config.get_cache_dir() / INDEX_FILE
+        if search_path is None:
+            search_path = os.environ.get("PATH", os.defpath)
+        self.dirs = [d for d in search_path.split(os.pathsep) if d]
+        data = read_json(self.path)
+        self.listings: dict[str, Any] = data.get("dirs", {})
+        self.details: dict[str, Any] = data.get("details", {})
+        self.names: list[tuple[str, set[str]]] = []
+        self.changed = False
+
+    def refresh(self) -> None:
+        """List directories on the search path that changed since last time."""
+        listings = {}
+        for directory in self.dirs:
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                continue
+            listing = self.listings.get(directory)
+            if listing is None or listing["mtime"] != mtime:
+                module_logger.debug(f"Listing changed directory {directory}")
+                listing = {"mtime": mtime, "names": self._list(directory)}
+                self.changed = True
+            listings[directory] = listing
+        if listings.keys() != self.listings.keys():
+            self.changed = True
+        self.listings = listings
+        self.names = [
+            (directory, set(listing["names"]))
+            for directory, listing in listings.items()
+        ]
+
+    @staticmethod
+    def _list(directory: str) -> list[str]:
+        """Return the names of executable files in directory."""
+        try:
+            with os.scandir(directory) as entries:
+                return sorted(
+                    entry.name
+                    for entry in entries
+                    if entry.is_file() and os.access(entry.path, os.X_OK)
+                )
+        except OSError:
+            return []
+
+    def which(self, name: str) -> str | None:
+        """Return the path of an executable, or None if it is not installed."""
+        # Earlier directories on the search path take precedence
+        for directory, names in self.names:
+            if name in names:
+                return os.path.join(directory, name)
+        return None
+
+    def describe_tools(self, names: list[str]) -> dict[str, dict[str, Any]]:
+        """Return details for installed tools, running only new or changed ones.
+
+        Args:
+            names: Tool names, keys of TOOLS
+
+        Returns:
+            Details by tool name, for the tools that are installed
+        """
+        paths = {name: self.which(name) for name in names}
+        mtimes = {}
+        for name, path in paths.items():
+            if path is not None:
+                try:
+                    mtimes[name] = os.stat(path).st_mtime
+                except OSError:
+                    continue
+        stale = [
+            name
+            for name in mtimes
+            if self.details.get(paths[name], {}).get("mtime") != mtimes[name]
+        ]
+        if stale:
+            module_logger.debug(f"Describing new or changed tools: {stale}")
+            with ThreadPoolExecutor(max_workers=len(stale)) as executor:
+                results = executor.map(lambda name: describe(name, paths[name]), stale)
+                for name, detail in zip(stale, results):
+                    self.details[paths[name]] = {"mtime": mtimes[name], **detail}
+            self.changed = True
+        return {name: self.details[paths[name]] for name in mtimes}
+
+    def save(self) -> None:
+        """Write the index to disk if anything changed."""
+        if self.changed:
+            write_json(self.path, {"dirs": self.listings, "details": self.details})
+            self.changed = False
+
+
+def load_index() -> BinaryIndex:
+    """Load and refresh the index for the current $PATH."""
+    index = BinaryIndex()
+    index.refresh()
+    index.save()
+    return index
+
+
+def missing_commands(command: str, index: BinaryIndex) -> list[str]:
+    """Return programs used by command that are not installed."""
+    return [name for name in command_names(command) if index.which(name) is None]
+
+
+def tool_context(prompt: str, index: BinaryIndex) -> str | None:
+    """Summarize installed and missing tools relevant to prompt.
+
+    Args:
+        prompt: Natural language description of the task
+        index: Refreshed binary index
+
+    Returns:
+        Text for the system prompt, or None if no known tool is relevant
+    """
+    names = relevant_tools(prompt)
+    if not names:
+        return None
+    details = index.describe_tools(names)
+    index.save()
+
+    lines = []
+    for name, detail in details.items():
+        line = f"- {name}"
+        if detail.get("version"):
+            line += f" {detail['version']}"
+        if detail.get("summary"):
+            line += f": {detail['summary']}"
+        lines.append(line)
+    missing = [name for name in names if name not in details]
+
+    parts = []
+    if lines:
+        parts.append("Relevant tools installed on this system:\n" + "\n".join(lines))
+    if missing:
+        parts.append(f"Not installed, do not use: {', '.join(missing)}")
+    return "\n".join(parts)
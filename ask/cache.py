@@ -0,0 +1,76 @@
+"""Helpers for small on-disk caches kept in the cache directory."""
+
+import contextlib
+import json
+import marshal
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+module_logger = logger.bind(module=__name__)
+
+
+def _replace(path: Path, payload: bytes) -> None:
+    """Atomically replace path with payload, logging failures."""
+    # Each writer gets its own temporary file, so threads and processes
+    # replacing the same cache file at once do not clobber each other's
+    try:
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f"{path.name}.", suffix=".tmp", dir=path.parent
+        )
+    except OSError as e:
+        module_logger.warning(f"Could not write cache file {path}: {e}")
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_name, path)
+    except OSError as e:
+        module_logger.warning(f"Could not write cache file {path}: {e}")
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+
+
+def read_json(path: Path) -> dict[str, Any]:
+    """Read a JSON cache file, returning an empty dict if it is missing or corrupt."""
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def write_json(path: Path, data: dict[str, Any]) -> None:
+    """Atomically replace a JSON cache file.
+
+    Failures are logged rather than raised, since a cache that cannot be written
+    should never stop a command from being generated.
+    """
+    _replace(path, json.dumps(data).encode())
+
+
+def read_marshal(path: Path) -> Any:
+    """Read a marshal cache file, returning None if it is missing or corrupt."""
+    try:
+        # Only this program writes marshal files, in the user's own cache
+        # directory, so they are as trusted as the code that reads them
+        return marshal.loads(path.read_bytes())  # nosec B302
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def write_marshal(path: Path, data: Any) -> None:
+    """Atomically replace a marshal cache file.
+
+    Data containing types marshal cannot store, such as datetimes, is not
+    cached. Failures are logged rather than raised, like write_json.
+    """
+    try:
+        payload = marshal.dumps(data)
+    except ValueError as e:
+        module_logger.debug(f"Not caching {path}: {e}")
+        return
+    _replace(path, payload)
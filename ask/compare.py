@@ -0,0 +1,164 @@
+"""Side-by-side comparison of models answering the same prompt.
+
+Every model is queried at the same time, and repeated runs of a model are made
+one after another so they do not compete with each other. The report shows
+latency, time to first token and token counts for each model, and groups the
+commands so that models that agree share a letter.
+"""
+
+import time
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple
+
+from loguru import logger
+
+from ask.exceptions import ConfigurationError, ProviderError
+from ask.usage import format_seconds, format_table, format_tokens, percentile
+
+module_logger = logger.bind(module=__name__)
+
+
+class Sample(NamedTuple):
+    """One run of a model."""
+
+    latency: float
+    result: Any
+    error: Exception | None
+
+
+def run(
+    specs: list[str],
+    create: Callable[[str], Any],
+    generate: Callable[[Any], Any],
+    repeat: int = 1,
+) -> dict[str, list[Sample]]:
+    """Run every model concurrently, each repeat times.
+
+    Args:
+        specs: Model specs to compare; repeated specs are run once
+        create: Builds and validates the provider for a spec
+        generate: Generates a CommandResult with a provider
+        repeat: Runs of each model
+
+    Returns:
+        Samples for each spec, in the order of specs
+    """
+
+    def sample(spec: str) -> list[Sample]:
+        try:
+            provider = create(spec)
+        except (ProviderError, ConfigurationError) as e:
+            module_logger.debug(f"Could not set up {spec}: {e}")
+            return [Sample(0.0, None, e)]
+        samples = []
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            try:
+                result = generate(provider)
+            except (ProviderError, ConfigurationError) as e:
+                module_logger.debug(f"Run of {spec} failed: {e}")
+                samples.append(Sample(time.perf_counter() - start, None, e))
+            else:
+                # The request's own latency leaves out retry backoff sleeps
+                latency = result.latency
+                if latency is None:
+                    latency = time.perf_counter() - start
+                samples.append(Sample(latency, result, None))
+        return samples
+
+    specs = list(dict.fromkeys(specs))
+    with ThreadPoolExecutor(max_workers=max(len(specs), 1)) as executor:
+        return dict(zip(specs, executor.map(sample, specs)))
+
+
+def _normalize(command: str) -> str:
+    """Collapse whitespace, so commands that differ only in spacing agree."""
+    return " ".join(command.split())
+
+
+def _mean(values: list[int | None]) -> float | None:
+    """Average the counts that were reported."""
+    counted = [value for value in values if value is not None]
+    return sum(counted) / len(counted) if counted else None
+
+
+def format_report(samples: dict[str, list[Sample]], repeat: int = 1) -> str:
+    """Render compared samples as a table followed by the distinct commands.
+
+    Args:
+        samples: Samples by spec, from run
+        repeat: Runs of each model; repeated runs report latency percentiles
+
+    Returns:
+        The report text
+    """
+    # Each model's most frequent command stands for the model
+    answers: dict[str, str] = {}
+    for spec, runs in samples.items():
+        commands = Counter(
+            _normalize(run.result.command) for run in runs if run.result is not None
+        )
+        if commands:
+            answers[spec] = commands.most_common(1)[0][0]
+    letters: dict[str, str] = {}
+    for command in answers.values():
+        letters.setdefault(command, chr(ord("A") + len(letters)))
+
+    header = ["model", "runs", "errors"]
+    if repeat > 1:
+        header += ["p50", "p95", "max", "ttft p50"]
+    else:
+        header += ["latency", "ttft"]
+    header += ["in", "out", "output"]
+    table = [header]
+    failures = []
+    for spec, runs in samples.items():
+        ok = [run for run in runs if run.result is not None]
+        latencies = [run.latency for run in ok]
+        first_tokens = [
+            run.result.first_token_latency
+            for run in ok
+            if run.result.first_token_latency is not None
+        ]
+        if repeat > 1:
+            timing = [
+                percentile(latencies, 50),
+                percentile(latencies, 95),
+                max(latencies, default=None),
+                percentile(first_tokens, 50),
+            ]
+        else:
+            timing = [
+                latencies[0] if latencies else None,
+                first_tokens[0] if first_tokens else None,
+            ]
+        usages = [run.result.usage for run in ok]
+        table.append(
+            [
+                spec,
+                str(len(ok)),
+                str(len(runs) - len(ok)),
+                *(format_seconds(value) for value in timing),
+                format_tokens(
+                    _mean([getattr(u, "input_tokens", None) for u in usages])
+                ),
+                format_tokens(
+                    _mean([getattr(u, "output_tokens", None) for u in usages])
+                ),
+                letters[answers[spec]] if spec in answers else "-",
+            ]
+        )
+        errors = [str(run.error) for run in runs if run.error is not None]
+        if errors:
+            failures.append(f"{spec} failed: {errors[-1]}")
+
+    lines = format_table(table)
+    lines.append("")
+    if len(letters) == 1 and len(answers) > 1:
+        lines.append("All models agree:")
+    for command, letter in letters.items():
+        lines.append(f"{letter}: {command}")
+    lines.extend(failures)
+    return "\n".join(lines)
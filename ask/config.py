@@ -1,15 +1,21 @@
 """Configuration loading and management module."""
 
 import os
+import threading
+import time
 from pathlib import Path
 from typing import Any
 
-import ollama
-import toml
 from loguru import logger
 
+from ask.cache import read_marshal, write_marshal
 from ask.exceptions import ConfigurationError
 
+try:
+    import tomllib
+except ImportError:  # Python 3.10
+    tomllib = None
+
 SYSTEM_PROMPT = (
     "You are a bash command generator. Given a user request, "
     "respond with ONLY the bash command that accomplishes the task. "
@@ -18,6 +24,18 @@ SYSTEM_PROMPT = (
 )
 
 
+# Parsed config file, reused while the file's path, mtime and size match
+COMPILED_CONFIG_FILE = "config.marshal"
+# Changed whenever the compiled file's contents change shape
+COMPILED_CONFIG_VERSION = 1
+# A file written this recently could change again without its mtime changing,
+# so it is not compiled until it is older
+RACY_MTIME_WINDOW = 2.0
+# Seconds between checks of the config file in long-running sessions
+DEFAULT_RELOAD_INTERVAL = 1.0
+# Seconds to wait for an Ollama server to answer before treating it as down
+OLLAMA_PROBE_TIMEOUT = 2.0
+
 module_logger = logger.bind(module=__name__)
 
 
@@ -45,8 +63,35 @@ def get_config_path() -> Path | None:  # pragma: no mutate
     return None
 
 
+def get_cache_dir() -> Path:  # pragma: no mutate
+    """Find cache directory using XDG standard, creating it if needed."""
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    if xdg_cache_home:
+        cache_dir = Path(xdg_cache_home) / "ask"
+    else:
+        cache_dir = Path.home() / ".cache" / "ask"
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def parse_toml(path: Path) -> dict[str, Any]:
+    """Parse a TOML file with tomllib, or the toml package before Python 3.11."""
+    if tomllib is not None:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    import toml
+
+    with open(path) as f:
+        return toml.load(f)
+
+
 def load_config() -> dict[str, Any]:
-    """Load configuration from TOML file."""
+    """Load configuration from TOML file.
+
+    The parsed file is compiled into the cache directory, so later runs skip
+    parsing until the file changes.
+    """
     config_path = get_config_path()
     module_logger.debug(f"Config path: {config_path}")
     if config_path is None:
@@ -54,11 +99,87 @@ def load_config() -> dict[str, Any]:
         return {}
 
     try:
-        with open(config_path) as f:
-            return toml.load(f)
+        stat = config_path.stat()
+        key = [
+            COMPILED_CONFIG_VERSION,
+            str(config_path.resolve()),
+            stat.st_mtime_ns,
+            stat.st_size,
+        ]
+        compiled_path = get_cache_dir() / COMPILED_CONFIG_FILE
+        compiled = read_marshal(compiled_path)
+        if isinstance(compiled, dict) and compiled.get("key") == key:
+            module_logger.debug(f"Using compiled config {compiled_path}")
+            return compiled["config"]
+        config = parse_toml(config_path)
     except Exception as e:
         raise ConfigurationError(f"Failed to load config file {config_path}: {e}")
 
+    if time.time() - stat.st_mtime > RACY_MTIME_WINDOW:
+        write_marshal(compiled_path, {"key": key, "config": config})
+    return config
+
+
+def _stamp() -> tuple[str, int, int] | None:
+    """Return the config file's path, mtime and size, or None if there is none."""
+    config_path = get_config_path()
+    if config_path is None:
+        return None
+    try:
+        stat = config_path.stat()
+    except OSError:
+        return None
+    return str(config_path), stat.st_mtime_ns, stat.st_size
+
+
+class ConfigWatcher:
+    """Reloads the configuration when the config file changes.
+
+    Long-running sessions call poll before each prompt and then read config.
+    The file is checked at most once per interval, and a new configuration
+    replaces the old one whole, so a reader never sees a mix of the two.
+    """
+
+    def __init__(
+        self, config_data: dict[str, Any], interval: float = DEFAULT_RELOAD_INTERVAL
+    ):
+        """Initialize watcher with the configuration already loaded."""
+        self.config = config_data
+        self.interval = interval
+        # Incremented on each reload, so callers can tell they missed one
+        self.generation = 0
+        self._stamp = _stamp()
+        self._checked = time.monotonic()
+        self._lock = threading.Lock()
+
+    def poll(self) -> bool:
+        """Reload the configuration if the config file changed.
+
+        A file that fails to load is reported once and the previous
+        configuration is kept until the file changes again.
+
+        Returns:
+            Whether a new configuration was loaded
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked < self.interval:
+                return False
+            self._checked = now
+            stamp = _stamp()
+            if stamp == self._stamp:
+                return False
+            self._stamp = stamp
+            try:
+                config_data = load_config()
+            except ConfigurationError as e:
+                module_logger.warning(f"Keeping previous configuration: {e}")
+                return False
+            module_logger.debug("Config file changed, reloaded configuration")
+            self.config = config_data
+            self.generation += 1
+            return True
+
 
 def get_provider_config(
     config: dict[str, Any], provider_spec: str
@@ -96,12 +217,25 @@ def get_default_model(config: dict[str, Any]) -> str | None:  # pragma: no mutat
     return global_config.get("default_model")
 
 
-def check_ollama_available() -> bool:
-    """Check if Ollama is available."""
+def get_tiers(config: dict[str, Any]) -> list[str]:  # pragma: no mutate
+    """Get model tiers to escalate through from configuration."""
+    global_config = config.get("ask", {})
+    return global_config.get("tiers", [])
+
+
+def check_ollama_available(host: str | None = None) -> bool:
+    """Check if Ollama is available.
+
+    Args:
+        host: URL of the server to probe, or None for the client default
+    """
+    import httpx
+    import ollama
+
     try:
-        ollama.list()
+        ollama.Client(host=host, timeout=OLLAMA_PROBE_TIMEOUT).list()
         return True
-    except ConnectionError as e:
+    except (ConnectionError, httpx.TransportError, ollama.ResponseError) as e:
         module_logger.warning(f"Ollama is not available: {e}")
         return False
 
@@ -0,0 +1,267 @@
+"""Details about the user's environment, gathered for the system prompt.
+
+Each source has a cheap key, built from environment variables and file
+mtimes, and an expensive value. Values are cached with their key, so a source
+is only collected again after something it depends on has changed. Sources
+that miss the cache run in parallel background threads. Any that do not
+finish within the time budget are left out of this run, but keep running and
+cache their value for the next one.
+"""
+
+import os
+import platform
+import subprocess  # nosec B404
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, wait
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+import ask.config as config
+from ask.cache import read_json, write_json
+
+module_logger = logger.bind(module=__name__)
+
+CACHE_FILE = "environment.json"
+# Seconds a run waits for sources that are not cached
+DEFAULT_TIMEOUT = 0.05
+# Seconds a source's command may take; slower ones finish in the background
+SOURCE_TIMEOUT = 5.0
+# Directory entries listed before the listing is truncated
+MAX_LISTED_FILES = 30
+# Lines of git status included before it is truncated
+MAX_STATUS_LINES = 10
+# Cached values kept; the least recently collected are dropped first
+MAX_CACHED_VALUES = 200
+# Seconds git status is reused for, since edits to tracked files in place or in
+# subdirectories change no mtime the key could cheaply check
+GIT_STATUS_TTL = 10.0
+
+
+def _mtime(path: str | Path) -> float | None:
+    """Return the mtime of path, or None if it does not exist."""
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _run(args: list[str], cwd: str, timeout: float) -> str | None:
+    """Run a command and return its stdout, or None if it fails."""
+    try:
+        # args are fixed by the sources: $SHELL --version and git status
+        result = subprocess.run(  # nosec B603
+            args,
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            errors="replace",
+            timeout=timeout,
+            stdin=subprocess.DEVNULL,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def _find_git_dir(cwd: str) -> Path | None:
+    """Return the .git directory of the repository containing cwd."""
+    for directory in (Path(cwd), *Path(cwd).parents):
+        if (directory / ".git").is_dir():
+            return directory / ".git"
+    return None
+
+
+def _shell_key(cwd: str) -> list[Any]:
+    """Key the shell by its path and the mtime of its binary."""
+    shell = os.environ.get("SHELL", "")
+    return [shell, _mtime(shell) if shell else None]
+
+
+def _shell(cwd: str, timeout: float) -> str | None:
+    """Describe the user's shell and its version."""
+    shell = os.environ.get("SHELL")
+    if not shell:
+        return None
+    name = os.path.basename(shell)
+    output = _run([shell, "--version"], cwd, timeout) if name != "sh" else None
+    version = output.splitlines()[0].strip() if output else name
+    return f"Shell: {version}"
+
+
+def _os_key(cwd: str) -> list[Any]:
+    """Key the OS by kernel release and os-release mtime."""
+    return [platform.system(), platform.release(), _mtime("/etc/os-release")]
+
+
+def _os(cwd: str, timeout: float) -> str | None:
+    """Describe the operating system."""
+    system = platform.system()
+    if system == "Darwin":
+        name = f"macOS {platform.mac_ver()[0]}"
+    elif system == "Linux":
+        try:
+            name = platform.freedesktop_os_release().get("PRETTY_NAME", "Linux")
+        except OSError:
+            name = "Linux"
+    else:
+        name = system
+    return f"OS: {name} ({system} {platform.release()}, {platform.machine()})"
+
+
+def _files_key(cwd: str) -> list[Any]:
+    """Key the listing by directory and its mtime."""
+    return [cwd, _mtime(cwd)]
+
+
+def _files(cwd: str, timeout: float) -> str | None:
+    """List the non-hidden entries of the directory."""
+    with os.scandir(cwd) as entries:
+        names = sorted(
+            entry.name + ("/" if entry.is_dir() else "")
+            for entry in entries
+            if not entry.name.startswith(".")
+        )
+    listing = ", ".join(names[:MAX_LISTED_FILES])
+    if len(names) > MAX_LISTED_FILES:
+        listing += f" (and {len(names) - MAX_LISTED_FILES} more)"
+    return f"Current directory: {cwd}\nFiles: {listing or '(empty)'}"
+
+
+def _git_key(cwd: str) -> list[Any]:
+    """Key git status by directory, HEAD and index mtimes, and expire it."""
+    git_dir = _find_git_dir(cwd)
+    if git_dir is None:
+        return [cwd, None]
+    return [
+        cwd,
+        _mtime(cwd),
+        _mtime(git_dir / "HEAD"),
+        _mtime(git_dir / "index"),
+        int(time.time() // GIT_STATUS_TTL),
+    ]
+
+
+def _git(cwd: str, timeout: float) -> str | None:
+    """Summarize the branch and changed files of the repository."""
+    if _find_git_dir(cwd) is None:
+        return None
+    output = _run(["git", "status", "--short", "--branch"], cwd, timeout)
+    if output is None:
+        return None
+    lines = output.splitlines()
+    status = "\n".join(lines[: MAX_STATUS_LINES + 1])
+    if len(lines) > MAX_STATUS_LINES + 1:
+        status += f"\n... ({len(lines) - MAX_STATUS_LINES - 1} more)"
+    return f"Git status:\n{status}"
+
+
+# Source name -> (cache key, collector)
+SOURCES: dict[
+    str,
+    tuple[Callable[[str], list[Any]], Callable[[str, float], str | None]],
+] = {
+    "shell": (_shell_key, _shell),
+    "os": (_os_key, _os),
+    "files": (_files_key, _files),
+    "git": (_git_key, _git),
+}
+# Sources whose values are cached separately for each directory
+DIRECTORY_SOURCES = frozenset({"files", "git"})
+
+
+def _cache_key(name: str, cwd: str) -> str:
+    """Return the cache entry name for a source collected in cwd."""
+    return f"{name}:{cwd}" if name in DIRECTORY_SOURCES else name
+
+
+# Serializes cache writes from sources finishing in the background
+_cache_lock = threading.Lock()
+
+
+def _store(cache_path: Path, cache_key: str, key: list[Any], value: str | None):
+    """Cache a collected value, keeping the entries written by other sources."""
+    with _cache_lock:
+        cache = read_json(cache_path)
+        cache.pop(cache_key, None)
+        cache[cache_key] = {"key": key, "value": value}
+        while len(cache) > MAX_CACHED_VALUES:
+            del cache[next(iter(cache))]
+        write_json(cache_path, cache)
+
+
+def _collect_source(
+    name: str, cwd: str, key: list[Any], cache_path: Path, future: Future
+):
+    """Run a source's collector, cache its value and resolve future with it."""
+    try:
+        value = SOURCES[name][1](cwd, SOURCE_TIMEOUT)
+    except OSError as e:
+        module_logger.debug(f"Environment source {name} failed: {e}")
+        future.set_exception(e)
+        return
+    _store(cache_path, _cache_key(name, cwd), key, value)
+    future.set_result(value)
+
+
+def collect(
+    sources: list[str] | None = None,
+    cwd: str | None = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    cache_path: Path | None = None,
+) -> str | None:
+    """Collect environment details, reusing cached values that are still valid.
+
+    Args:
+        sources: Names of SOURCES to collect, all of them by default
+        cwd: Directory to describe, the current directory by default
+        timeout: Seconds to wait for sources that are not cached. Sources
+            that take longer finish in the background for the next run.
+        cache_path: File values are cached in
+
+    Returns:
+        The details as text, or None if no source produced anything
+    """
+    cwd = cwd or os.getcwd()
+    cache_path = cache_path or config.get_cache_dir() / CACHE_FILE
+    names = [name for name in sources or SOURCES if name in SOURCES]
+    cache = read_json(cache_path)
+    keys = {name: SOURCES[name][0](cwd) for name in names}
+
+    values: dict[str, str | None] = {}
+    stale = []
+    for name in names:
+        entry = cache.get(_cache_key(name, cwd))
+        if entry is not None and entry["key"] == keys[name]:
+            values[name] = entry["value"]
+        else:
+            stale.append(name)
+
+    if stale:
+        futures: dict[Future, str] = {}
+        for name in stale:
+            future: Future = Future()
+            futures[future] = name
+            # Daemon threads, so a slow source never delays exiting
+            threading.Thread(
+                target=_collect_source,
+                args=(name, cwd, keys[name], cache_path, future),
+                daemon=True,
+            ).start()
+        done, not_done = wait(futures, timeout=timeout)
+        for future in done:
+            if future.exception() is None:
+                values[futures[future]] = future.result()
+        for future in not_done:
+            module_logger.debug(
+                f"Environment source {futures[future]} is still running; "
+                "it will be cached for the next run"
+            )
+
+    parts = [values[name] for name in names if values.get(name)]
+    if not parts:
+        return None
+    return "\n".join(parts)
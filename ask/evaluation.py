@@ -0,0 +1,437 @@
+"""Evaluation of a model against a corpus of prompts with known answers.
+
+``ask-eval CORPUS`` answers every prompt in a corpus with one model and reports
+how many answers were right along with latency percentiles, token throughput
+and estimated cost, so a change of model or configuration can be judged on
+both quality and speed. Answers come straight from the provider: instant
+answers, the prompt cache and validation retries are skipped, and nothing is
+recorded in the usage stats.
+
+A corpus is a TOML file of cases::
+
+    [[cases]]
+    prompt = "list all files including hidden ones"
+    expect = ["ls -a", "ls -A"]
+
+    [[cases]]
+    prompt = "find files larger than 100MB"
+    match = 'find .* -size [+]100M'
+
+An answer is an exact match when it equals an expected command apart from
+whitespace. It is a semantic match when it is the same command written
+differently, with other quoting or with short flags combined or reordered, or
+when it matches one of the case's regular expressions.
+"""
+
+import argparse
+import json
+import re
+import shlex
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from loguru import logger
+
+import ask.config as config
+import ask.main as cli
+import ask.usage as usage
+from ask.binaries import ASSIGNMENT_PATTERN, COMMAND_PREFIXES
+from ask.exceptions import ConfigurationError, ProviderError
+from ask.jobs import Progress
+
+module_logger = logger.bind(module=__name__)
+
+# Prompts answered at the same time
+DEFAULT_CONCURRENCY = 4
+# Grades of an answer, best first
+GRADE_EXACT = "exact"
+GRADE_SEMANTIC = "semantic"
+GRADE_MISS = "miss"
+GRADE_ERROR = "error"
+# Misses listed in the report; --json output lists them all
+MAX_LISTED_MISSES = 10
+
+# A bundle of short flags such as -la
+SHORT_FLAGS_PATTERN = re.compile(r"^-[A-Za-z]{2,}$")
+# Programs whose options start with a single dash but are whole words, such as
+# find's -name, and whose order can matter, so their flags are kept as written
+SINGLE_DASH_PROGRAMS = frozenset(
+    "find gfind bfs ffmpeg ffprobe convert magick openssl java gcc g++ cc clang".split()
+)
+
+
+class Case:
+    """A prompt with the commands and patterns that count as right answers."""
+
+    def __init__(self, prompt: str, expect: list[str], patterns: list[re.Pattern[str]]):
+        """Initialize case."""
+        self.prompt = prompt
+        self.expect = expect
+        self.patterns = patterns
+
+
+def parse_cases(entries: list[dict[str, Any]]) -> list[Case]:
+    """Build cases from [[cases]] entries."""
+    cases = []
+    for number, entry in enumerate(entries, start=1):
+        prompt = entry.get("prompt")
+        expect = entry.get("expect", [])
+        patterns = entry.get("match", [])
+        if isinstance(expect, str):
+            expect = [expect]
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        if not prompt or not (expect or patterns):
+            raise ConfigurationError(
+                f"Case {number} requires a 'prompt' and an 'expect' or 'match' key"
+            )
+        try:
+            compiled = [re.compile(pattern) for pattern in patterns]
+        except re.error as e:
+            raise ConfigurationError(f"Invalid pattern in case {number}: {e}")
+        cases.append(Case(prompt, expect, compiled))
+    return cases
+
+
+def load_corpus(path: Path) -> list[Case]:
+    """Load the cases of a corpus file.
+
+    Args:
+        path: TOML file with [[cases]] entries
+
+    Returns:
+        The cases, in file order
+
+    Raises:
+        ConfigurationError: If the file cannot be read or a case is invalid
+    """
+    try:
+        entries = config.parse_toml(path).get("cases", [])
+    except Exception as e:
+        raise ConfigurationError(f"Failed to load corpus {path}: {e}")
+    cases = parse_cases(entries)
+    if not cases:
+        raise ConfigurationError(f"Corpus {path} has no [[cases]]")
+    return cases
+
+
+def canonical(command: str) -> tuple[str, ...] | None:
+    """Reduce a command to tokens that ignore quoting and short flag order.
+
+    Short flags are left as written for SINGLE_DASH_PROGRAMS, where -name is
+    one option rather than the flags -n -a -m -e.
+
+    Args:
+        command: The command to reduce
+
+    Returns:
+        The tokens, or None if the command does not tokenize
+    """
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        tokens = list(lexer)
+    except ValueError:
+        return None
+    reduced: list[str] = []
+    flags: list[str] = []
+    program = ""
+    expect_command = True
+    for token in tokens:
+        if set(token) <= set("();|&"):
+            expect_command = True
+        elif expect_command and not (
+            ASSIGNMENT_PATTERN.match(token) or token in COMMAND_PREFIXES
+        ):
+            program = token.rsplit("/", 1)[-1]
+            expect_command = False
+        if program in SINGLE_DASH_PROGRAMS or not token.startswith("-"):
+            is_flag = False
+        else:
+            is_flag = bool(SHORT_FLAGS_PATTERN.match(token)) or (
+                not token.startswith("--") and len(token) == 2
+            )
+        if not is_flag:
+            # A run of short flags ends at the next other token
+            reduced.extend(sorted(set(flags)))
+            flags = []
+            reduced.append(token)
+        elif len(token) > 2:
+            flags.extend(f"-{letter}" for letter in token[1:])
+        else:
+            flags.append(token)
+    reduced.extend(sorted(set(flags)))
+    return tuple(reduced)
+
+
+def grade(case: Case, command: str) -> str:
+    """Grade an answer to a case.
+
+    Args:
+        case: The case answered
+        command: The generated command
+
+    Returns:
+        GRADE_EXACT, GRADE_SEMANTIC or GRADE_MISS
+    """
+    normalized = " ".join(command.split())
+    if any(normalized == " ".join(expected.split()) for expected in case.expect):
+        return GRADE_EXACT
+    tokens = canonical(command)
+    if tokens is not None and any(
+        tokens == canonical(expected) for expected in case.expect
+    ):
+        return GRADE_SEMANTIC
+    if any(pattern.search(normalized) for pattern in case.patterns):
+        return GRADE_SEMANTIC
+    return GRADE_MISS
+
+
+class Outcome(NamedTuple):
+    """The answer to one case and how it was graded."""
+
+    case: Case
+    result: Any
+    error: Exception | None
+    grade: str
+
+
+def run(
+    cases: list[Case],
+    generate: Callable[[str], Any],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    progress: Progress | None = None,
+) -> list[Outcome]:
+    """Answer every case and grade the answers.
+
+    Args:
+        cases: Cases to answer
+        generate: Generates a CommandResult for a prompt; called from worker
+            threads
+        concurrency: Prompts answered at the same time
+        progress: Progress to update as cases finish
+
+    Returns:
+        Outcomes in the order of cases
+    """
+    lock = threading.Lock()
+
+    def answer(case: Case) -> Outcome:
+        try:
+            result = generate(case.prompt)
+        except (ProviderError, ConfigurationError) as e:
+            module_logger.debug(f"Case '{case.prompt}' failed: {e}")
+            outcome = Outcome(case, None, e, GRADE_ERROR)
+        else:
+            outcome = Outcome(case, result, None, grade(case, result.command))
+        if progress is not None:
+            with lock:
+                progress.update(failed=outcome.error is not None)
+        return outcome
+
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        return list(executor.map(answer, cases))
+
+
+def summarize(
+    outcomes: list[Outcome], elapsed: float, prices: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    """Compute match rates, latency, throughput and cost of outcomes.
+
+    Args:
+        outcomes: Outcomes from run
+        elapsed: Wall-clock seconds the run took
+        prices: Per-million prices overriding usage.PRICES, by model name
+
+    Returns:
+        Figures for the report
+    """
+    results = [outcome.result for outcome in outcomes if outcome.result is not None]
+    grades = [outcome.grade for outcome in outcomes]
+    total = len(outcomes)
+    exact = grades.count(GRADE_EXACT)
+    semantic = exact + grades.count(GRADE_SEMANTIC)
+    latencies = [result.latency for result in results if result.latency is not None]
+    # Throughput only counts requests whose provider reported output tokens
+    timed = [
+        result
+        for result in results
+        if result.usage is not None
+        and result.usage.output_tokens is not None
+        and result.latency
+    ]
+    output_tokens = sum(result.usage.output_tokens for result in timed)
+    generating = sum(result.latency for result in timed)
+    cost = sum(
+        usage.estimate_cost(
+            result.model,
+            result.usage.input_tokens or 0,
+            result.usage.output_tokens or 0,
+            result.usage.cached_tokens or 0,
+            prices,
+        )
+        for result in results
+        if result.usage is not None
+    )
+    return {
+        "cases": total,
+        "errors": grades.count(GRADE_ERROR),
+        "exact": exact / total if total else 0.0,
+        "semantic": semantic / total if total else 0.0,
+        **{f"p{pct}": usage.percentile(latencies, pct) for pct in usage.PERCENTILES},
+        "tokens_per_second": output_tokens / generating if generating else None,
+        "requests_per_second": total / elapsed if elapsed > 0 else None,
+        "cost": cost,
+    }
+
+
+def format_report(summary: dict[str, Any], outcomes: list[Outcome]) -> str:
+    """Render a summary as text, followed by the cases that were missed.
+
+    Args:
+        summary: Figures from summarize
+        outcomes: Outcomes from run
+
+    Returns:
+        The report text
+    """
+
+    def rate(value: float | None, unit: str) -> str:
+        return "-" if value is None else f"{value:.1f}{unit}"
+
+    lines = [
+        f"cases      {summary['cases']} ({summary['errors']} errors)",
+        f"exact      {summary['exact']:.1%}",
+        f"semantic   {summary['semantic']:.1%}",
+        "latency    "
+        + "  ".join(
+            f"p{pct} {usage.format_seconds(summary[f'p{pct}'])}"
+            for pct in usage.PERCENTILES
+        ),
+        f"throughput {rate(summary['tokens_per_second'], ' tokens/s')}, "
+        f"{rate(summary['requests_per_second'], ' requests/s')}",
+        f"cost       ${summary['cost']:.4f}",
+    ]
+    misses = [outcome for outcome in outcomes if outcome.grade == GRADE_MISS]
+    errors = [outcome for outcome in outcomes if outcome.grade == GRADE_ERROR]
+    if misses or errors:
+        lines.append("")
+    for outcome in misses[:MAX_LISTED_MISSES]:
+        expected = outcome.case.expect[0] if outcome.case.expect else "(pattern)"
+        lines.append(f"miss: {outcome.case.prompt}")
+        lines.append(f"  expected {expected}")
+        lines.append(f"  got      {outcome.result.command}")
+    if len(misses) > MAX_LISTED_MISSES:
+        lines.append(f"... and {len(misses) - MAX_LISTED_MISSES} more misses")
+    for outcome in errors[:MAX_LISTED_MISSES]:
+        lines.append(f"error: {outcome.case.prompt}: {outcome.error}")
+    if len(errors) > MAX_LISTED_MISSES:
+        lines.append(f"... and {len(errors) - MAX_LISTED_MISSES} more errors")
+    return "\n".join(lines)
+
+
+def format_json(summary: dict[str, Any], outcomes: list[Outcome]) -> str:
+    """Render a summary and every graded answer as JSON."""
+    cases = [
+        {
+            "prompt": outcome.case.prompt,
+            "grade": outcome.grade,
+            "command": outcome.result.command if outcome.result else None,
+            "latency": outcome.result.latency if outcome.result else None,
+            "error": str(outcome.error) if outcome.error else None,
+        }
+        for outcome in outcomes
+    ]
+    return json.dumps({**summary, "results": cases}, indent=2)
+
+
+def parse_arguments(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="ask-eval",
+        description="Measure a model's accuracy and speed on a corpus of prompts",
+    )
+    parser.add_argument("corpus", type=Path, help="TOML file of [[cases]]")
+    parser.add_argument(
+        "--model",
+        help="Provider and model to evaluate (format: provider[:model], or auto)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        metavar="N",
+        help=f"Prompts answered at the same time (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--min-match",
+        type=float,
+        metavar="RATE",
+        help="Exit with status 1 if the semantic match rate is below RATE (0-1)",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument(
+        "--verbose", "-v", action="store_true", help="Enable verbose logging"
+    )
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.min_match is not None and not 0 <= args.min_match <= 1:
+        parser.error("--min-match must be between 0 and 1")
+    return args
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Entry point of ask-eval."""
+    args = parse_arguments(argv)
+    cli.configure_logging(args.verbose)
+    config_data = cli.load_configuration()
+    try:
+        cases = load_corpus(args.corpus)
+    except ConfigurationError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    # Fail once up front rather than on every case when the model is unusable
+    try:
+        cli.resolve_provider(args, config_data).validate_config()
+    except (ProviderError, ConfigurationError) as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    # Each worker keeps its own warm providers, created on its first case
+    local = threading.local()
+
+    def generate(prompt: str) -> Any:
+        if not hasattr(local, "providers"):
+            local.providers = {}
+        prompt_config = cli.with_system_context(prompt, config_data)
+        provider = cli.get_warm_provider(
+            "",
+            lambda: cli.resolve_provider(args, prompt_config),
+            prompt_config,
+            local.providers,
+        )
+        return provider.generate(prompt)
+
+    start = time.perf_counter()
+    try:
+        outcomes = run(cases, generate, args.concurrency, Progress(len(cases)))
+    except KeyboardInterrupt:
+        sys.exit(130)
+    summary = summarize(
+        outcomes,
+        time.perf_counter() - start,
+        config_data.get("ask", {}).get("prices"),
+    )
+    if args.json:
+        print(format_json(summary, outcomes))
+    else:
+        print(format_report(summary, outcomes))
+    if args.min_match is not None and summary["semantic"] < args.min_match:
+        sys.exit(1)
@@ -1,5 +1,7 @@
 """Custom exception classes for the ask CLI tool."""
 
+import re
+
 
 class ConfigurationError(Exception):
     """Raised when there are configuration-related errors."""
@@ -7,13 +9,39 @@ class ConfigurationError(Exception):
     pass
 
 
-class AuthenticationError(Exception):
+class ProviderError(Exception):
+    """Base class for failures reported by a provider.
+
+    Attributes:
+        status: HTTP status code, or the HTTP equivalent of a gRPC status
+        retry_after: Seconds the provider asked to wait before retrying
+        transient: Whether the same request may succeed if it is retried
+    """
+
+    # Whether errors of this class are transient unless stated otherwise
+    default_transient = False
+
+    def __init__(
+        self,
+        message: str = "",
+        status: int | None = None,
+        retry_after: float | None = None,
+        transient: bool | None = None,
+    ):
+        """Initialize error with its message and classification."""
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.transient = self.default_transient if transient is None else transient
+
+
+class AuthenticationError(ProviderError):
     """Raised when authentication fails."""
 
     pass
 
 
-class APIError(Exception):
+class APIError(ProviderError):
     """Raised when API requests fail."""
 
     pass
@@ -22,4 +50,154 @@ class APIError(Exception):
 class RateLimitError(APIError):
     """Raised when API rate limits are exceeded."""
 
+    default_transient = True
+
+
+class QuotaExceededError(RateLimitError):
+    """Raised when the account's quota or credit is used up."""
+
+    default_transient = False
+
+
+class ServiceUnavailableError(APIError):
+    """Raised when the provider is overloaded, unreachable or times out."""
+
+    default_transient = True
+
+
+class ModelNotFoundError(APIError):
+    """Raised when the requested model does not exist."""
+
+    pass
+
+
+class InvalidRequestError(APIError):
+    """Raised when the provider rejects the request itself."""
+
     pass
+
+
+# HTTP equivalents of the gRPC status codes that providers return
+GRPC_STATUS = {
+    "INVALID_ARGUMENT": 400,
+    "FAILED_PRECONDITION": 400,
+    "OUT_OF_RANGE": 400,
+    "UNAUTHENTICATED": 401,
+    "PERMISSION_DENIED": 403,
+    "NOT_FOUND": 404,
+    "ABORTED": 409,
+    "RESOURCE_EXHAUSTED": 429,
+    "CANCELLED": 499,
+    "UNKNOWN": 500,
+    "INTERNAL": 500,
+    "UNIMPLEMENTED": 501,
+    "UNAVAILABLE": 503,
+    "DEADLINE_EXCEEDED": 504,
+}
+# Statuses worth retrying; 529 is Anthropic's "overloaded"
+TRANSIENT_STATUSES = frozenset({408, 409, 425, 500, 502, 503, 504, 529})
+# Quota errors that will not clear up by waiting
+QUOTA_PATTERN = re.compile(r"insufficient_quota|billing|credit balance", re.IGNORECASE)
+RETRY_DELAY_PATTERN = re.compile(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s")
+
+
+def _status(error: Exception) -> int | None:
+    """Read the status of an SDK exception as an HTTP status code."""
+    for name in ("status_code", "code", "status"):
+        value = getattr(error, name, None)
+        if callable(value):
+            # gRPC errors expose their status through a code() method; other
+            # callables that need arguments are not a status
+            try:
+                value = value()
+            except (TypeError, ValueError):
+                continue
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        value = getattr(value, "name", value)
+        if isinstance(value, str) and value.upper() in GRPC_STATUS:
+            return GRPC_STATUS[value.upper()]
+    return None
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Read how long the provider asked to wait, in seconds."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is not None:
+        try:
+            if headers.get("retry-after-ms") is not None:
+                return float(headers["retry-after-ms"]) / 1000
+            if headers.get("retry-after") is not None:
+                return float(headers["retry-after"])
+        except (TypeError, ValueError):
+            # HTTP dates are not worth parsing for a CLI
+            pass
+    re_match = RETRY_DELAY_PATTERN.search(str(getattr(error, "details", "")))
+    return float(re_match.group(1)) if re_match else None
+
+
+def classify_error(
+    error: Exception, connection_errors: tuple[type[BaseException], ...] = ()
+) -> ProviderError:
+    """Map an SDK exception to the matching ProviderError.
+
+    The status code and Retry-After hint are read from the exception when the
+    SDK provides them. Exceptions without a status fall back to matching their
+    message, since some SDKs raise plain exceptions.
+
+    Args:
+        error: The exception raised by the SDK
+        connection_errors: Exception types the SDK raises when it cannot reach
+            the server or times out
+
+    Returns:
+        The classified error, for the caller to raise
+    """
+    if isinstance(error, ProviderError):
+        return error
+    status = _status(error)
+    retry_after = _retry_after(error)
+    error_str = str(error).lower()
+    details = {"status": status, "retry_after": retry_after}
+
+    if isinstance(error, connection_errors):
+        return ServiceUnavailableError(
+            f"Error: Cannot reach the provider - {error}", **details
+        )
+    if status in (401, 403):
+        return AuthenticationError("Error: Invalid API key", **details)
+    if status == 429:
+        if QUOTA_PATTERN.search(f"{error_str} {getattr(error, 'code', '')}"):
+            return QuotaExceededError("Error: API quota exhausted", **details)
+        return RateLimitError("Error: API rate limit exceeded", **details)
+    if status == 404:
+        return ModelNotFoundError(f"Error: Model not found - {error}", **details)
+    if status in (400, 413, 422):
+        return InvalidRequestError(f"Error: Invalid request - {error}", **details)
+    if status in TRANSIENT_STATUSES or (status is not None and status >= 500):
+        return ServiceUnavailableError(
+            f"Error: Provider unavailable - {error}", **details
+        )
+    if status is not None:
+        return APIError(f"Error: API request failed - {error}", **details)
+
+    if any(
+        text in error_str
+        for text in ("authentication", "unauthorized", "invalid api key")
+    ):
+        return AuthenticationError("Error: Invalid API key")
+    if QUOTA_PATTERN.search(error_str):
+        return QuotaExceededError("Error: API quota exhausted")
+    if any(
+        text in error_str
+        for text in ("rate limit", "quota", "too many requests", "429")
+    ):
+        return RateLimitError("Error: API rate limit exceeded", retry_after=retry_after)
+    if "not found" in error_str:
+        return ModelNotFoundError(f"Error: Model not found - {error}")
+    if any(
+        text in error_str
+        for text in ("connection", "refused", "timed out", "timeout", "overloaded")
+    ):
+        return ServiceUnavailableError(f"Error: Provider unavailable - {error}")
+    return APIError(f"Error: API request failed - {error}")
@@ -0,0 +1,251 @@
+"""Offline answers for common prompts from a local template index."""
+
+import re
+import shlex
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+import ask.config as config
+from ask.exceptions import ConfigurationError
+
+module_logger = logger.bind(module=__name__)
+
+TEMPLATES_FILE = "templates.toml"
+
+# Extensions accepted by the ext slot, besides the spelled-out names below
+EXTENSIONS = (
+    "c cpp css csv gif go h html java jpg js json log md pdf php png py rb rs sh "
+    "sql toml ts txt xml yaml yml zip"
+).split()
+EXTENSION_NAMES = {
+    "bash": "sh",
+    "javascript": "js",
+    "markdown": "md",
+    "python": "py",
+    "ruby": "rb",
+    "rust": "rs",
+    "shell": "sh",
+    "text": "txt",
+    "typescript": "ts",
+}
+
+
+def _normalize_ext(value: str) -> str | None:
+    """Map an extension or language name to the bare extension."""
+    value = value.lstrip("*.")
+    return EXTENSION_NAMES.get(value, value)
+
+
+def _normalize_port(value: str) -> str | None:
+    """Reject port numbers outside the valid range."""
+    return value if 0 < int(value) < 65536 else None
+
+
+def _normalize_size(value: str) -> str | None:
+    """Convert sizes like '100 mb' to find's '100M' form."""
+    value = value.replace(" ", "").rstrip("b")
+    number, unit = value[:-1], value[-1]
+    return f"{number}{'k' if unit == 'k' else unit.upper()}"
+
+
+# Slot name -> (regex, normalizer returning None when the value is rejected)
+SLOTS: dict[str, tuple[str, Callable[[str], str | None]]] = {
+    "ext": (
+        r"(?:\*?\.\w+|"
+        + "|".join(sorted([*EXTENSIONS, *EXTENSION_NAMES], key=len, reverse=True))
+        + r")",
+        _normalize_ext,
+    ),
+    "port": (r"\d{1,5}", _normalize_port),
+    "days": (r"\d{1,4}", str),
+    "count": (r"\d{1,6}", str),
+    "size": (r"\d+ ?[kmg]b?", _normalize_size),
+    "name": (r"[\w.-]+", str),
+    "archive": (r"[\w.-]+\.(?:tar|tar\.gz|tgz|tar\.bz2|tar\.xz)", str),
+}
+
+# Phrasing that does not change the meaning of a prompt
+FILLER_PREFIX = r"(?:(?:how (?:do|can|would) i|please|can you|show me how to) )?"
+
+BUILTIN_TEMPLATES: tuple[dict[str, Any], ...] = (
+    {
+        "pattern": r"(?:find|list|show) (?:all )?files (?:modified|changed|edited) "
+        r"(?:in |within |during )?(?:the )?(?:last|past) (?:{days} days?|week)",
+        "command": "find . -type f -mtime -{days}",
+        "defaults": {"days": "7"},
+    },
+    {
+        "pattern": r"(?:find|list|show) (?:all )?(?:the )?{ext} files "
+        r"(?:modified|changed|edited) (?:in |within |during )?(?:the )?"
+        r"(?:last|past) (?:{days} days?|week)",
+        "command": "find . -type f -name '*.{ext}' -mtime -{days}",
+        "defaults": {"days": "7"},
+    },
+    {
+        "pattern": r"(?:find|list|show) (?:all )?(?:the )?{ext} files",
+        "command": "find . -type f -name '*.{ext}'",
+    },
+    {
+        "pattern": r"(?:find|list|show) (?:all )?files (?:larger|bigger) than {size}",
+        "command": "find . -type f -size +{size}",
+    },
+    {
+        "pattern": r"(?:count|number of) (?:the )?lines (?:of code )?in (?:all )?"
+        r"(?:the )?{ext} files",
+        "command": "find . -type f -name '*.{ext}' -exec cat {} + | wc -l",
+    },
+    {
+        "pattern": r"(?:show |check |get )?disk usage (?:by|per|of each|for each) "
+        r"(?:directory|folder)",
+        "command": "du -sh -- */ | sort -hr",
+    },
+    {
+        "pattern": r"kill (?:the )?(?:process|whatever is) (?:that is )?"
+        r"(?:running |listening )?on port {port}",
+        "command": "lsof -ti tcp:{port} | xargs kill",
+    },
+    {
+        "pattern": r"(?:find|show|which) (?:the )?process(?:es)? (?:is |are )?"
+        r"(?:using|listening on|running on|on) port {port}",
+        "command": "lsof -i :{port}",
+    },
+    {
+        "pattern": r"(?:list|show) (?:all )?(?:the )?(?:open|listening) ports",
+        "command": "lsof -i -P -n | grep LISTEN",
+    },
+    {
+        "pattern": r"(?:show|list) (?:the )?last {count} git commits",
+        "command": "git log --oneline -{count}",
+    },
+    {
+        "pattern": r"(?:extract|untar|unpack) (?:the )?(?:archive )?{archive}",
+        "command": "tar -xf {archive}",
+    },
+)
+
+
+def get_templates_path() -> Path | None:
+    """Return the user template file, which lives next to config.toml."""
+    config_path = config.get_config_path()
+    if config_path is None:
+        return None
+    return config_path.parent / TEMPLATES_FILE
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase prompt and strip whitespace and trailing punctuation."""
+    return " ".join(prompt.lower().split()).rstrip("?!. ")
+
+
+class Template:
+    """A prompt pattern with parameter slots and the command it answers with."""
+
+    def __init__(
+        self,
+        patterns: list[str],
+        command: str,
+        defaults: dict[str, Any] | None = None,
+    ):
+        """Compile patterns, expanding {slot} placeholders to named groups."""
+        self.command = command
+        self.defaults = {key: str(value) for key, value in (defaults or {}).items()}
+        self.regexes = [self._compile(pattern) for pattern in patterns]
+
+    @staticmethod
+    def _compile(pattern: str) -> re.Pattern[str]:
+        """Compile pattern into a regex matching the whole normalized prompt."""
+
+        def expand(match: re.Match[str]) -> str:
+            slot = match.group(1)
+            if slot not in SLOTS:
+                raise ConfigurationError(
+                    f"Unknown template slot '{slot}'. Available slots: {list(SLOTS)}"
+                )
+            return f"(?P<{slot}>{SLOTS[slot][0]})"
+
+        expanded = re.sub(r"\{(\w+)\}", expand, pattern)
+        try:
+            return re.compile(FILLER_PREFIX + expanded)
+        except re.error as e:
+            raise ConfigurationError(f"Invalid template pattern '{pattern}': {e}")
+
+    def match(self, prompt: str) -> str | None:
+        """Return the filled-in command if prompt matches, otherwise None.
+
+        Args:
+            prompt: Normalized prompt
+
+        Returns:
+            The command with slot values substituted, or None
+        """
+        for regex in self.regexes:
+            found = regex.fullmatch(prompt)
+            if found is None:
+                continue
+            values = dict(self.defaults)
+            for slot, value in found.groupdict().items():
+                if value is None:
+                    continue
+                normalized = SLOTS[slot][1](value)
+                if normalized is None:
+                    break
+                values[slot] = normalized
+            else:
+                return re.sub(
+                    r"\{(\w+)\}",
+                    lambda m: (
+                        shlex.quote(values[m.group(1)])
+                        if m.group(1) in values
+                        else m.group(0)
+                    ),
+                    self.command,
+                )
+        return None
+
+
+def parse_templates(entries: list[dict[str, Any]]) -> list[Template]:
+    """Build templates from [[templates]] entries."""
+    templates = []
+    for entry in entries:
+        if "pattern" not in entry or "command" not in entry:
+            raise ConfigurationError(
+                "Templates require both 'pattern' and 'command' keys"
+            )
+        patterns = entry["pattern"]
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        templates.append(Template(patterns, entry["command"], entry.get("defaults")))
+    return templates
+
+
+class TemplateIndex:
+    """Ordered templates, with user templates taking precedence over built-ins."""
+
+    def __init__(self, templates: list[Template]):
+        """Initialize index with templates in priority order."""
+        self.templates = templates
+
+    @classmethod
+    def load(cls, path: Path | None = None) -> "TemplateIndex":
+        """Load user templates from path, followed by the built-in templates."""
+        templates = []
+        if path is not None and path.exists():
+            try:
+                entries = config.parse_toml(path).get("templates", [])
+            except Exception as e:
+                raise ConfigurationError(f"Failed to load templates {path}: {e}")
+            templates = parse_templates(entries)
+            module_logger.debug(f"Loaded {len(templates)} templates from {path}")
+        return cls([*templates, *parse_templates(list(BUILTIN_TEMPLATES))])
+
+    def lookup(self, prompt: str) -> str | None:
+        """Return the command for the first template matching prompt."""
+        normalized = normalize_prompt(prompt)
+        for template in self.templates:
+            command = template.match(normalized)
+            if command is not None:
+                return command
+        return None
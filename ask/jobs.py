@@ -0,0 +1,211 @@
+"""Batch jobs that answer many prompts and can be resumed after interruption.
+
+A job is a directory in the cache directory holding the prompts to answer, a
+log of the commands generated so far and a log of the prompts that failed.
+Each answer is appended to its log as soon as it is generated, so a job that
+is interrupted by a network failure or Ctrl-C is resumed from where it
+stopped rather than from the start.
+"""
+
+import json
+import os
+import secrets
+import sys
+import time
+from pathlib import Path
+from typing import Any, TextIO
+
+from loguru import logger
+
+import ask.config as config
+from ask.cache import read_json, write_json
+from ask.exceptions import ConfigurationError
+
+module_logger = logger.bind(module=__name__)
+
+JOBS_DIR = "jobs"
+JOB_FILE = "job.json"
+MANIFEST_FILE = "manifest.jsonl"
+RESULTS_FILE = "results.jsonl"
+FAILURES_FILE = "failures.jsonl"
+
+
+def read_prompts(source: TextIO) -> list[str]:
+    """Read one prompt per line, skipping blank lines."""
+    return [line.strip() for line in source if line.strip()]
+
+
+def _read_log(path: Path) -> list[dict[str, Any]]:
+    """Read a JSON lines log, skipping a last line cut short by a crash."""
+    try:
+        lines = path.read_text().splitlines()
+    except FileNotFoundError:
+        return []
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            module_logger.debug(f"Skipping incomplete entry in {path}")
+    return entries
+
+
+def _append(path: Path, entry: dict[str, Any]) -> None:
+    """Append an entry to a JSON lines log with a single write."""
+    # One write to a file opened for appending lands whole or not at all,
+    # even with several processes appending
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, (json.dumps(entry) + "\n").encode())
+    finally:
+        os.close(fd)
+
+
+class Job:
+    """A batch of prompts with the answers and failures recorded so far."""
+
+    def __init__(self, path: Path):
+        """Initialize job stored in a directory created by Job.create."""
+        self.path = path
+        self.id = path.name
+        self.details = read_json(path / JOB_FILE)
+        self.items = _read_log(path / MANIFEST_FILE)
+
+    @classmethod
+    def create(
+        cls,
+        prompts: list[str],
+        model: str | None = None,
+        directory: Path | None = None,
+    ) -> "Job":
+        """Create a job for prompts.
+
+        Args:
+            prompts: Prompts to answer, in order
+            model: Model spec from --model, reused when the job is resumed
+            directory: Directory for jobs, in the cache directory by default
+
+        Returns:
+            The new job
+        """
+        directory = directory or config.get_cache_dir() / JOBS_DIR
+        job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(2)}"
+        path = directory / job_id
+        path.mkdir(parents=True)
+        manifest = "".join(
+            json.dumps({"index": index, "prompt": prompt}) + "\n"
+            for index, prompt in enumerate(prompts)
+        )
+        tmp_path = path / f"{MANIFEST_FILE}.tmp"
+        tmp_path.write_text(manifest)
+        tmp_path.replace(path / MANIFEST_FILE)
+        write_json(
+            path / JOB_FILE,
+            {"created": time.time(), "model": model, "total": len(prompts)},
+        )
+        return cls(path)
+
+    @classmethod
+    def open(cls, job_id: str, directory: Path | None = None) -> "Job":
+        """Open an existing job.
+
+        Args:
+            job_id: Job ID printed when the job was created
+            directory: Directory for jobs, in the cache directory by default
+
+        Returns:
+            The job
+
+        Raises:
+            ConfigurationError: If there is no such job
+        """
+        directory = directory or config.get_cache_dir() / JOBS_DIR
+        path = directory / job_id
+        if not (path / MANIFEST_FILE).is_file():
+            raise ConfigurationError(f"No batch job '{job_id}' in {directory}")
+        return cls(path)
+
+    @property
+    def model(self) -> str | None:
+        """Model spec the job was created with."""
+        return self.details.get("model")
+
+    def completed(self) -> dict[int, dict[str, Any]]:
+        """Return the recorded results by item index."""
+        return {entry["index"]: entry for entry in _read_log(self.path / RESULTS_FILE)}
+
+    def failed(self) -> dict[int, dict[str, Any]]:
+        """Return the latest failure of each item without a result."""
+        completed = self.completed()
+        return {
+            entry["index"]: entry
+            for entry in _read_log(self.path / FAILURES_FILE)
+            if entry["index"] not in completed
+        }
+
+    def outstanding(self, retry_failed: bool = False) -> list[dict[str, Any]]:
+        """Return the items that still need answering.
+
+        Args:
+            retry_failed: Whether to include items that failed before
+
+        Returns:
+            Manifest items in order
+        """
+        done = set(self.completed())
+        if not retry_failed:
+            done.update(self.failed())
+        return [item for item in self.items if item["index"] not in done]
+
+    def record_result(self, item: dict[str, Any], command: str) -> None:
+        """Record the command generated for an item."""
+        _append(
+            self.path / RESULTS_FILE,
+            {"index": item["index"], "prompt": item["prompt"], "command": command},
+        )
+
+    def record_failure(self, item: dict[str, Any], error: str) -> None:
+        """Record why an item could not be answered."""
+        _append(
+            self.path / FAILURES_FILE,
+            {"index": item["index"], "prompt": item["prompt"], "error": error},
+        )
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration as H:MM:SS."""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class Progress:
+    """Reports progress through a batch with throughput and time remaining."""
+
+    def __init__(self, total: int, stream: TextIO | None = None):
+        """Initialize progress for total items."""
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.stream = stream or sys.stderr
+        self.start = time.monotonic()
+
+    def status(self) -> str:
+        """Describe progress so far."""
+        elapsed = time.monotonic() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        text = f"{self.done}/{self.total} done"
+        if self.failed:
+            text += f", {self.failed} failed"
+        text += f", {rate:.2f}/s"
+        if rate > 0 and self.done < self.total:
+            text += f", ETA {format_duration((self.total - self.done) / rate)}"
+        return text
+
+    def update(self, failed: bool = False) -> None:
+        """Count an item as finished and report progress."""
+        self.done += 1
+        self.failed += int(failed)
+        if self.stream.isatty():
+            end = "\n" if self.done == self.total else ""
+            self.stream.write(f"\r\033[K{self.status()}{end}")
+            self.stream.flush()
@@ -1,13 +1,53 @@
 import argparse
+import contextlib
+import copy
+import json
+import os
+import signal
+import sqlite3
 import sys
-from typing import Any
+import threading
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
 
 from loguru import logger
 
+import ask.binaries as binaries
+import ask.compare as compare
 import ask.config as config
-import ask.providers as providers
-from ask.exceptions import APIError, AuthenticationError, ConfigurationError
-from ask.providers.base import ProviderInterface
+import ask.environment as environment
+import ask.instant as instant
+import ask.jobs as jobs
+import ask.pipeline as pipeline
+import ask.prompt_cache as prompt_cache
+import ask.repl as repl
+import ask.singleflight as singleflight
+import ask.usage as usage
+import ask.validation as validation
+import ask.widget as widget
+from ask.exceptions import (
+    APIError,
+    AuthenticationError,
+    ConfigurationError,
+    ProviderError,
+)
+
+# Provider SDKs are slow to import, so ask.providers and ask.routing are only
+# imported once a prompt has to be sent to a provider
+if TYPE_CHECKING:
+    from ask.providers.base import CommandResult, ProviderInterface, TokenUsage
+
+# First argument that runs the usage report instead of answering a prompt
+STATS_COMMAND = "stats"
+# First argument that prints the shell integration script
+SHELL_INIT_COMMAND = "shell-init"
+# Retries of requests that failed with a transient error
+DEFAULT_TRANSIENT_RETRIES = 1
+# Seconds before the first retry when the provider gives no Retry-After hint
+RETRY_BACKOFF = 0.5
+# Longest wait before a retry; errors asking for longer fail straight away
+MAX_RETRY_DELAY = 2.0
 
 
 def configure_logging(verbose: bool) -> None:
@@ -27,14 +67,100 @@ def configure_logging(verbose: bool) -> None:
 def parse_arguments() -> argparse.Namespace:
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="AI-powered bash command generator")
-    parser.add_argument("prompt", help="Natural language description of the task")
     parser.add_argument(
-        "--model", help="Provider and model to use (format: provider[:model])"
+        "prompt", nargs="?", help="Natural language description of the task"
+    )
+    parser.add_argument(
+        "--model",
+        help="Provider and model to use (format: provider[:model], or auto)",
+    )
+    parser.add_argument(
+        "--interactive",
+        "-i",
+        action="store_true",
+        help="Answer prompts one after another, keeping earlier ones as context",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Answer one prompt per line of FILE (- for stdin) as a resumable job",
+    )
+    parser.add_argument(
+        "--resume", metavar="JOB", help="Answer the outstanding prompts of a job"
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="With --resume, also retry prompts that failed",
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="MODELS",
+        help="Answer the prompt with each of a comma-separated list of models "
+        "and compare them",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        metavar="N",
+        help="With --compare, run each model N times (default: 1)",
+    )
+    parser.add_argument(
+        "--pipe",
+        action="store_true",
+        help="Answer each line of stdin, writing commands as they are ready",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        metavar="N",
+        help=f"With --pipe, prompts answered at the same time "
+        f"(default: {pipeline.DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--ordered",
+        action="store_true",
+        help="With --pipe, write commands in the order of the input lines",
     )
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Enable verbose logging"
     )
-    return parser.parse_args()
+    # Started by the shell integration while a prompt is being typed
+    parser.add_argument("--prefetch", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.prompt is None and not (
+        args.interactive or args.batch or args.resume or args.pipe
+    ):
+        parser.error("a prompt is required unless --interactive is given")
+    if args.pipe and args.prompt is not None:
+        parser.error("--pipe reads prompts from stdin and takes no prompt")
+    if (args.ordered or args.concurrency) and not args.pipe:
+        parser.error("--ordered and --concurrency require --pipe")
+    if args.repeat != 1 and not args.compare:
+        parser.error("--repeat requires --compare")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if args.retry_failed and not args.resume:
+        parser.error("--retry-failed requires --resume")
+    return args
+
+
+def parse_stats_arguments(argv: list[str]) -> argparse.Namespace:
+    """Parse arguments of the stats command."""
+    parser = argparse.ArgumentParser(
+        prog="ask stats", description="Report latency, token usage and cost"
+    )
+    parser.add_argument(
+        "--since",
+        default=usage.DEFAULT_WINDOW,
+        help=f"Time window to report, such as 24h, 7d or 2w "
+        f"(default: {usage.DEFAULT_WINDOW})",
+    )
+    parser.add_argument(
+        "--verbose", "-v", action="store_true", help="Enable verbose logging"
+    )
+    return parser.parse_args(argv)
 
 
 def load_configuration() -> dict[str, Any]:
@@ -46,7 +172,34 @@ def load_configuration() -> dict[str, Any]:
         sys.exit(1)
 
 
-def resolve_provider(args, config_data) -> ProviderInterface:
+def resolve_auto_model(model_spec: str, config_data: dict[str, Any]) -> str:
+    """Replace the auto model spec with the provider expected to be fastest.
+
+    Args:
+        model_spec: Model spec from --model or the config file
+        config_data: Configuration data loaded from the config file
+
+    Returns:
+        The model spec to use
+
+    Raises:
+        ConfigurationError: If auto is asked for but no provider has credentials
+    """
+    import ask.routing as routing
+
+    if model_spec != routing.AUTO_MODEL:
+        return model_spec
+
+    chosen = routing.choose_model(config_data, routing.ProviderStats())
+    if chosen is None:
+        raise ConfigurationError(
+            "Error: No provider with credentials available for auto selection."
+        )
+    logger.debug(f"Auto model selection chose: {chosen}")
+    return chosen
+
+
+def resolve_provider(args, config_data) -> "ProviderInterface":
     """Determine which provider to use based on arguments and configuration.
 
     Args:
@@ -55,11 +208,14 @@ def resolve_provider(args, config_data) -> ProviderInterface:
 
     Returns:
         Provider instance
+
+    Raises:
+        ConfigurationError: If no provider is configured or it is unknown
     """
     if args.model:
         logger.debug(f"Using model specified via --model argument: {args.model}")
         provider_name, provider_config = config.get_provider_config(
-            config_data, args.model
+            config_data, resolve_auto_model(args.model, config_data)
         )
     else:
         # Check for default model in config first
@@ -67,7 +223,7 @@ def resolve_provider(args, config_data) -> ProviderInterface:
         if default_model:
             logger.debug(f"Using default model from config: {default_model}")
             provider_name, provider_config = config.get_provider_config(
-                config_data, default_model
+                config_data, resolve_auto_model(default_model, config_data)
             )
         else:
             logger.warning(
@@ -77,37 +233,853 @@ def resolve_provider(args, config_data) -> ProviderInterface:
             default_provider = config.get_default_provider()
             if not default_provider:
                 keys = ["GEMINI_API_KEY", "ANTHROPIC_API_KEY", "OPENAI_API_KEY"]
-                logger.error(
+                raise ConfigurationError(
                     "No default model configured and no API keys found. "
                     f"Please set one or more of {keys} environment variables, "
                     "or set a default_provider in your config file."
                 )
-                sys.exit(1)
             logger.debug(f"Using default provider from environment: {default_provider}")
             provider_name, provider_config = config.get_provider_config(
                 config_data, default_provider
             )
 
+    import ask.providers as providers
+
     try:
         logger.debug(f"Initializing provider: {provider_name}")
         return providers.get_provider(provider_name, provider_config)
     except ConfigurationError as e:
-        logger.error(f"Error: {e}")
+        raise ConfigurationError(f"Error: {e}") from e
+
+
+def record_usage(
+    ask_config: dict[str, Any],
+    source: str,
+    latency: float,
+    ok: bool = True,
+    stats_key: str | None = None,
+    token_usage: "TokenUsage | None" = None,
+) -> None:
+    """Append a request to the usage store, unless [ask] usage is false.
+
+    Args:
+        ask_config: The [ask] section, or a provider config it was merged into
+        source: Where the answer came from, one of the usage.SOURCE_* values
+        latency: Wall-clock seconds taken to answer
+        ok: Whether an answer was produced
+        stats_key: Provider and model, for provider requests
+        token_usage: Tokens reported by the provider
+    """
+    if not ask_config.get("usage", True):
+        return
+    provider_name, model_name = (None, None)
+    if stats_key is not None:
+        provider_name, _, model_name = stats_key.partition(":")
+    try:
+        store = usage.UsageStore()
+        try:
+            store.record(
+                source,
+                latency,
+                ok=ok,
+                provider=provider_name,
+                model=model_name,
+                usage=token_usage,
+            )
+        finally:
+            store.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Failed to record usage: {e}")
+
+
+def retry_delay(
+    error: ProviderError, attempt: int, provider_config: dict[str, Any]
+) -> float | None:
+    """Return how long to wait before retrying a failed request.
+
+    Args:
+        error: The classified error the request failed with
+        attempt: Number of retries already made
+        provider_config: Provider config, with the [ask] settings merged in
+
+    Returns:
+        Seconds to wait, or None if the request should not be retried
+    """
+    if not error.transient:
+        return None
+    retries = provider_config.get("transient_retries", DEFAULT_TRANSIENT_RETRIES)
+    if attempt >= retries:
+        return None
+    delay = error.retry_after
+    if delay is None:
+        delay = RETRY_BACKOFF * 2**attempt
+    if delay > provider_config.get("max_retry_delay", MAX_RETRY_DELAY):
+        return None
+    return delay
+
+
+def provider_settings(provider_config: dict[str, Any]) -> dict[str, Any]:
+    """Return a provider config without the per-prompt system context."""
+    return {
+        key: value for key, value in provider_config.items() if key != "system_context"
+    }
+
+
+def mark_reloaded(providers: dict[str, "ProviderInterface"]) -> None:
+    """Have kept providers compared with a reloaded config before reuse."""
+    for provider in providers.values():
+        provider.config_reloaded = True
+
+
+def watch_config(config_data: dict[str, Any]) -> config.ConfigWatcher | None:
+    """Start watching the config file, unless [ask] reload is false.
+
+    Args:
+        config_data: Configuration data loaded from the config file
+
+    Returns:
+        The watcher, or None if reloading is disabled
+    """
+    ask_config = config_data.get("ask", {})
+    if not ask_config.get("reload", True):
+        return None
+    return config.ConfigWatcher(
+        config_data, ask_config.get("reload_interval", config.DEFAULT_RELOAD_INTERVAL)
+    )
+
+
+def _rebuild_provider(
+    key: str,
+    provider: "ProviderInterface",
+    create: Callable[[], "ProviderInterface"],
+) -> "ProviderInterface | None":
+    """Build the provider for key again after the config file was reloaded.
+
+    Returns:
+        A validated provider if its settings changed, or None to keep provider
+    """
+    try:
+        # Building a provider is cheap; its client is only made by
+        # validate_config, so an unchanged provider keeps its connections
+        candidate = create()
+        if type(candidate) is type(provider) and provider_settings(
+            candidate.config
+        ) == provider_settings(provider.config):
+            return None
+        logger.debug(f"Settings of provider '{key}' changed, rebuilding it")
+        candidate.validate_config()
+        return candidate
+    # A bad config or missing key must not end a session that already has a
+    # working provider
+    except (AuthenticationError, ConfigurationError) as e:
+        logger.error(str(e))
+    logger.warning(f"Config reload failed, keeping the provider '{key}' in use")
+    return None
+
+
+def get_warm_provider(
+    key: str,
+    create: Callable[[], "ProviderInterface"],
+    config_data: dict[str, Any],
+    providers: dict[str, "ProviderInterface"] | None,
+) -> "ProviderInterface":
+    """Return the provider kept for key, or create and validate a new one.
+
+    Kept providers reuse their client and open connections. They are only
+    given the system context built for the current prompt. After the config
+    file is reloaded, a kept provider is replaced only if its settings changed
+    and the new settings are valid.
+
+    Args:
+        key: Name the provider is kept under
+        create: Builds the provider when none is kept for key
+        config_data: Configuration data, including the current system context
+        providers: Providers kept between prompts, or None to keep none
+
+    Returns:
+        A provider whose configuration has been validated
+    """
+    provider = providers.get(key) if providers is not None else None
+    if provider is not None and provider.config_reloaded is True:
+        provider.config_reloaded = False
+        rebuilt = _rebuild_provider(key, provider, create)
+        if rebuilt is not None:
+            if providers is not None:
+                providers[key] = rebuilt
+            return rebuilt
+    if provider is None:
+        provider = create()
+        provider.validate_config()
+        if providers is not None:
+            providers[key] = provider
+        return provider
+
+    context = config_data.get("ask", {}).get("system_context")
+    if context:
+        provider.config["system_context"] = context
+    else:
+        provider.config.pop("system_context", None)
+    return provider
+
+
+def generate_command(provider: "ProviderInterface", prompt: str) -> "CommandResult":
+    """Generate a command, recording its latency, usage and outcome.
+
+    Requests that fail with a transient error are retried after a short wait.
+
+    Args:
+        provider: Provider to generate the command with
+        prompt: Natural language description of the task
+
+    Returns:
+        The generated command and request details
+    """
+    import ask.routing as routing
+
+    stats_key = routing.provider_stats_key(provider)
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            result = provider.generate(prompt)
+            break
+        except (AuthenticationError, APIError) as e:
+            if stats_key is not None:
+                latency = time.perf_counter() - start
+                routing.ProviderStats().record(stats_key, latency, ok=False)
+                record_usage(
+                    provider.config, usage.SOURCE_PROVIDER, latency, False, stats_key
+                )
+            delay = retry_delay(e, attempt, provider.config)
+            if delay is None:
+                raise
+            logger.warning(f"{e} ({type(e).__name__}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    if stats_key is not None:
+        latency = time.perf_counter() - start
+        routing.ProviderStats().record(stats_key, latency, ok=True)
+        record_usage(
+            provider.config,
+            usage.SOURCE_PROVIDER,
+            latency,
+            stats_key=stats_key,
+            token_usage=result.usage,
+        )
+    return result
+
+
+def find_problems(result: "CommandResult") -> list[str]:
+    """Return why a generated command should be rejected, if it should be."""
+    problems = validation.validate_command(result.command)
+    if result.truncated:
+        problems.append("the answer was cut off at the max_tokens limit")
+    return problems
+
+
+def generate_validated(
+    provider: "ProviderInterface", prompt: str, config_data: dict[str, Any]
+) -> "CommandResult":
+    """Generate a command, retrying with the errors when it fails validation.
+
+    Args:
+        provider: Provider to generate the command with
+        prompt: Natural language description of the task
+        config_data: Configuration data loaded from the config file
+
+    Returns:
+        The first result that passes validation, or the last attempt if none do
+    """
+    max_attempts = max(config_data.get("ask", {}).get("max_attempts", 3), 1)
+    request = prompt
+    for attempt in range(1, max_attempts + 1):
+        result = generate_command(provider, request)
+        problems = find_problems(result)
+        if not problems:
+            validation.warn_missing_commands(result.command)
+            return result
+        logger.warning(
+            f"Attempt {attempt}/{max_attempts} rejected: {'; '.join(problems)}"
+        )
+        request = validation.retry_prompt(prompt, result.command, problems)
+
+    logger.warning("No attempt produced a valid command, using the last output")
+    return result
+
+
+def generate_with_tiers(
+    tiers: list[str],
+    prompt: str,
+    config_data: dict[str, Any],
+    providers: dict[str, "ProviderInterface"] | None = None,
+) -> "CommandResult":
+    """Try each tier in order, escalating when output fails local validation.
+
+    Args:
+        tiers: Model specs ordered from cheapest and fastest to most capable
+        prompt: Natural language description of the task
+        config_data: Configuration data loaded from the config file
+        providers: Providers kept between prompts, or None to keep none
+
+    Returns:
+        The first result that passes validation, or the last one generated if
+        none do
+    """
+    import ask.providers
+    import ask.routing as routing
+
+    last_result: CommandResult | None = None
+    last_error: Exception | None = None
+    for index, spec in enumerate(tiers):
+        provider_name, provider_config = config.get_provider_config(
+            config_data, resolve_auto_model(spec, config_data)
+        )
+        logger.debug(f"Trying tier {index + 1}/{len(tiers)}: {spec}")
+        try:
+            provider = get_warm_provider(
+                routing.stats_key(provider_name, provider_config),
+                lambda: ask.providers.get_provider(provider_name, provider_config),
+                config_data,
+                providers,
+            )
+            result = generate_command(provider, prompt)
+        except (AuthenticationError, APIError, ConfigurationError) as e:
+            logger.warning(f"Tier {spec} failed: {e}")
+            last_error = e
+        else:
+            problems = find_problems(result)
+            if not problems:
+                validation.warn_missing_commands(result.command)
+                return result
+            logger.warning(f"Tier {spec} output rejected: {'; '.join(problems)}")
+            last_result = result
+
+        if index < len(tiers) - 1:
+            routing.ProviderStats().record_escalation(
+                routing.stats_key(provider_name, provider_config)
+            )
+
+    if last_result is not None:
+        logger.warning("No tier produced a valid command, using the last output")
+        return last_result
+    assert last_error is not None, "Tiers should not be empty"
+    raise last_error
+
+
+def lookup_instant_answer(args, config_data: dict[str, Any]) -> str | None:
+    """Answer stock prompts from the local template index, without a provider.
+
+    Args:
+        args: Parsed command line arguments
+        config_data: Configuration data loaded from the config file
+
+    Returns:
+        The templated command, or None if no template matches
+    """
+    if args.model or not config_data.get("ask", {}).get("instant", True):
+        return None
+    bash_command = instant.TemplateIndex.load(instant.get_templates_path()).lookup(
+        args.prompt
+    )
+    if bash_command is not None:
+        logger.debug("Answered from the instant template index")
+    return bash_command
+
+
+def lookup_cached_answer(args, config_data: dict[str, Any]) -> str | None:
+    """Reuse the answer to a previous prompt that is nearly the same.
+
+    Args:
+        args: Parsed command line arguments
+        config_data: Configuration data loaded from the config file
+
+    Returns:
+        The cached command, or None if no previous prompt is similar enough
+    """
+    ask_config = config_data.get("ask", {})
+    if args.model or not ask_config.get("cache", True):
+        return None
+    threshold = ask_config.get("cache_threshold", prompt_cache.DEFAULT_THRESHOLD)
+    try:
+        cache = prompt_cache.PromptCache(threshold=threshold)
+        try:
+            hit = cache.lookup(args.prompt)
+        finally:
+            cache.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Failed to read prompt cache: {e}")
+        return None
+
+    if hit is None:
+        return None
+    logger.debug(f"Cache hit for similar prompt {hit.prompt!r} (score {hit.score:.2f})")
+    return hit.command
+
+
+def cache_answer(prompt: str, bash_command: str, config_data: dict[str, Any]) -> None:
+    """Store a generated command for reuse, if it passes validation.
+
+    Args:
+        prompt: Natural language description of the task
+        bash_command: The generated bash command
+        config_data: Configuration data loaded from the config file
+    """
+    if not config_data.get("ask", {}).get("cache", True):
+        return
+    if validation.validate_command(bash_command):
+        logger.debug("Not caching a command that failed validation")
+        return
+    try:
+        cache = prompt_cache.PromptCache()
+        try:
+            cache.store(prompt, bash_command)
+        finally:
+            cache.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Failed to write prompt cache: {e}")
+
+
+def build_system_context(prompt: str, config_data: dict[str, Any]) -> str | None:
+    """Gather details about this system to add to the system prompt.
+
+    Args:
+        prompt: Natural language description of the task
+        config_data: Configuration data loaded from the config file
+
+    Returns:
+        The context text, or None if there is nothing to add
+    """
+    ask_config = config_data.get("ask", {})
+    parts = []
+    if ask_config.get("system_context"):
+        parts.append(ask_config["system_context"])
+    if ask_config.get("tool_hints", True):
+        tools = binaries.tool_context(prompt, binaries.load_index())
+        if tools:
+            parts.append(tools)
+    if ask_config.get("environment_context", False):
+        details = environment.collect(
+            sources=ask_config.get("context_sources"),
+            timeout=ask_config.get("context_timeout", environment.DEFAULT_TIMEOUT),
+        )
+        if details:
+            parts.append(details)
+    if not parts:
+        return None
+    return "\n\n".join(parts)
+
+
+def with_system_context(prompt: str, config_data: dict[str, Any]) -> dict[str, Any]:
+    """Return config_data with the system context built for prompt.
+
+    Args:
+        prompt: Natural language description of the task
+        config_data: Configuration data loaded from the config file
+
+    Returns:
+        The configuration to generate the command with
+    """
+    context = build_system_context(prompt, config_data)
+    if not context:
+        return config_data
+    logger.debug(f"System context:\n{context}")
+    return {
+        **config_data,
+        "ask": {**config_data.get("ask", {}), "system_context": context},
+    }
+
+
+def generate_answer(
+    args,
+    config_data: dict[str, Any],
+    providers: dict[str, "ProviderInterface"] | None = None,
+) -> "CommandResult":
+    """Generate a command with the configured tiers or provider.
+
+    Args:
+        args: Parsed command line arguments
+        config_data: Configuration data loaded from the config file
+        providers: Providers kept between prompts, or None to keep none
+
+    Returns:
+        The generated command and request details
+    """
+    config_data = with_system_context(args.prompt, config_data)
+    tiers = [] if args.model else config.get_tiers(config_data)
+    if tiers:
+        return generate_with_tiers(tiers, args.prompt, config_data, providers)
+
+    provider = get_warm_provider(
+        "", lambda: resolve_provider(args, config_data), config_data, providers
+    )
+    if config_data.get("ask", {}).get("validate", True):
+        return generate_validated(provider, args.prompt, config_data)
+    return generate_command(provider, args.prompt)
+
+
+def show_stats(argv: list[str]) -> None:
+    """Print the usage report for the stats command.
+
+    Args:
+        argv: Arguments after the stats command
+    """
+    args = parse_stats_arguments(argv)
+    configure_logging(args.verbose)
+    config_data = load_configuration()
+
+    try:
+        since = time.time() - usage.parse_window(args.since)
+        store = usage.UsageStore()
+        try:
+            summary = store.summarize(
+                since, prices=config_data.get("ask", {}).get("prices")
+            )
+        finally:
+            store.close()
+    except (ConfigurationError, sqlite3.Error) as e:
+        logger.error(str(e))
+        sys.exit(1)
+    print(usage.format_summary(summary, args.since))
+
+
+def answer_prompt(
+    args,
+    config_data: dict[str, Any],
+    providers: dict[str, "ProviderInterface"] | None = None,
+    reuse: bool = True,
+) -> str:
+    """Answer a prompt locally if possible, or with a provider.
+
+    Args:
+        args: Parsed command line arguments
+        config_data: Configuration data loaded from the config file
+        providers: Providers kept between prompts, or None to keep none
+        reuse: Whether instant and cached answers may be used and the answer
+            cached; prompts that depend on earlier ones must not be
+
+    Identical prompts sent by other processes at the same time share one
+    provider request.
+
+    Returns:
+        The bash command
+    """
+    start = time.perf_counter()
+    bash_command = None
+    if reuse:
+        source = usage.SOURCE_INSTANT
+        bash_command = lookup_instant_answer(args, config_data)
+        if bash_command is None:
+            source = usage.SOURCE_CACHE
+            bash_command = lookup_cached_answer(args, config_data)
+    if bash_command is not None:
+        record_usage(config_data.get("ask", {}), source, time.perf_counter() - start)
+        return bash_command
+
+    ask_config = config_data.get("ask", {})
+    flight = None
+    if singleflight.SUPPORTED and ask_config.get("singleflight", True):
+        flight = singleflight.Flight(
+            singleflight.flight_key(args.prompt, args.model),
+            timeout=ask_config.get(
+                "singleflight_timeout", singleflight.DEFAULT_TIMEOUT
+            ),
+        )
+    with flight or contextlib.nullcontext():
+        if flight is not None and flight.result is not None:
+            record_usage(ask_config, usage.SOURCE_SHARED, time.perf_counter() - start)
+            return flight.result
+        result = generate_answer(args, config_data, providers)
+        if flight is not None:
+            flight.publish(result.command)
+    if reuse and not result.truncated:
+        cache_answer(args.prompt, result.command, config_data)
+    return result.command
+
+
+def run_interactive(args, config_data: dict[str, Any]) -> None:
+    """Answer prompts read from the terminal until the user exits.
+
+    Args:
+        args: Parsed command line arguments
+        config_data: Configuration data loaded from the config file
+    """
+    providers: dict[str, ProviderInterface] = {}
+    conversation = repl.Conversation(
+        config_data.get("ask", {}).get("history_tokens", repl.DEFAULT_HISTORY_TOKENS)
+    )
+    watcher = watch_config(config_data)
+
+    def answer(prompt: str, follow_up: bool) -> str | None:
+        turn_args = copy.copy(args)
+        turn_args.prompt = prompt
+        turn_config = config_data
+        if watcher is not None:
+            if watcher.poll():
+                mark_reloaded(providers)
+            turn_config = watcher.config
+        try:
+            return answer_prompt(turn_args, turn_config, providers, reuse=not follow_up)
+        except (AuthenticationError, APIError, ConfigurationError) as e:
+            logger.error(str(e))
+            return None
+
+    if args.prompt:
+        bash_command = answer(args.prompt, False)
+        if bash_command is not None:
+            print(bash_command)
+            conversation.add(args.prompt, bash_command)
+    repl.run(answer, conversation)
+
+
+def open_job(args) -> "jobs.Job":
+    """Create the job for --batch, or open the job for --resume.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        The batch job
+    """
+    try:
+        if args.resume:
+            return jobs.Job.open(args.resume)
+        if args.batch == "-":
+            prompts = jobs.read_prompts(sys.stdin)
+        else:
+            with open(args.batch) as source:
+                prompts = jobs.read_prompts(source)
+        return jobs.Job.create(prompts, args.model)
+    except OSError as e:
+        logger.error(f"Cannot read prompts from {args.batch}: {e}")
+        sys.exit(1)
+    except ConfigurationError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+
+def run_batch(args, config_data: dict[str, Any]) -> None:
+    """Answer the outstanding prompts of a batch job.
+
+    Each command is recorded in the job and printed as a JSON line as soon as
+    it is generated. Progress goes to stderr.
+
+    Args:
+        args: Parsed command line arguments
+        config_data: Configuration data loaded from the config file
+    """
+    job = open_job(args)
+    pending = job.outstanding(retry_failed=args.retry_failed)
+    print(
+        f"Job {job.id}: {len(pending)} of {len(job.items)} prompts to answer",
+        file=sys.stderr,
+    )
+
+    providers: dict[str, ProviderInterface] = {}
+    progress = jobs.Progress(len(pending))
+    try:
+        for item in pending:
+            item_args = copy.copy(args)
+            item_args.prompt = item["prompt"]
+            item_args.model = args.model or job.model
+            try:
+                bash_command = answer_prompt(item_args, config_data, providers)
+            except APIError as e:
+                job.record_failure(item, str(e))
+                progress.update(failed=True)
+                continue
+            except (AuthenticationError, ConfigurationError) as e:
+                # Every other prompt would fail the same way
+                job.record_failure(item, str(e))
+                logger.error(f"{e}. Resume with: ask --resume {job.id}")
+                sys.exit(1)
+            job.record_result(item, bash_command)
+            print(
+                json.dumps(
+                    {
+                        "index": item["index"],
+                        "prompt": item["prompt"],
+                        "command": bash_command,
+                    }
+                ),
+                flush=True,
+            )
+            progress.update()
+    except KeyboardInterrupt:
+        print(f"\nInterrupted. Resume with: ask --resume {job.id}", file=sys.stderr)
+        sys.exit(130)
+
+    print(f"Job {job.id}: {progress.status()}", file=sys.stderr)
+    failed = job.failed()
+    if failed:
+        print(
+            f"{len(failed)} prompts failed. Retry them with: "
+            f"ask --resume {job.id} --retry-failed",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+def run_compare(args, config_data: dict[str, Any]) -> None:
+    """Answer the prompt with several models and print how they compare.
+
+    Args:
+        args: Parsed command line arguments
+        config_data: Configuration data loaded from the config file
+    """
+    import ask.providers as providers
+
+    specs = [spec.strip() for spec in args.compare.split(",") if spec.strip()]
+    if not specs:
+        logger.error("--compare needs at least one model")
+        sys.exit(1)
+    duplicates = sorted({spec for spec in specs if specs.count(spec) > 1})
+    if duplicates:
+        logger.error(
+            f"--compare lists {', '.join(duplicates)} more than once; "
+            "use --repeat to run a model several times"
+        )
+        sys.exit(1)
+    config_data = with_system_context(args.prompt, config_data)
+
+    def create(spec: str) -> "ProviderInterface":
+        provider_name, provider_config = config.get_provider_config(
+            config_data, resolve_auto_model(spec, config_data)
+        )
+        provider = providers.get_provider(provider_name, provider_config)
+        provider.validate_config()
+        return provider
+
+    samples = compare.run(
+        specs,
+        create,
+        lambda provider: generate_command(provider, args.prompt),
+        args.repeat,
+    )
+    print(compare.format_report(samples, args.repeat))
+
+
+def run_pipe(args, config_data: dict[str, Any]) -> None:
+    """Answer each line of stdin, writing one command per line to stdout.
+
+    Args:
+        args: Parsed command line arguments
+        config_data: Configuration data loaded from the config file
+    """
+    # Warm providers are given each prompt's system context, so workers must
+    # not share them
+    local = threading.local()
+    watcher = watch_config(config_data)
+
+    def answer(prompt: str) -> str:
+        if not hasattr(local, "providers"):
+            local.providers = {}
+            local.generation = 0
+        line_args = copy.copy(args)
+        line_args.prompt = prompt
+        line_config = config_data
+        if watcher is not None:
+            watcher.poll()
+            # Read the generation first: a newer config with an older
+            # generation is only checked on the next line, never skipped
+            generation = watcher.generation
+            line_config = watcher.config
+            if generation != local.generation:
+                mark_reloaded(local.providers)
+                local.generation = generation
+        return answer_prompt(line_args, line_config, local.providers)
+
+    def emit(outcome: pipeline.Outcome) -> None:
+        if outcome.command is not None:
+            print(outcome.command, flush=True)
+            return
+        logger.error(f"{outcome.prompt}: {outcome.error or 'no command generated'}")
+        if args.ordered:
+            # Keep output lines aligned with input lines
+            print(flush=True)
+
+    concurrency = args.concurrency or config_data.get("ask", {}).get(
+        "pipe_concurrency", pipeline.DEFAULT_CONCURRENCY
+    )
+    try:
+        failures = pipeline.run(sys.stdin, answer, emit, concurrency, args.ordered)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    except BrokenPipeError:
+        # The reader went away, as with | head; silence the flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(0)
+    if failures:
+        sys.exit(1)
+
+
+def run_prefetch(args, config_data: dict[str, Any]) -> None:
+    """Answer a prompt ahead of time for the shell keybinding to collect.
+
+    Args:
+        args: Parsed command line arguments
+        config_data: Configuration data loaded from the config file
+    """
+    if not widget.SUPPORTED or not config_data.get("ask", {}).get("prefetch", True):
+        return
+    # The shell kills prefetches of text the user has since changed; exiting
+    # through SystemExit removes the socket
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    widget.serve(
+        widget.socket_path(args.prompt, args.model),
+        lambda: answer_prompt(args, config_data),
+    )
+
+
+def show_shell_init(argv: list[str]) -> None:
+    """Print the shell integration script for the shell-init command.
+
+    Args:
+        argv: Arguments after the shell-init command
+    """
+    try:
+        print(widget.shell_script(argv[0] if argv else None), end="")
+    except ConfigurationError as e:
+        logger.error(str(e))
         sys.exit(1)
 
 
 def main() -> None:
     """Main entry point for the CLI application."""
+    if sys.argv[1:2] == [STATS_COMMAND]:
+        show_stats(sys.argv[2:])
+        return
+    if sys.argv[1:2] == [SHELL_INIT_COMMAND]:
+        show_shell_init(sys.argv[2:])
+        return
+
     args = parse_arguments()
     configure_logging(args.verbose)
     config_data = load_configuration()
 
+    if args.interactive:
+        run_interactive(args, config_data)
+        return
+
+    if args.compare:
+        run_compare(args, config_data)
+        return
+    if args.pipe:
+        run_pipe(args, config_data)
+        return
+    if args.batch or args.resume:
+        run_batch(args, config_data)
+        return
+    if args.prefetch:
+        run_prefetch(args, config_data)
+        return
+
     try:
-        provider = resolve_provider(args, config_data)
-        provider.validate_config()
-        bash_command = provider.get_bash_command(args.prompt)
+        bash_command = widget.fetch(args.prompt, args.model)
+        if bash_command is None:
+            bash_command = answer_prompt(args, config_data)
         print(bash_command)
-    except (AuthenticationError, APIError) as e:
+    except (AuthenticationError, APIError, ConfigurationError) as e:
         logger.error(str(e))
         sys.exit(1)
 
@@ -0,0 +1,117 @@
+"""Answer a stream of prompts concurrently, for use in shell pipelines.
+
+Lines are read on a background thread and answered by a pool of workers, so
+a command is written as soon as it is ready even while the producer is slow to
+send the next line. A fixed number of slots bounds the lines that have been
+read but not yet written, including answers held back to keep input order, so
+memory stays bounded however long the input is.
+"""
+
+import queue
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from loguru import logger
+
+module_logger = logger.bind(module=__name__)
+
+# Prompts answered at the same time
+DEFAULT_CONCURRENCY = 4
+# Answers that may wait for an earlier, slower one, per worker
+REORDER_SLOTS_PER_WORKER = 2
+
+
+class Outcome(NamedTuple):
+    """The answer to one input line, or why there is none."""
+
+    index: int
+    prompt: str
+    command: str | None
+    error: Exception | None
+
+
+def run(
+    lines: Iterable[str],
+    answer: Callable[[str], str],
+    emit: Callable[[Outcome], None],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    ordered: bool = False,
+) -> int:
+    """Answer each non-blank line, emitting outcomes as they are ready.
+
+    Args:
+        lines: Prompts, one per line; read lazily and may be unbounded
+        answer: Generates the command for a prompt; called from worker threads
+        emit: Called on this thread with each outcome
+        concurrency: Prompts answered at the same time
+        ordered: Whether to emit outcomes in input order rather than as soon
+            as they are ready
+
+    Returns:
+        The number of prompts that could not be answered
+    """
+    concurrency = max(concurrency, 1)
+    window = concurrency * REORDER_SLOTS_PER_WORKER if ordered else concurrency
+    slots = threading.Semaphore(window)
+    finished: queue.Queue[Outcome | int] = queue.Queue()
+    module_logger.debug(
+        f"Answering with {concurrency} workers, reading up to {window} lines ahead"
+    )
+
+    def work(index: int, prompt: str) -> None:
+        outcome = Outcome(index, prompt, None, None)
+        try:
+            outcome = Outcome(index, prompt, answer(prompt), None)
+        except Exception as e:
+            outcome = Outcome(index, prompt, None, e)
+        finally:
+            # Always report back, or the main thread would wait forever
+            finished.put(outcome)
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def read() -> None:
+        index = 0
+        try:
+            for line in lines:
+                prompt = line.strip()
+                if not prompt:
+                    continue
+                slots.acquire()
+                executor.submit(work, index, prompt)
+                index += 1
+        finally:
+            # The number of prompts read marks the end of the input
+            finished.put(index)
+
+    # A daemon, so a reader blocked on input does not keep the process alive
+    threading.Thread(target=read, daemon=True).start()
+
+    total: int | None = None
+    received = 0
+    failures = 0
+    held: dict[int, Outcome] = {}
+    next_index = 0
+    try:
+        while total is None or received < total:
+            item = finished.get()
+            if isinstance(item, int):
+                total = item
+                continue
+            received += 1
+            if item.command is None:
+                failures += 1
+            if not ordered:
+                emit(item)
+                slots.release()
+                continue
+            held[item.index] = item
+            while next_index in held:
+                emit(held.pop(next_index))
+                slots.release()
+                next_index += 1
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return failures
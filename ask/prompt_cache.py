@@ -0,0 +1,264 @@
+"""Cache of answered prompts with near-duplicate lookup.
+
+Prompts are normalized into tokens and shingled, and each shingle set is
+summarized by a MinHash signature. The signature is split into bands that are
+stored as LSH buckets in SQLite. A lookup hashes the prompt's bands and only
+reads the entries that share a bucket with it, so the cost does not grow with
+the size of the cache. A near match must use the same words as the prompt
+after normalization, with its numbers and paths in the same order, so only
+synonyms, filler words and word order can differ. The similarity threshold then
+decides how different the word order may be.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import struct
+import time
+from pathlib import Path
+
+from loguru import logger
+
+import ask.config as config
+
+module_logger = logger.bind(module=__name__)
+
+CACHE_FILE = "prompt_cache.sqlite3"
+# Minimum Jaccard similarity of the unigrams and bigrams of a cached prompt
+# with the same words; since the words must match, this bounds word order only
+DEFAULT_THRESHOLD = 0.8
+# Signature length and LSH banding; 16 bands of 4 rows catch pairs from ~0.5
+NUM_PERM = 64
+BANDS = 16
+# Entries kept in the cache; the oldest are dropped first
+MAX_ENTRIES = 50000
+
+# Each shingle is hashed once with an extendable-output hash, whose output is
+# read as NUM_PERM independent 32-bit hash values
+_HASH_FORMAT = f"<{NUM_PERM}I"
+
+TOKEN_PATTERN = re.compile(r"[\w./~*-]+")
+# Words dropped before comparing prompts. Words giving a direction or position,
+# such as "to", "from", "in", "first" and "last", change the command and are
+# kept.
+STOPWORDS = frozenset(
+    "a an the all any some every this that these those on of for with my me "
+    "please i how do can you is are was be".split()
+)
+SYNONYMS = {
+    "python": "py",
+    "javascript": "js",
+    "typescript": "ts",
+    "markdown": "md",
+    "changed": "modified",
+    "edited": "modified",
+    "updated": "modified",
+    "folder": "directory",
+    "dir": "directory",
+    "big": "large",
+    "bigger": "large",
+    "larger": "large",
+    "huge": "large",
+    "remove": "delete",
+    "rm": "delete",
+    "terminate": "kill",
+    "list": "show",
+    "display": "show",
+    "print": "show",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    prompt TEXT NOT NULL,
+    normalized TEXT NOT NULL UNIQUE,
+    command TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    key INTEGER NOT NULL,
+    entry_id INTEGER NOT NULL,
+    PRIMARY KEY (key, entry_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS buckets_entry ON buckets (entry_id);
+"""
+
+
+def _canonical(token: str) -> str:
+    """Map a token to a canonical spelling."""
+    if token.startswith(("*.", ".")) and token.lstrip("*.").isalnum():
+        token = token.lstrip("*.")
+    token = SYNONYMS.get(token, token)
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        token = SYNONYMS.get(token[:-1], token[:-1])
+    return token
+
+
+def normalize(prompt: str) -> list[str]:
+    """Split prompt into canonical tokens, dropping words that carry no meaning."""
+    tokens = (
+        _canonical(token.rstrip("."))
+        for token in TOKEN_PATTERN.findall(prompt.lower())
+        if token not in STOPWORDS
+    )
+    return [token for token in tokens if token and token not in STOPWORDS]
+
+
+def literals(tokens: list[str]) -> tuple[str, ...]:
+    """Return tokens that must match exactly and in order, such as paths."""
+    return tuple(
+        token
+        for token in tokens
+        if any(c.isdigit() for c in token) or "/" in token or "." in token
+    )
+
+
+def shingles(tokens: list[str]) -> set[str]:
+    """Return word unigrams and bigrams, so word order counts for something."""
+    return {*tokens, *(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))}
+
+
+def signature(shingle_set: set[str]) -> list[int]:
+    """Compute the MinHash signature of a shingle set."""
+    hashes = [
+        struct.unpack(
+            _HASH_FORMAT, hashlib.shake_128(shingle.encode()).digest(4 * NUM_PERM)
+        )
+        for shingle in shingle_set
+    ]
+    return list(map(min, zip(*hashes)))
+
+
+def band_keys(sig: list[int]) -> list[int]:
+    """Hash each band of a signature into a signed 64-bit bucket key."""
+    rows = NUM_PERM // BANDS
+    keys = []
+    for band in range(BANDS):
+        data = f"{band}:{sig[band * rows : (band + 1) * rows]}".encode()
+        digest = hashlib.blake2b(data, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def jaccard(a: set[str], b: set[str]) -> float:
+    """Return the Jaccard similarity of two sets."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class CacheHit:
+    """A cached answer and how closely its prompt matched."""
+
+    def __init__(self, prompt: str, command: str, score: float):
+        """Initialize hit with the matched prompt, its command and similarity."""
+        self.prompt = prompt
+        self.command = command
+        self.score = score
+
+
+class PromptCache:
+    """Answered prompts, searchable by lexical similarity."""
+
+    def __init__(self, path: Path | None = None, threshold: float = DEFAULT_THRESHOLD):
+        """Open the cache database, creating it if needed."""
+        self.path = path or config.get_cache_dir() / CACHE_FILE
+        self.threshold = threshold
+        self.connection = sqlite3.connect(self.path, timeout=5.0)
+        # The cache can be rebuilt, so trade durability for cheap writes
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    def lookup(self, prompt: str) -> CacheHit | None:
+        """Return the most similar cached answer above the threshold.
+
+        Args:
+            prompt: Natural language prompt
+
+        Returns:
+            The best match, or None if nothing is similar enough
+        """
+        tokens = normalize(prompt)
+        if not tokens:
+            return None
+        query = shingles(tokens)
+        keys = band_keys(signature(query))
+        rows = self.connection.execute(
+            "SELECT DISTINCT e.prompt, e.normalized, e.command FROM buckets b "
+            "JOIN entries e ON e.id = b.entry_id "
+            "WHERE b.key IN (SELECT value FROM json_each(?))",
+            (json.dumps(keys),),
+        ).fetchall()
+
+        best: CacheHit | None = None
+        for cached_prompt, normalized, command in rows:
+            cached_tokens = normalized.split(" ")
+            # A near match may reword or reorder a prompt, but not change its
+            # words: "empty" and "non-empty", or "newest" and "oldest", score
+            # high yet need opposite commands. Swapping numbers or paths, as
+            # in "copy a.txt to b.txt", swaps the command's arguments.
+            same_words = set(cached_tokens) == set(tokens)
+            if not same_words or literals(cached_tokens) != literals(tokens):
+                continue
+            score = jaccard(query, shingles(cached_tokens))
+            if score >= self.threshold and (best is None or score > best.score):
+                best = CacheHit(cached_prompt, command, score)
+        return best
+
+    def store(self, prompt: str, command: str) -> None:
+        """Add an answered prompt, replacing the answer for the same prompt."""
+        tokens = normalize(prompt)
+        if not tokens:
+            return
+        normalized = " ".join(tokens)
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO entries (prompt, normalized, command, created_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (normalized) DO UPDATE SET "
+                "prompt = excluded.prompt, command = excluded.command, "
+                "created_at = excluded.created_at",
+                (prompt, normalized, command, time.time()),
+            )
+            (entry_id,) = self.connection.execute(
+                "SELECT id FROM entries WHERE normalized = ?", (normalized,)
+            ).fetchone()
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO buckets (key, entry_id) VALUES (?, ?)",
+                [(key, entry_id) for key in band_keys(signature(shingles(tokens)))],
+            )
+            self._evict()
+
+    def entries_after(self, last_id: int, limit: int) -> list[tuple[int, str]]:
+        """Return (id, prompt) for up to limit entries added after last_id."""
+        return self.connection.execute(
+            "SELECT id, prompt FROM entries WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, limit),
+        ).fetchall()
+
+    def get_entries(self, ids: list[int]) -> dict[int, tuple[str, str]]:
+        """Return (prompt, command) by id for the entries that still exist."""
+        rows = self.connection.execute(
+            "SELECT id, prompt, command FROM entries "
+            "WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(ids),),
+        ).fetchall()
+        return {entry_id: (prompt, command) for entry_id, prompt, command in rows}
+
+    def _evict(self) -> None:
+        """Drop the oldest entries beyond MAX_ENTRIES."""
+        (count,) = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()
+        if count <= MAX_ENTRIES:
+            return
+        oldest = self.connection.execute(
+            "SELECT id FROM entries ORDER BY created_at, id LIMIT ?",
+            (count - MAX_ENTRIES,),
+        ).fetchall()
+        self.connection.executemany("DELETE FROM entries WHERE id = ?", oldest)
+        self.connection.executemany("DELETE FROM buckets WHERE entry_id = ?", oldest)
+        module_logger.debug(f"Evicted {len(oldest)} prompt cache entries")
@@ -4,8 +4,10 @@ from .anthropic import AnthropicProvider
 from .base import ProviderInterface
 from .gemini import GeminiProvider
 from .grok import GrokProvider
+from .llamacpp import LlamaCppProvider
 from .ollama import OllamaProvider
 from .openai import OpenAIProvider
+from .openai_compatible import OpenAICompatibleProvider
 
 # Provider registry - maps provider names to their classes
 _PROVIDER_REGISTRY: dict[str, type[ProviderInterface]] = {}
@@ -29,6 +31,19 @@ def get_provider(name: str, config: dict) -> ProviderInterface:
     return provider_class(config)
 
 
+def get_provider_class(name: str) -> type[ProviderInterface] | None:
+    """Get a provider class by name, or None if it is not registered."""
+    return _PROVIDER_REGISTRY.get(name)
+
+
+def get_provider_name(provider: ProviderInterface) -> str | None:
+    """Get the name a provider instance's class is registered under."""
+    for name, provider_class in _PROVIDER_REGISTRY.items():
+        if type(provider) is provider_class:
+            return name
+    return None
+
+
 def list_providers() -> list[str]:
     """List all available provider names."""
     return list(_PROVIDER_REGISTRY.keys())
@@ -39,3 +54,5 @@ register_provider("openai", OpenAIProvider)
 register_provider("gemini", GeminiProvider)
 register_provider("grok", GrokProvider)
 register_provider("ollama", OllamaProvider)
+register_provider("openai_compatible", OpenAICompatibleProvider)
+register_provider("llamacpp", LlamaCppProvider)
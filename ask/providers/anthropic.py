@@ -1,13 +1,20 @@
 """Anthropic provider implementation."""
 
 import os
-from typing import Any
+import time
+from typing import Any, NoReturn
 
 import anthropic
 
 from ask.config import SYSTEM_PROMPT
-from ask.exceptions import APIError, AuthenticationError, RateLimitError
-from ask.providers.base import ProviderInterface
+from ask.exceptions import AuthenticationError, classify_error
+from ask.providers.base import (
+    CommandResult,
+    ProviderInterface,
+    TokenUsage,
+    find_command_end,
+    strip_code_fence,
+)
 
 
 class AnthropicProvider(ProviderInterface):
@@ -20,24 +27,64 @@ class AnthropicProvider(ProviderInterface):
 
     def get_bash_command(self, prompt: str) -> str:
         """Generate bash command from natural language prompt."""
+        return self.generate(prompt).command
+
+    def generate(self, prompt: str) -> CommandResult:
+        """Generate bash command with token usage and stop reason."""
         if self.client is None:
             self.validate_config()
 
         # After validate_config(), client should be set
         assert self.client is not None, "Client should be initialized after validation"
 
+        request: dict[str, Any] = {
+            "model": self.config.get("model_name", "claude-3-haiku-20240307"),
+            "max_tokens": self.config.get("max_tokens", 150),
+            "temperature": self.config.get("temperature", 0.5),
+            "system": self.get_system_prompt(),
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        stop = self.config.get("stop") or []
+        # The API rejects stop sequences made only of whitespace, such as
+        # "\n\n", so those are only applied to the response text
+        stop_sequences = [sequence for sequence in stop if sequence.strip()]
+        if stop_sequences:
+            request["stop_sequences"] = stop_sequences
+
+        start = time.perf_counter()
         try:
-            response = self.client.messages.create(
-                model=self.config.get("model_name", "claude-3-haiku-20240307"),
-                max_tokens=self.config.get("max_tokens", 150),
-                temperature=self.config.get("temperature", 0.5),
-                system=self.config.get("system_prompt", SYSTEM_PROMPT),
-                messages=[{"role": "user", "content": prompt}],
+            if self.config.get("stream", False):
+                with self.client.messages.stream(**request) as stream:
+                    text = self.read_stream(
+                        stream.text_stream, lambda chunk: chunk, stop
+                    )
+                    # Counts and stop reason as of where the stream was closed
+                    message = stream.current_message_snapshot
+            else:
+                message = self.client.messages.create(**request)
+                text = message.content[0].text
+                end = find_command_end(text, stop)
+                if end is not None:
+                    text = text[:end]
+            return self._result(
+                text,
+                strip_code_fence(text),
+                start,
+                usage=self._usage(message.usage),
+                finish_reason=message.stop_reason,
             )
-            return response.content[0].text
         except Exception as e:
             self._handle_api_error(e)
 
+    @staticmethod
+    def _usage(usage: Any) -> TokenUsage:
+        """Read token counts from a message's usage block."""
+        return TokenUsage(
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cached_tokens=getattr(usage, "cache_read_input_tokens", None),
+        )
+
     def validate_config(self) -> None:
         """Validate provider configuration and API key."""
         api_key_env = self.config.get("api_key_env", "ANTHROPIC_API_KEY")
@@ -50,16 +97,9 @@ class AnthropicProvider(ProviderInterface):
 
         self.client = anthropic.Anthropic(api_key=api_key)
 
-    def _handle_api_error(self, error: Exception):
-        """Handle API errors and map them to standard exceptions."""
-        error_str = str(error).lower()
-
-        if "authentication" in error_str or "unauthorized" in error_str:
-            raise AuthenticationError("Error: Invalid API key")
-        elif "rate limit" in error_str:
-            raise RateLimitError("Error: API rate limit exceeded")
-        else:
-            raise APIError(f"Error: API request failed - {error}")
+    def _handle_api_error(self, error: Exception) -> NoReturn:
+        """Map SDK errors to standard exceptions by type and status code."""
+        raise classify_error(error, (anthropic.APIConnectionError,)) from error
 
     @classmethod
     def get_default_config(cls) -> dict[str, Any]:
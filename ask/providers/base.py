@@ -1,16 +1,257 @@
 """Abstract base class for all providers."""
 
+import re
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Sequence
 from typing import Any
 
+from ask.config import SYSTEM_PROMPT
+
+# Finish reasons, lowercased, that mean generation stopped at the token limit
+TRUNCATED_REASONS = frozenset({"length", "max_tokens", "reason_max_len"})
+
+# Opening fence (with optional language) and an optional closing fence
+CODE_FENCE_PATTERN = re.compile(
+    r"^\s*```[\w+-]*[ \t]*\n?(.*?)(?:\n?```)?\s*$", re.DOTALL
+)
+
+
+def strip_code_fence(text: str) -> str:
+    """Remove a markdown code fence wrapped around a response.
+
+    An unterminated fence is also removed, since stop sequences commonly cut the
+    response off right before the closing fence.
+
+    Args:
+        text: The response text
+
+    Returns:
+        The text inside the fence, or text unchanged if it is not fenced
+    """
+    re_match = CODE_FENCE_PATTERN.match(text)
+    if re_match is None:
+        return text
+    return re_match.group(1).strip()
+
+
+def find_command_end(text: str, stop: Sequence[str] = ()) -> int | None:
+    """Find where a complete command ends in partially generated text.
+
+    A command is complete once a stop sequence appears, or once a response that
+    opened with a code fence has closed it.
+
+    Args:
+        text: The text generated so far
+        stop: Stop sequences that end the command
+
+    Returns:
+        The index the command ends at, or None if it may not be complete yet
+    """
+    positions = [text.find(sequence) for sequence in stop if sequence in text]
+    if text.lstrip().startswith("```"):
+        fence_start = text.index("```")
+        closing = text.find("\n```", fence_start + 3)
+        if closing != -1:
+            positions.append(closing + len("\n```"))
+    return min(positions) if positions else None
+
+
+def read_until_complete(
+    stream: Iterable[Any],
+    get_text: Callable[[Any], str | None],
+    stop: Sequence[str] = (),
+) -> str:
+    """Accumulate streamed text, hanging up as soon as a command is complete.
+
+    The stream is closed once the command is complete so the server stops
+    generating tokens that would be thrown away.
+
+    Args:
+        stream: The streaming response from the SDK
+        get_text: Extracts the text delta from a single stream event
+        stop: Stop sequences that end the command
+
+    Returns:
+        The generated text, truncated where the command ends
+    """
+    text = ""
+    try:
+        for event in stream:
+            text += get_text(event) or ""
+            end = find_command_end(text, stop)
+            if end is not None:
+                return text[:end]
+        return text
+    finally:
+        close = getattr(stream, "close", None)
+        if callable(close):
+            close()
+
+
+def _count(value: Any) -> int | None:
+    """Return value if it is a token count reported by an SDK, otherwise None."""
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def _reason(value: Any) -> str | None:
+    """Normalize a finish reason, which SDKs report as a string or an enum."""
+    name = getattr(value, "name", value)
+    return name.lower() if isinstance(name, str) else None
+
+
+class TokenUsage:
+    """Tokens used by a single request, as reported by the provider."""
+
+    __slots__ = ("input_tokens", "output_tokens", "cached_tokens")
+
+    def __init__(
+        self,
+        input_tokens: Any = None,
+        output_tokens: Any = None,
+        cached_tokens: Any = None,
+    ):
+        """Initialize usage, ignoring counts the SDK did not report as integers."""
+        self.input_tokens = _count(input_tokens)
+        self.output_tokens = _count(output_tokens)
+        self.cached_tokens = _count(cached_tokens)
+
+
+class CommandResult:
+    """A generated command with the details of the request that produced it."""
+
+    __slots__ = (
+        "command",
+        "raw_text",
+        "usage",
+        "latency",
+        "finish_reason",
+        "provider",
+        "model",
+        "first_token_latency",
+    )
+
+    def __init__(
+        self,
+        command: str,
+        raw_text: str | None = None,
+        usage: TokenUsage | None = None,
+        latency: float | None = None,
+        finish_reason: Any = None,
+        provider: str | None = None,
+        model: str | None = None,
+        first_token_latency: float | None = None,
+    ):
+        """Initialize result.
+
+        Args:
+            command: The bash command, with any code fence removed
+            raw_text: The text the model generated, the command if not given
+            usage: Tokens reported by the provider
+            latency: Wall-clock seconds the request took
+            finish_reason: Why generation stopped, as reported by the SDK
+            provider: Registered name of the provider
+            model: Model that generated the command
+            first_token_latency: Seconds until the first text arrived; the
+                whole latency unless the response was streamed
+        """
+        self.command = command
+        self.raw_text = command if raw_text is None else raw_text
+        self.usage = usage
+        self.latency = latency
+        self.finish_reason = _reason(finish_reason)
+        self.provider = provider
+        self.model = model
+        self.first_token_latency = (
+            latency if first_token_latency is None else first_token_latency
+        )
+
+    @property
+    def truncated(self) -> bool:
+        """Whether generation stopped at the max_tokens limit."""
+        return self.finish_reason in TRUNCATED_REASONS
+
 
 class ProviderInterface(ABC):
     """Abstract base class for all AI providers."""
 
+    # perf_counter() when the current request's stream produced text
+    _first_text_at: float | None = None
+    # Set when the configuration was reloaded after this provider was built,
+    # so it is compared with the new configuration before it is reused
+    config_reloaded: bool = False
+
     def __init__(self, config: dict[str, Any]):
         """Initialize provider with configuration."""
         self.config = config
 
+    def get_system_prompt(self) -> str:
+        """Return the system prompt, followed by any context gathered for the run."""
+        system_prompt = self.config.get("system_prompt", SYSTEM_PROMPT)
+        context = self.config.get("system_context")
+        if context:
+            return f"{system_prompt}\n\n{context}"
+        return system_prompt
+
+    def read_stream(
+        self,
+        stream: Iterable[Any],
+        get_text: Callable[[Any], str | None],
+        stop: Sequence[str] = (),
+    ) -> str:
+        """Read a streamed response with read_until_complete.
+
+        Also notes when the first text arrived, for the time to first token.
+        """
+        self._first_text_at = None
+
+        def timed_get_text(event: Any) -> str | None:
+            text = get_text(event)
+            if text and self._first_text_at is None:
+                self._first_text_at = time.perf_counter()
+            return text
+
+        return read_until_complete(stream, timed_get_text, stop)
+
+    def _result(
+        self,
+        raw_text: str,
+        command: str,
+        start: float,
+        usage: TokenUsage | None = None,
+        finish_reason: Any = None,
+    ) -> CommandResult:
+        """Build the result of a request that started at perf_counter() start."""
+        from ask.providers import get_provider_name
+
+        first_token_latency = None
+        if self._first_text_at is not None:
+            first_token_latency = self._first_text_at - start
+            self._first_text_at = None
+        return CommandResult(
+            command,
+            raw_text=raw_text,
+            usage=usage,
+            latency=time.perf_counter() - start,
+            first_token_latency=first_token_latency,
+            finish_reason=finish_reason,
+            provider=get_provider_name(self),
+            model=self.config.get(
+                "model_name", self.get_default_config().get("model_name")
+            ),
+        )
+
+    def generate(self, prompt: str) -> CommandResult:
+        """Generate a bash command with the details of the request.
+
+        Providers that can report token usage or finish reasons override this.
+        The default wraps get_bash_command, so providers that only implement
+        that still work.
+        """
+        start = time.perf_counter()
+        command = self.get_bash_command(prompt)
+        return self._result(command, command, start)
+
     @abstractmethod
     def get_bash_command(self, prompt: str) -> str:
         """Generate bash command from natural language prompt."""
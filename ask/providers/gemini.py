@@ -1,14 +1,21 @@
-"""Anthropic provider implementation."""
+"""Gemini provider implementation."""
 
 import os
-from typing import Any
+import time
+from typing import Any, NoReturn
 
+import httpx
 from google import genai
 from google.genai.types import GenerateContentConfig, GenerateContentResponse
 
 from ask.config import SYSTEM_PROMPT
-from ask.exceptions import APIError, AuthenticationError, RateLimitError
-from ask.providers.base import ProviderInterface
+from ask.exceptions import AuthenticationError, classify_error
+from ask.providers.base import (
+    CommandResult,
+    ProviderInterface,
+    TokenUsage,
+    strip_code_fence,
+)
 
 
 class GeminiProvider(ProviderInterface):
@@ -28,25 +35,61 @@ class GeminiProvider(ProviderInterface):
             return ""
         return "".join([part.text for part in parts])
 
+    @staticmethod
+    def _usage(response: GenerateContentResponse) -> TokenUsage | None:
+        """Read token counts from a response's usage metadata."""
+        metadata = response.usage_metadata
+        if metadata is None:
+            return None
+        return TokenUsage(
+            input_tokens=metadata.prompt_token_count,
+            output_tokens=metadata.candidates_token_count,
+            cached_tokens=metadata.cached_content_token_count,
+        )
+
     def get_bash_command(self, prompt: str) -> str:
         """Generate bash command from natural language prompt."""
+        return self.generate(prompt).command
+
+    def generate(self, prompt: str) -> CommandResult:
+        """Generate bash command with token usage and finish reason."""
         if self.client is None:
             self.validate_config()
 
         # After validate_config(), client should be set
         assert self.client is not None, "Client should be initialized after validation"
 
+        stop = self.config.get("stop")
+        model = self.config.get("model_name", "gemini-2.5-flash")
+        generate_config = GenerateContentConfig(
+            max_output_tokens=self.config.get("max_tokens", 150),
+            temperature=self.config.get("temperature", 0.5),
+            system_instruction=self.get_system_prompt(),
+            stop_sequences=stop,
+        )
+
+        start = time.perf_counter()
         try:
+            if self.config.get("stream", False):
+                stream = self.client.models.generate_content_stream(
+                    model=model, contents=prompt, config=generate_config
+                )
+                text = self.read_stream(stream, self._parse_response, stop or ())
+                return self._result(text, strip_code_fence(text), start)
             response = self.client.models.generate_content(
-                model=self.config.get("model_name", "gemini-2.5-flash"),
-                contents=prompt,
-                config=GenerateContentConfig(
-                    max_output_tokens=self.config.get("max_tokens", 150),
-                    temperature=self.config.get("temperature", 0.5),
-                    system_instruction=self.config.get("system_prompt", SYSTEM_PROMPT),
-                ),
+                model=model, contents=prompt, config=generate_config
+            )
+            text = self._parse_response(response)
+            finish_reason = (
+                response.candidates[0].finish_reason if response.candidates else None
+            )
+            return self._result(
+                text,
+                strip_code_fence(text),
+                start,
+                usage=self._usage(response),
+                finish_reason=finish_reason,
             )
-            return self._parse_response(response)
         except Exception as e:
             self._handle_api_error(e)
 
@@ -62,16 +105,9 @@ class GeminiProvider(ProviderInterface):
 
         self.client = genai.Client(api_key=api_key)
 
-    def _handle_api_error(self, error: Exception):
-        """Handle API errors and map them to standard exceptions."""
-        error_str = str(error).lower()
-
-        if "authentication" in error_str or "unauthorized" in error_str:
-            raise AuthenticationError("Error: Invalid API key")
-        elif "rate limit" in error_str:
-            raise RateLimitError("Error: API rate limit exceeded")
-        else:
-            raise APIError(f"Error: API request failed - {error}")
+    def _handle_api_error(self, error: Exception) -> NoReturn:
+        """Map SDK errors to standard exceptions by type and status code."""
+        raise classify_error(error, (httpx.TransportError,)) from error
 
     @classmethod
     def get_default_config(cls) -> dict[str, Any]:
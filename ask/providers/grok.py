@@ -2,14 +2,20 @@
 
 import os
 import re
+import time
 from typing import Any, NoReturn
 
 from xai_sdk import Client
 from xai_sdk.chat import system, user
 
 from ask.config import SYSTEM_PROMPT
-from ask.exceptions import APIError, AuthenticationError, RateLimitError
-from ask.providers.base import ProviderInterface
+from ask.exceptions import APIError, AuthenticationError, classify_error
+from ask.providers.base import (
+    CommandResult,
+    ProviderInterface,
+    TokenUsage,
+    strip_code_fence,
+)
 
 
 class GrokProvider(ProviderInterface):
@@ -33,24 +39,51 @@ class GrokProvider(ProviderInterface):
         Returns:
             The generated bash command
         """
+        return self.generate(prompt).command
+
+    def generate(self, prompt: str) -> CommandResult:
+        """Generate bash command with token usage and finish reason.
+
+        Args:
+            prompt: The natural language prompt to generate a bash command for
+
+        Returns:
+            The generated command and request details
+        """
         if self.client is None:
             self.validate_config()
 
         # After validate_config(), client should be set
         assert self.client is not None, "Client should be initialized after validation"
 
+        start = time.perf_counter()
+        usage, finish_reason = None, None
         try:
             model_name = self.config.get("model_name", "grok-3-fast")
-            system_prompt = self.config.get("system_prompt", SYSTEM_PROMPT)
+            system_prompt = self.get_system_prompt()
+
+            stop = self.config.get("stop")
+            create_args = {"stop": stop} if stop else {}
 
             # Create chat using xAI SDK workflow
-            chat = self.client.chat.create(model=model_name)
+            chat = self.client.chat.create(model=model_name, **create_args)
             chat.append(system(system_prompt))
             chat.append(user(prompt))
 
             # Get response
-            response = chat.sample()
-            content = response.content
+            if self.config.get("stream", False):
+                content = self.read_stream(
+                    chat.stream(), lambda event: event[1].content, stop or ()
+                )
+            else:
+                response = chat.sample()
+                usage = TokenUsage(
+                    input_tokens=response.usage.prompt_tokens,
+                    output_tokens=response.usage.completion_tokens,
+                    cached_tokens=response.usage.cached_prompt_text_tokens,
+                )
+                finish_reason = getattr(response, "finish_reason", None)
+                content = response.content
 
             if content is None:
                 raise APIError("Error: API returned empty response")
@@ -58,9 +91,10 @@ class GrokProvider(ProviderInterface):
             # Remove ```bash and ``` from the content if present
             re_match = re.search(r"```bash\n(.*)\n```", content, re.DOTALL)
             if re_match is None:
-                return content.strip()
+                command = strip_code_fence(content.strip())
             else:
-                return re_match.group(1).strip()
+                command = re_match.group(1).strip()
+            return self._result(content, command, start, usage, finish_reason)
 
         except Exception as e:
             self._handle_api_error(e)
@@ -79,31 +113,16 @@ class GrokProvider(ProviderInterface):
         self.client = Client(api_key=api_key)
 
     def _handle_api_error(self, error: Exception) -> NoReturn:
-        """Handle API errors and map them to standard exceptions.
+        """Map SDK errors to standard exceptions by gRPC status code.
 
         Args:
             error: The exception to handle
 
         Raises:
-            AuthenticationError: If the API key is invalid
-            RateLimitError: If the API rate limit is exceeded
+            ProviderError: The classified error, such as AuthenticationError or
+                RateLimitError
         """
-        error_str = str(error).lower()
-
-        if (
-            "authentication" in error_str
-            or "unauthorized" in error_str
-            or "invalid api key" in error_str
-        ):
-            raise AuthenticationError("Error: Invalid API key")
-        elif (
-            "rate limit" in error_str
-            or "quota" in error_str
-            or "too many requests" in error_str
-        ):
-            raise RateLimitError("Error: API rate limit exceeded")
-        else:
-            raise APIError(f"Error: API request failed - {error}")
+        raise classify_error(error) from error
 
     @classmethod
     def get_default_config(cls) -> dict[str, Any]:
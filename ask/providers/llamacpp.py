@@ -0,0 +1,162 @@
+"""In-process llama.cpp provider implementation."""
+
+import importlib
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from ask.config import SYSTEM_PROMPT
+from ask.exceptions import APIError, ConfigurationError
+from ask.providers.base import (
+    CommandResult,
+    ProviderInterface,
+    TokenUsage,
+    strip_code_fence,
+)
+
+module_logger = logger.bind(module=__name__)
+
+# Loaded models, kept for the life of the process so that long-running callers
+# (daemon, REPL) only pay the load cost once
+_MODEL_CACHE: dict[tuple[Any, ...], Any] = {}
+# A Llama instance is not safe to use from several threads at once, so each
+# loaded model has a lock that is held for the whole of a generation
+_MODEL_LOCKS: dict[tuple[Any, ...], threading.Lock] = {}
+# Guards the caches, so threads asking for the same model load it only once
+_CACHE_LOCK = threading.Lock()
+
+# Config keys forwarded to llama_cpp.Llama when loading a model
+LOAD_OPTIONS = (
+    "n_ctx",
+    "n_threads",
+    "n_batch",
+    "n_gpu_layers",
+    "use_mmap",
+    "use_mlock",
+    "seed",
+    "chat_format",
+)
+
+
+def _import_llama_cpp() -> Any:
+    """Import llama_cpp, which is an optional dependency."""
+    try:
+        return importlib.import_module("llama_cpp")
+    except ImportError:
+        raise ConfigurationError(
+            "Error: llama-cpp-python is required for the llamacpp provider. "
+            "Install with: pip install 'terminal-sherpa[llamacpp]'"
+        )
+
+
+class LlamaCppProvider(ProviderInterface):
+    """Provider that runs GGUF models in-process with llama-cpp-python."""
+
+    def __init__(self, config: dict[str, Any]):
+        """Initialize llama.cpp provider with configuration."""
+        super().__init__(config)
+        self.model: Any | None = None  # pragma: no mutate
+        self.lock = threading.Lock()
+
+    def _load_options(self) -> dict[str, Any]:
+        """Collect model loading options, memory-mapping the file by default."""
+        options: dict[str, Any] = {"n_ctx": 2048, "use_mmap": True, "verbose": False}
+        options.update(
+            {key: self.config[key] for key in LOAD_OPTIONS if key in self.config}
+        )
+        return options
+
+    def get_bash_command(self, prompt: str) -> str:
+        """Generate bash command from natural language prompt."""
+        return self.generate(prompt).command
+
+    def generate(self, prompt: str) -> CommandResult:
+        """Generate bash command with token usage and finish reason."""
+        if self.model is None:
+            self.validate_config()
+
+        # After validate_config(), model should be loaded
+        assert self.model is not None, "Model should be loaded after validation"
+
+        stop = self.config.get("stop")
+        start = time.perf_counter()
+        usage, finish_reason = None, None
+        with self.lock:
+            try:
+                response = self.model.create_chat_completion(
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": self.get_system_prompt(),
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                    max_tokens=self.config.get("max_tokens", 150),
+                    temperature=self.config.get("temperature", 0.5),
+                    stop=stop,
+                    stream=self.config.get("stream", False),
+                )
+                if self.config.get("stream", False):
+                    content = self.read_stream(
+                        response,
+                        lambda chunk: chunk["choices"][0]["delta"].get("content"),
+                        stop or (),
+                    )
+                else:
+                    counts = response.get("usage") or {}
+                    usage = TokenUsage(
+                        input_tokens=counts.get("prompt_tokens"),
+                        output_tokens=counts.get("completion_tokens"),
+                    )
+                    finish_reason = response["choices"][0].get("finish_reason")
+                    content = response["choices"][0]["message"]["content"]
+            except Exception as e:
+                raise APIError(f"Error: Generation failed - {e}")
+
+        if content is None:
+            raise APIError("Error: Model returned empty response")
+        return self._result(
+            content, strip_code_fence(content.strip()), start, usage, finish_reason
+        )
+
+    def validate_config(self) -> None:
+        """Validate the model path and load the model, reusing a loaded copy."""
+        model_path = self.config.get("model_path")
+        if not model_path:
+            raise ConfigurationError(
+                "Error: model_path is required for the llamacpp provider"
+            )
+        path = Path(model_path).expanduser()
+        if not path.is_file():
+            raise ConfigurationError(f"Error: Model file not found: {path}")
+
+        options = self._load_options()
+        cache_key = (str(path), *sorted(options.items()))
+        with _CACHE_LOCK:
+            if cache_key not in _MODEL_CACHE:
+                llama_cpp = _import_llama_cpp()
+                module_logger.debug(f"Loading llama.cpp model {path} with {options}")
+                try:
+                    _MODEL_CACHE[cache_key] = llama_cpp.Llama(
+                        model_path=str(path), **options
+                    )
+                except Exception as e:
+                    raise ConfigurationError(f"Error: Failed to load model {path}: {e}")
+                _MODEL_LOCKS[cache_key] = threading.Lock()
+            self.model = _MODEL_CACHE[cache_key]
+            self.lock = _MODEL_LOCKS[cache_key]
+
+    @classmethod
+    def get_default_config(cls) -> dict[str, Any]:
+        """Return default configuration for llama.cpp provider."""
+        return {
+            "model_path": "",
+            "n_ctx": 2048,
+            "use_mmap": True,
+            "max_tokens": 150,
+            "temperature": 0.5,
+            "system_prompt": SYSTEM_PROMPT,
+        }
@@ -1,16 +1,82 @@
 """Ollama provider implementation."""
 
-from typing import Any
+import time
+from operator import attrgetter
+from typing import Any, NoReturn
 
 import ollama
 from loguru import logger
 
 from ask.config import SYSTEM_PROMPT
-from ask.exceptions import APIError, AuthenticationError
-from ask.providers.base import ProviderInterface
+from ask.exceptions import (
+    APIError,
+    AuthenticationError,
+    ConfigurationError,
+    ModelNotFoundError,
+    ServiceUnavailableError,
+    classify_error,
+)
+from ask.providers.base import (
+    CommandResult,
+    ProviderInterface,
+    TokenUsage,
+    strip_code_fence,
+)
+from ask.providers.ollama_examples import (
+    BATCH_SIZE,
+    DEFAULT_EMBEDDING_MODEL,
+    DEFAULT_MIN_SIMILARITY,
+    EXAMPLE_ERRORS,
+    ExampleIndex,
+    format_examples,
+    import_numpy,
+)
+from ask.providers.ollama_pool import (
+    CONNECTION_ERRORS,
+    ENDPOINTS,
+    EndpointSelector,
+    OllamaHostPool,
+    shared_pool,
+)
 
 module_logger = logger.bind(module=__name__)
 
+# Fields of the Ollama "options" object that can be set directly in a config section
+OLLAMA_OPTIONS = frozenset(
+    {
+        "numa",
+        "num_ctx",
+        "num_batch",
+        "num_gpu",
+        "main_gpu",
+        "low_vram",
+        "f16_kv",
+        "logits_all",
+        "vocab_only",
+        "use_mmap",
+        "use_mlock",
+        "embedding_only",
+        "num_thread",
+        "num_keep",
+        "seed",
+        "num_predict",
+        "top_k",
+        "top_p",
+        "tfs_z",
+        "typical_p",
+        "repeat_last_n",
+        "temperature",
+        "repeat_penalty",
+        "presence_penalty",
+        "frequency_penalty",
+        "mirostat",
+        "mirostat_tau",
+        "mirostat_eta",
+        "penalize_newline",
+        "stop",
+    }
+)
+
 
 class OllamaProvider(ProviderInterface):
     """Ollama provider implementation for local models."""
@@ -19,9 +85,15 @@ class OllamaProvider(ProviderInterface):
         """Initialize Ollama provider with configuration."""
         super().__init__(config)
         self.client: ollama.Client | None = None
+        self.pool: OllamaHostPool | None = None
+        self.endpoint_selector: EndpointSelector | None = None
 
     def get_bash_command(self, prompt: str) -> str:
         """Generate bash command from natural language prompt."""
+        return self.generate(prompt).command
+
+    def generate(self, prompt: str) -> CommandResult:
+        """Generate bash command with token counts and done reason."""
         if self.client is None:
             self.validate_config()
 
@@ -31,6 +103,10 @@ class OllamaProvider(ProviderInterface):
             raise AssertionError("Client should be initialized after validation")
 
         model_name = self.config.get("model_name", "llama3.2")
+        prompt = self._with_examples(prompt)
+
+        if self.pool is not None:
+            return self._generate_with_pool(model_name, prompt)
 
         # Check if model is available
         try:
@@ -42,36 +118,196 @@ class OllamaProvider(ProviderInterface):
                 available_models = [model.split(":")[0] for model in available_models]
             module_logger.debug(f"Available models: {available_models}")
             if model_name not in available_models:
-                raise APIError(
-                    f"Model '{model_name}' not found. Run: ollama pull {model_name}"
+                raise ModelNotFoundError(
+                    f"Model '{model_name}' not found. Run: ollama pull {model_name}",
+                    status=404,
                 )
         except Exception as e:
-            if "not found" in str(e).lower():
-                raise APIError(
-                    f"Model '{model_name}' not found. Run: ollama pull {model_name}"
-                )
             self._handle_api_error(e)
 
+        host = self.config.get("host", "localhost")
+        port = self.config.get("port", 11434)
+        try:
+            return self._generate(
+                self.client, f"http://{host}:{port}", model_name, prompt
+            )
+        except Exception as e:
+            self._handle_api_error(e)
+
+    def _with_examples(self, prompt: str) -> str:
+        """Add the most similar accepted prompts and commands as examples."""
+        k = self.config.get("examples", 0)
+        if not k:
+            return prompt
+
         try:
-            response = self.client.generate(
+            index = ExampleIndex(
+                self.client,
+                model=self.config.get("embedding_model", DEFAULT_EMBEDDING_MODEL),
+            )
+            index.update(batch_size=self.config.get("embed_batch_size", BATCH_SIZE))
+            examples = index.search(
+                prompt,
+                k,
+                self.config.get("example_min_similarity", DEFAULT_MIN_SIMILARITY),
+            )
+        except EXAMPLE_ERRORS as e:
+            module_logger.warning(f"Few-shot examples unavailable: {e}")
+            return prompt
+        module_logger.debug(f"Using {len(examples)} few-shot examples")
+        return format_examples(examples, prompt)
+
+    def _build_options(self) -> dict[str, Any]:
+        """Collect generation options from the config.
+
+        Option fields can be set directly in the config section or in an
+        ``options`` table, which takes precedence.
+        """
+        options = {
+            "temperature": self.config.get("temperature", 0.5),
+            "num_predict": self.config.get("max_tokens", 150),
+        }
+        options.update(
+            {key: value for key, value in self.config.items() if key in OLLAMA_OPTIONS}
+        )
+        options.update(self.config.get("options", {}))
+        return options
+
+    def _select_endpoint(self, host_url: str, model_name: str) -> str:
+        """Return the API endpoint to use, measuring both when set to auto."""
+        endpoint = self.config.get("endpoint", "generate")
+        if endpoint == "auto":
+            if self.endpoint_selector is None:
+                self.endpoint_selector = EndpointSelector()
+            return self.endpoint_selector.select(host_url, model_name)
+        return endpoint
+
+    def _generate(
+        self, client: ollama.Client, host_url: str, model_name: str, prompt: str
+    ) -> CommandResult:
+        """Run a generation request against a single Ollama server."""
+        endpoint = self._select_endpoint(host_url, model_name)
+        system_prompt = self.get_system_prompt()
+        options = self._build_options()
+        stream = self.config.get("stream", False)
+        extra_args = {
+            key: self.config[key] for key in ("keep_alive",) if key in self.config
+        }
+        if stream:
+            extra_args["stream"] = True
+
+        start = time.perf_counter()
+        if endpoint == "chat":
+            response = client.chat(
+                model=model_name,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                options=options,
+                **extra_args,
+            )
+            get_text = attrgetter("message.content")
+        else:
+            if "raw" in self.config:
+                extra_args["raw"] = self.config["raw"]
+            response = client.generate(
                 model=model_name,
                 prompt=prompt,
-                system=self.config.get("system_prompt", SYSTEM_PROMPT),
-                options={
-                    "temperature": self.config.get("temperature", 0.5),
-                    "num_predict": self.config.get("max_tokens", 150),
-                },
+                system=system_prompt,
+                options=options,
+                **extra_args,
+            )
+            get_text = attrgetter("response")
+        usage, done_reason = None, None
+        if stream:
+            response_text = self.read_stream(
+                response, get_text, options.get("stop") or ()
+            )
+        else:
+            response_text = get_text(response)
+            usage = TokenUsage(
+                input_tokens=response.prompt_eval_count,
+                output_tokens=response.eval_count,
+            )
+            done_reason = response.done_reason
+        if self.endpoint_selector is not None:
+            self.endpoint_selector.record(
+                host_url, model_name, endpoint, time.perf_counter() - start
             )
-            response_text = response.response
-            if response_text is None:
-                raise APIError("Error: API returned empty response")
-            return response_text
 
-        except Exception as e:
-            self._handle_api_error(e)
+        if response_text is None:
+            raise APIError("Error: API returned empty response")
+        return self._result(
+            response_text, strip_code_fence(response_text), start, usage, done_reason
+        )
+
+    def _generate_with_pool(self, model_name: str, prompt: str) -> CommandResult:
+        """Generate on the best available host, failing over on connection errors."""
+        assert self.pool is not None, "Pool should be initialized after validation"
+
+        self.pool.refresh()
+        hosts = self.pool.candidates(model_name)
+        if not hosts:
+            if any(host.has_model(model_name) for host in self.pool.hosts):
+                raise AuthenticationError(
+                    f"Error: No Ollama server serving '{model_name}' is reachable"
+                )
+            raise ModelNotFoundError(
+                f"Model '{model_name}' not found. Run: ollama pull {model_name}",
+                status=404,
+            )
+
+        for host in hosts:
+            module_logger.debug(f"Sending request to Ollama host {host.url}")
+            try:
+                with self.pool.reserve(host):
+                    return self._generate(host.client, host.url, model_name, prompt)
+            except CONNECTION_ERRORS:
+                self.pool.mark_failed(host)
+            except Exception as e:
+                self._handle_api_error(e)
+
+        raise AuthenticationError(
+            "Error: Cannot connect to any Ollama server", transient=True
+        )
+
+    def _validate_pool(self, hosts: list[str]) -> None:
+        """Use the shared host pool and make sure at least one host is reachable."""
+        self.pool = shared_pool(
+            hosts,
+            strategy=self.config.get("host_strategy", "least_outstanding"),
+            health_ttl=self.config.get("health_ttl", 30.0),
+        )
+        self.pool.refresh()
+        healthy = self.pool.healthy_hosts()
+        if not healthy:
+            # Cached failures may be stale, so probe again before giving up
+            self.pool.refresh(force=True)
+            healthy = self.pool.healthy_hosts()
+        if not healthy:
+            raise AuthenticationError(
+                f"No Ollama server running at any of {', '.join(hosts)}. "
+                "Start with: ollama serve"
+            )
+        self.client = healthy[0].client
 
     def validate_config(self) -> None:
         """Validate provider configuration and connection."""
+        endpoint = self.config.get("endpoint", "generate")
+        if endpoint not in (*ENDPOINTS, "auto"):
+            raise ConfigurationError(
+                f"Unknown Ollama endpoint '{endpoint}'. "
+                f"Available endpoints: {[*ENDPOINTS, 'auto']}"
+            )
+        if self.config.get("examples", 0):
+            import_numpy()
+
+        hosts = self.config.get("hosts")
+        if hosts:
+            self._validate_pool(hosts)
+            return
+
         host = self.config.get("host", "localhost")
         port = self.config.get("port", 11434)
 
@@ -84,16 +320,18 @@ class OllamaProvider(ProviderInterface):
                 f"Ollama server not running at {host}:{port}. Start with: ollama serve"
             )
 
-    def _handle_api_error(self, error: Exception):
-        """Handle API errors and map them to standard exceptions."""
-        error_str = str(error).lower()
-
-        if "connection" in error_str or "refused" in error_str:
-            raise AuthenticationError("Error: Cannot connect to Ollama server")
-        elif "not found" in error_str or "model" in error_str:
-            raise APIError(f"Error: Model issue - {error}")
-        else:
-            raise APIError(f"Error: API request failed - {error}")
+    def _handle_api_error(self, error: Exception) -> NoReturn:
+        """Map SDK errors to standard exceptions by type and status code."""
+        classified = classify_error(error, CONNECTION_ERRORS)
+        if (
+            isinstance(classified, ServiceUnavailableError)
+            and classified.status is None
+        ):
+            # No response at all means the server is not running
+            raise AuthenticationError(
+                "Error: Cannot connect to Ollama server", transient=True
+            ) from error
+        raise classified from error
 
     @classmethod
     def get_default_config(cls) -> dict[str, Any]:
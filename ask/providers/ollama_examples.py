@@ -0,0 +1,202 @@
+"""Few-shot examples for Ollama models, retrieved by embedding similarity.
+
+Accepted prompt and command pairs come from the prompt cache. Their prompts are
+embedded with Ollama's embeddings endpoint, normalized to unit length and
+appended to a float32 matrix on disk, which is memory-mapped for search.
+"""
+
+import importlib
+import re
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+import ollama
+from loguru import logger
+
+import ask.config as config
+from ask.cache import read_json, write_json
+from ask.exceptions import ConfigurationError
+from ask.prompt_cache import PromptCache
+from ask.providers.ollama_pool import CONNECTION_ERRORS
+
+module_logger = logger.bind(module=__name__)
+
+EXAMPLES_DIR = "ollama_examples"
+DEFAULT_EMBEDDING_MODEL = "nomic-embed-text"
+# Prompts sent to the embeddings endpoint per request
+BATCH_SIZE = 32
+# New examples embedded per run, so a large backlog does not stall one request
+MAX_INDEX_PER_RUN = 256
+# Examples less similar than this to the prompt are not used
+DEFAULT_MIN_SIMILARITY = 0.5
+
+# Failures that disable examples for a request instead of failing it
+EXAMPLE_ERRORS = (
+    ollama.ResponseError,
+    sqlite3.Error,
+    OSError,
+    ValueError,
+    *CONNECTION_ERRORS,
+)
+
+
+def import_numpy() -> Any:
+    """Import numpy, which is an optional dependency."""
+    try:
+        return importlib.import_module("numpy")
+    except ImportError:
+        raise ConfigurationError(
+            "Error: numpy is required for Ollama few-shot examples. "
+            "Install with: pip install 'terminal-sherpa[examples]'"
+        )
+
+
+def format_examples(examples: list[tuple[str, str, float]], prompt: str) -> str:
+    """Prefix prompt with example requests and the commands that answered them.
+
+    Args:
+        examples: (prompt, command, similarity) tuples, most similar first
+        prompt: The prompt to answer
+
+    Returns:
+        The prompt with examples, or the prompt unchanged if there are none
+    """
+    if not examples:
+        return prompt
+    shots = "\n\n".join(
+        f"Request: {example}\nCommand: {command}" for example, command, _ in examples
+    )
+    return (
+        "Examples of requests and the commands that answer them:\n\n"
+        f"{shots}\n\nRequest: {prompt}\nCommand:"
+    )
+
+
+class ExampleIndex:
+    """Embeddings of accepted prompts, stored as a memory-mapped matrix.
+
+    The directory holds ``vectors.f32`` (one unit-length row per example),
+    ``ids.i64`` (the prompt cache id of each row) and ``meta.json``. The row
+    count in ``meta.json`` is authoritative, so rows left over from an
+    interrupted update are overwritten by the next one.
+    """
+
+    def __init__(
+        self,
+        client: ollama.Client,
+        model: str = DEFAULT_EMBEDDING_MODEL,
+        path: Path | None = None,
+        prompt_cache_path: Path | None = None,
+    ):
+        """Initialize index for an embedding model, loading its metadata."""
+        self.np = import_numpy()
+        self.client = client
+        self.model = model
+        self.path = path or (
+            config.get_cache_dir() / EXAMPLES_DIR / re.sub(r"[^\w.-]", "_", model)
+        )
+        self.prompt_cache_path = prompt_cache_path
+        self.meta = read_json(self.path / "meta.json")
+
+    @property
+    def count(self) -> int:
+        """Number of indexed examples."""
+        return self.meta.get("count", 0)
+
+    def _embed(self, texts: list[str]) -> Any:
+        """Embed texts and normalize each row to unit length."""
+        response = self.client.embed(model=self.model, input=texts)
+        vectors = self.np.asarray(response.embeddings, dtype=self.np.float32)
+        norms = self.np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / self.np.maximum(norms, 1e-12)
+
+    def _append(self, name: str, data: Any) -> None:
+        """Append rows to a matrix file, dropping rows beyond the indexed count."""
+        path = self.path / name
+        row_bytes = data.itemsize * (data.shape[1] if data.ndim > 1 else 1)
+        with open(path, "ab") as f:
+            f.truncate(self.count * row_bytes)
+            f.write(data.tobytes())
+
+    def update(
+        self, batch_size: int = BATCH_SIZE, limit: int = MAX_INDEX_PER_RUN
+    ) -> int:
+        """Embed prompt cache entries added since the last update.
+
+        Args:
+            batch_size: Prompts embedded per request
+            limit: Maximum number of entries to embed in this call
+
+        Returns:
+            The number of examples added
+        """
+        cache = PromptCache(self.prompt_cache_path)
+        try:
+            entries = cache.entries_after(self.meta.get("last_id", 0), limit)
+        finally:
+            cache.close()
+        if not entries:
+            return 0
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        for start in range(0, len(entries), batch_size):
+            batch = entries[start : start + batch_size]
+            vectors = self._embed([prompt for _, prompt in batch])
+            if self.meta.get("dim", vectors.shape[1]) != vectors.shape[1]:
+                raise ValueError(
+                    f"Embedding size changed for {self.model}, "
+                    f"delete {self.path} to rebuild the index"
+                )
+            ids = self.np.asarray([entry_id for entry_id, _ in batch], dtype="<i8")
+            self._append("vectors.f32", vectors.astype("<f4"))
+            self._append("ids.i64", ids)
+            self.meta.update(
+                dim=vectors.shape[1],
+                count=self.count + len(batch),
+                last_id=batch[-1][0],
+            )
+            write_json(self.path / "meta.json", self.meta)
+        module_logger.debug(f"Indexed {len(entries)} examples with {self.model}")
+        return len(entries)
+
+    def search(
+        self, prompt: str, k: int, min_similarity: float = DEFAULT_MIN_SIMILARITY
+    ) -> list[tuple[str, str, float]]:
+        """Return the k examples most similar to prompt.
+
+        Args:
+            prompt: The prompt to find examples for
+            k: Maximum number of examples
+            min_similarity: Cosine similarity below which examples are dropped
+
+        Returns:
+            (prompt, command, similarity) tuples, most similar first
+        """
+        np = self.np
+        if not self.count or k <= 0:
+            return []
+        shape = (self.count, self.meta["dim"])
+        vectors = np.memmap(
+            self.path / "vectors.f32", dtype="<f4", mode="r", shape=shape
+        )
+        ids = np.memmap(self.path / "ids.i64", dtype="<i8", mode="r", shape=(shape[0],))
+
+        scores = vectors @ self._embed([prompt])[0]
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = [int(row) for row in top if scores[row] >= min_similarity]
+        if not top:
+            return []
+
+        cache = PromptCache(self.prompt_cache_path)
+        try:
+            entries = cache.get_entries([int(ids[row]) for row in top])
+        finally:
+            cache.close()
+        return [
+            (*entries[int(ids[row])], float(scores[row]))
+            for row in top
+            if int(ids[row]) in entries
+        ]
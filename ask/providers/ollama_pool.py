@@ -0,0 +1,301 @@
+"""Host pool and endpoint selection for Ollama servers."""
+
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import httpx
+import ollama
+from loguru import logger
+
+from ask.cache import read_json, write_json
+from ask.config import get_cache_dir
+from ask.exceptions import ConfigurationError
+
+module_logger = logger.bind(module=__name__)
+
+HEALTH_CACHE_FILE = "ollama_hosts.json"
+ENDPOINT_CACHE_FILE = "ollama_endpoints.json"
+STRATEGIES = ("least_outstanding", "latency")
+ENDPOINTS = ("generate", "chat")
+# Samples of each endpoint taken before settling on the faster one
+ENDPOINT_SAMPLES = 3
+# Weight given to the newest latency sample in the moving average
+LATENCY_ALPHA = 0.3
+# Errors that mean the host is unreachable and the request can be retried elsewhere
+CONNECTION_ERRORS = (ConnectionError, httpx.TransportError)
+
+
+def normalize_host(host: str, default_port: int = 11434) -> str:
+    """Return host as a URL of the form scheme://host:port.
+
+    Args:
+        host: Host name with optional scheme and port
+        default_port: Port used when host does not include one
+
+    Returns:
+        The normalized host URL
+    """
+    scheme, _, address = host.rpartition("://")
+    address = address.rstrip("/")
+    if ":" not in address:
+        address = f"{address}:{default_port}"
+    return f"{scheme or 'http'}://{address}"
+
+
+def model_available(model_name: str, models: list[str]) -> bool:
+    """Check whether model_name is in the list of models served by a host.
+
+    If the model name has no tag, any tagged version of it counts.
+    """
+    if ":" not in model_name:
+        models = [model.split(":")[0] for model in models]
+    return model_name in models
+
+
+def moving_average(average: float | None, seconds: float) -> float:
+    """Fold a latency sample into a moving average, starting one if needed."""
+    if average is None:
+        return seconds
+    return LATENCY_ALPHA * seconds + (1 - LATENCY_ALPHA) * average
+
+
+class OllamaHost:
+    """Health, latency and load state for a single Ollama server.
+
+    Generations and health probes are timed separately: a probe only lists
+    models, so its round trip says nothing about how fast the host generates.
+    Hosts are ranked on generation latency alone.
+    """
+
+    def __init__(self, url: str):
+        """Initialize host state for the server at url."""
+        self.url = url
+        self.healthy = True
+        self.latency: float | None = None
+        self.probe_latency: float | None = None
+        self.models: list[str] | None = None
+        self.checked_at = 0.0
+        self.outstanding = 0
+        self._client: ollama.Client | None = None
+
+    @property
+    def client(self) -> ollama.Client:
+        """Return the client for this host, creating it on first use."""
+        if self._client is None:
+            self._client = ollama.Client(host=self.url)
+        return self._client
+
+    def has_model(self, model_name: str) -> bool:
+        """Check whether the host serves model_name.
+
+        Hosts whose model list is unknown are assumed to serve it.
+        """
+        if self.models is None:
+            return True
+        return model_available(model_name, self.models)
+
+    def record_latency(self, seconds: float) -> None:
+        """Fold the duration of a generation into its moving average."""
+        self.latency = moving_average(self.latency, seconds)
+
+    def record_probe(self, seconds: float) -> None:
+        """Fold the round trip of a health probe into its moving average."""
+        self.probe_latency = moving_average(self.probe_latency, seconds)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the state that is persisted in the health cache."""
+        return {
+            "healthy": self.healthy,
+            "latency": self.latency,
+            "probe_latency": self.probe_latency,
+            "models": self.models,
+            "checked_at": self.checked_at,
+        }
+
+    def load_dict(self, data: dict[str, Any]) -> None:
+        """Restore state previously returned by to_dict."""
+        self.healthy = bool(data.get("healthy", True))
+        self.latency = data.get("latency")
+        self.probe_latency = data.get("probe_latency")
+        self.models = data.get("models")
+        self.checked_at = float(data.get("checked_at", 0.0))
+
+
+class OllamaHostPool:
+    """Select between several Ollama servers and fail over between them."""
+
+    def __init__(
+        self,
+        hosts: list[str],
+        strategy: str = "least_outstanding",
+        health_ttl: float = 30.0,
+        cache_path: Path | None = None,
+    ):
+        """Initialize the pool.
+
+        Args:
+            hosts: Host specifications, e.g. "gpu1:11434" or "http://gpu2"
+            strategy: Either "least_outstanding" or "latency"
+            health_ttl: Seconds a cached health check stays valid
+            cache_path: File the health checks are cached in
+        """
+        if strategy not in STRATEGIES:
+            raise ConfigurationError(
+                f"Unknown Ollama host strategy '{strategy}'. "
+                f"Available strategies: {list(STRATEGIES)}"
+            )
+        self.hosts = [OllamaHost(normalize_host(host)) for host in hosts]
+        self.strategy = strategy
+        self.health_ttl = health_ttl
+        self.cache_path = cache_path or get_cache_dir() / HEALTH_CACHE_FILE
+        self._lock = threading.Lock()
+        self._load_cache()
+
+    def _load_cache(self) -> None:
+        """Load cached health checks from disk."""
+        data = read_json(self.cache_path)
+        for host in self.hosts:
+            if isinstance(data.get(host.url), dict):
+                host.load_dict(data[host.url])
+
+    def _save_cache(self) -> None:
+        """Write health checks to disk, keeping entries for other hosts."""
+        data = read_json(self.cache_path)
+        data.update({host.url: host.to_dict() for host in self.hosts})
+        write_json(self.cache_path, data)
+
+    def check_health(self, host: OllamaHost) -> bool:
+        """Probe a host and record whether it is up and which models it serves."""
+        start = time.perf_counter()
+        try:
+            response = host.client.list()
+            host.models = [model.model for model in response.get("models", [])]
+            host.healthy = True
+            host.record_probe(time.perf_counter() - start)
+        except Exception as e:
+            module_logger.debug(f"Health check failed for {host.url}: {e}")
+            host.healthy = False
+        host.checked_at = time.time()
+        return host.healthy
+
+    def refresh(self, force: bool = False) -> None:
+        """Re-check every host whose cached health check has expired."""
+        now = time.time()
+        stale = [
+            host
+            for host in self.hosts
+            if force or now - host.checked_at > self.health_ttl
+        ]
+        if not stale:
+            return
+        with ThreadPoolExecutor(max_workers=len(stale)) as executor:
+            list(executor.map(self.check_health, stale))
+        self._save_cache()
+
+    def healthy_hosts(self) -> list[OllamaHost]:
+        """Return hosts that passed their last health check."""
+        return [host for host in self.hosts if host.healthy]
+
+    def candidates(self, model_name: str) -> list[OllamaHost]:
+        """Return healthy hosts serving model_name, best choice first."""
+        hosts = [host for host in self.healthy_hosts() if host.has_model(model_name)]
+
+        def latency(host: OllamaHost) -> float:
+            # Hosts without samples sort first so they get measured
+            return -1.0 if host.latency is None else host.latency
+
+        if self.strategy == "latency":
+            return sorted(hosts, key=latency)
+        return sorted(hosts, key=lambda host: (host.outstanding, latency(host)))
+
+    def mark_failed(self, host: OllamaHost) -> None:
+        """Take a host out of rotation until its next health check."""
+        module_logger.warning(f"Ollama host {host.url} failed, failing over")
+        host.healthy = False
+        host.checked_at = time.time()
+        self._save_cache()
+
+    @contextmanager
+    def reserve(self, host: OllamaHost) -> Iterator[OllamaHost]:
+        """Count a request against host while it is in flight."""
+        with self._lock:
+            host.outstanding += 1
+        start = time.perf_counter()
+        try:
+            yield host
+            host.record_latency(time.perf_counter() - start)
+            self._save_cache()
+        finally:
+            with self._lock:
+                host.outstanding -= 1
+
+
+# Pools by configuration, shared by the providers of a process so that every
+# thread's requests count towards the outstanding requests of each host
+_POOLS: dict[tuple[Any, ...], OllamaHostPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def shared_pool(
+    hosts: list[str], strategy: str = "least_outstanding", health_ttl: float = 30.0
+) -> OllamaHostPool:
+    """Return the pool for a host list, creating it on first use.
+
+    Args:
+        hosts: Host specifications, as for OllamaHostPool
+        strategy: Either "least_outstanding" or "latency"
+        health_ttl: Seconds a cached health check stays valid
+
+    Returns:
+        The pool shared by every caller with the same settings
+    """
+    cache_path = get_cache_dir() / HEALTH_CACHE_FILE
+    key = (
+        tuple(normalize_host(host) for host in hosts),
+        strategy,
+        health_ttl,
+        cache_path,
+    )
+    with _POOLS_LOCK:
+        if key not in _POOLS:
+            _POOLS[key] = OllamaHostPool(hosts, strategy, health_ttl, cache_path)
+        return _POOLS[key]
+
+
+class EndpointSelector:
+    """Pick whichever of /api/generate and /api/chat is faster for a model.
+
+    Each endpoint is sampled a few times per host and model, after which the one
+    with the lower average latency is used. Timings are cached on disk so the
+    choice carries over between runs.
+    """
+
+    def __init__(self, cache_path: Path | None = None):
+        """Initialize the selector, loading cached timings from cache_path."""
+        self.cache_path = cache_path or get_cache_dir() / ENDPOINT_CACHE_FILE
+        self.timings = read_json(self.cache_path)
+
+    def select(self, host_url: str, model_name: str) -> str:
+        """Return the endpoint to use for model_name on host_url."""
+        timings = self.timings.get(f"{host_url}|{model_name}", {})
+        samples = {endpoint: timings.get(endpoint, [None, 0]) for endpoint in ENDPOINTS}
+        for endpoint, (_, count) in samples.items():
+            if count < ENDPOINT_SAMPLES:
+                return endpoint
+        return min(ENDPOINTS, key=lambda endpoint: samples[endpoint][0])
+
+    def record(self, host_url: str, model_name: str, endpoint: str, seconds: float):
+        """Fold a latency sample for endpoint into its moving average."""
+        timings = self.timings.setdefault(f"{host_url}|{model_name}", {})
+        average, count = timings.get(endpoint, [None, 0])
+        if average is None:
+            average = seconds
+        else:
+            average = LATENCY_ALPHA * seconds + (1 - LATENCY_ALPHA) * average
+        timings[endpoint] = [average, count + 1]
+        write_json(self.cache_path, self.timings)
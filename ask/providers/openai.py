@@ -2,13 +2,19 @@
 
 import os
 import re
+import time
 from typing import Any, NoReturn
 
 import openai
 
 from ask.config import SYSTEM_PROMPT
-from ask.exceptions import APIError, AuthenticationError, RateLimitError
-from ask.providers.base import ProviderInterface
+from ask.exceptions import APIError, AuthenticationError, classify_error
+from ask.providers.base import (
+    CommandResult,
+    ProviderInterface,
+    TokenUsage,
+    strip_code_fence,
+)
 
 
 class OpenAIProvider(ProviderInterface):
@@ -32,37 +38,100 @@ class OpenAIProvider(ProviderInterface):
         Returns:
             The generated bash command
         """
+        return self.generate(prompt).command
+
+    def generate(self, prompt: str) -> CommandResult:
+        """Generate bash command with token usage and finish reason.
+
+        Args:
+            prompt: The natural language prompt to generate a bash command for
+
+        Returns:
+            The generated command and request details
+        """
         if self.client is None:
             self.validate_config()
 
         # After validate_config(), client should be set
         assert self.client is not None, "Client should be initialized after validation"
 
+        request = self._build_request(prompt)
+        stop = request.get("stop")
+
+        start = time.perf_counter()
+        usage, finish_reason = None, None
         try:
-            response = self.client.chat.completions.create(
-                model=self.config.get("model_name", "gpt-4o-mini"),
-                max_completion_tokens=self.config.get("max_tokens", 150),
-                temperature=self.config.get("temperature", 0.5),
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self.config.get("system_prompt", SYSTEM_PROMPT),
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-            )
-            content = response.choices[0].message.content
+            if self.config.get("stream", False):
+                stream = self.client.chat.completions.create(**request, stream=True)
+                content = self.read_stream(
+                    stream,
+                    lambda chunk: (
+                        chunk.choices[0].delta.content if chunk.choices else None
+                    ),
+                    stop or (),
+                )
+            else:
+                response = self.client.chat.completions.create(**request)
+                usage = self._usage(response.usage)
+                finish_reason = response.choices[0].finish_reason
+                content = response.choices[0].message.content
             if content is None:
                 raise APIError("Error: API returned empty response")
             # Remove ```bash and ``` from the content
             re_match = re.search(r"```bash\n(.*)\n```", content)
             if re_match is None:
-                return content
+                command = strip_code_fence(content)
             else:
-                return re_match.group(1)
+                command = re_match.group(1)
+            return self._result(content, command, start, usage, finish_reason)
         except Exception as e:
             self._handle_api_error(e)
 
+    @staticmethod
+    def _usage(usage: Any) -> TokenUsage | None:
+        """Read token counts from a completion's usage block.
+
+        Args:
+            usage: The usage block, which servers may leave out
+
+        Returns:
+            The token counts, or None if the usage block is missing
+        """
+        if usage is None:
+            return None
+        details = getattr(usage, "prompt_tokens_details", None)
+        return TokenUsage(
+            input_tokens=usage.prompt_tokens,
+            output_tokens=usage.completion_tokens,
+            cached_tokens=getattr(details, "cached_tokens", None),
+        )
+
+    def _build_request(self, prompt: str) -> dict[str, Any]:
+        """Build the chat completion request arguments.
+
+        Args:
+            prompt: The natural language prompt to generate a bash command for
+
+        Returns:
+            Keyword arguments for chat.completions.create
+        """
+        request: dict[str, Any] = {
+            "model": self.config.get("model_name", "gpt-4o-mini"),
+            "max_completion_tokens": self.config.get("max_tokens", 150),
+            "temperature": self.config.get("temperature", 0.5),
+            "messages": [
+                {
+                    "role": "system",
+                    "content": self.get_system_prompt(),
+                },
+                {"role": "user", "content": prompt},
+            ],
+        }
+        stop = self.config.get("stop")
+        if stop:
+            request["stop"] = stop
+        return request
+
     def validate_config(self) -> None:
         """Validate provider configuration and API key."""
         api_key_env = self.config.get("api_key_env", "OPENAI_API_KEY")
@@ -76,23 +145,16 @@ class OpenAIProvider(ProviderInterface):
         self.client = openai.OpenAI(api_key=api_key)
 
     def _handle_api_error(self, error: Exception) -> NoReturn:
-        """Handle API errors and map them to standard exceptions.
+        """Map SDK errors to standard exceptions by type and status code.
 
         Args:
             error: The exception to handle
 
         Raises:
-            AuthenticationError: If the API key is invalid
-            RateLimitError: If the API rate limit is exceeded
+            ProviderError: The classified error, such as AuthenticationError or
+                RateLimitError
         """
-        error_str = str(error).lower()
-
-        if "authentication" in error_str or "unauthorized" in error_str:
-            raise AuthenticationError("Error: Invalid API key")
-        elif "rate limit" in error_str or "quota" in error_str:
-            raise RateLimitError("Error: API rate limit exceeded")
-        else:
-            raise APIError(f"Error: API request failed - {error}")
+        raise classify_error(error, (openai.APIConnectionError,)) from error
 
     @classmethod
     def get_default_config(cls) -> dict[str, Any]:
@@ -0,0 +1,103 @@
+"""OpenAI-compatible provider for local inference servers (vLLM, llama.cpp)."""
+
+import os
+from typing import Any, NoReturn
+
+import openai
+
+from ask.config import SYSTEM_PROMPT
+from ask.exceptions import (
+    AuthenticationError,
+    ConfigurationError,
+    ServiceUnavailableError,
+)
+from ask.providers.openai import OpenAIProvider
+
+# Shared by every instance so connections to each server are pooled and reused
+_HTTP_CLIENT: openai.DefaultHttpxClient | None = None  # pragma: no mutate
+
+# Sent when the server does not require authentication; the SDK needs a value
+NO_API_KEY = "not-needed"
+
+
+def get_http_client() -> openai.DefaultHttpxClient:
+    """Return the HTTP client shared by all OpenAI-compatible providers."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        _HTTP_CLIENT = openai.DefaultHttpxClient()
+    return _HTTP_CLIENT
+
+
+class OpenAICompatibleProvider(OpenAIProvider):
+    """Provider for servers that implement the OpenAI chat completions API."""
+
+    def _build_request(self, prompt: str) -> dict[str, Any]:
+        """Build the chat completion request arguments.
+
+        Local servers accept the older max_tokens parameter more widely than
+        max_completion_tokens, and expect their own default model name.
+
+        Args:
+            prompt: The natural language prompt to generate a bash command for
+
+        Returns:
+            Keyword arguments for chat.completions.create
+        """
+        request = super()._build_request(prompt)
+        request["model"] = self.config.get("model_name", "default")
+        request["max_tokens"] = request.pop("max_completion_tokens")
+        return request
+
+    def validate_config(self) -> None:
+        """Validate server URL and optional API key."""
+        base_url = self.config.get("base_url")
+        if not base_url:
+            raise ConfigurationError(
+                "Error: base_url is required for the openai_compatible provider"
+            )
+
+        api_key_env = self.config.get("api_key_env")
+        api_key = os.environ.get(api_key_env) if api_key_env else None
+        if api_key_env and not api_key:
+            raise AuthenticationError(
+                f"Error: {api_key_env} environment variable is required"
+            )
+
+        self.client = openai.OpenAI(
+            api_key=api_key or NO_API_KEY,
+            base_url=base_url,
+            timeout=self.config.get("timeout", 60.0),
+            max_retries=self.config.get("max_retries", 0),
+            http_client=get_http_client(),
+        )
+
+    def _handle_api_error(self, error: Exception) -> NoReturn:
+        """Handle API errors and map them to standard exceptions.
+
+        Args:
+            error: The exception to handle
+
+        Raises:
+            ServiceUnavailableError: If the server is unreachable or times out
+            AuthenticationError: If the server rejects the key
+            RateLimitError: If the API rate limit is exceeded
+        """
+        if isinstance(error, openai.APIConnectionError):
+            raise ServiceUnavailableError(
+                "Error: Cannot connect to server at "
+                f"{self.config.get('base_url')} - {error}"
+            ) from error
+        super()._handle_api_error(error)
+
+    @classmethod
+    def get_default_config(cls) -> dict[str, Any]:
+        """Return default configuration for OpenAI-compatible provider."""
+        return {
+            "model_name": "default",
+            "base_url": "http://localhost:8000/v1",
+            "max_tokens": 150,
+            "temperature": 0.5,
+            "timeout": 60.0,
+            "max_retries": 0,
+            "system_prompt": SYSTEM_PROMPT,
+        }
@@ -0,0 +1,105 @@
+"""Interactive session for refining prompts without restarting ask.
+
+The provider is resolved once and its client kept for the whole session.
+Earlier prompts and the commands they produced are sent along with each new
+prompt, so follow-ups such as "now only in src/" can stay short. The oldest
+turns are dropped once the history exceeds its token budget.
+"""
+
+from collections.abc import Callable
+
+from loguru import logger
+
+module_logger = logger.bind(module=__name__)
+
+PROMPT = "ask> "
+# Tokens of earlier turns sent with each prompt
+DEFAULT_HISTORY_TOKENS = 1000
+# Rough size of a token for English text and shell commands
+CHARS_PER_TOKEN = 4
+EXIT_COMMANDS = frozenset({"exit", "quit", "/exit", "/quit"})
+# Forgets the conversation so the next prompt starts afresh
+RESET_COMMAND = "/reset"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in text without a tokenizer."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+class Conversation:
+    """Prompts and commands of the session, trimmed to a token budget."""
+
+    def __init__(self, budget: int = DEFAULT_HISTORY_TOKENS):
+        """Initialize an empty conversation with a token budget for history."""
+        self.budget = budget
+        self.turns: list[tuple[str, str]] = []
+
+    def _tokens(self) -> int:
+        """Estimate the tokens used by the recorded turns."""
+        return sum(
+            estimate_tokens(prompt) + estimate_tokens(command)
+            for prompt, command in self.turns
+        )
+
+    def add(self, prompt: str, command: str) -> None:
+        """Record a turn, dropping the oldest turns to stay within budget."""
+        self.turns.append((prompt, command))
+        while self.turns and self._tokens() > self.budget:
+            self.turns.pop(0)
+
+    def clear(self) -> None:
+        """Forget all turns."""
+        self.turns.clear()
+
+    def build_prompt(self, prompt: str) -> str:
+        """Return prompt preceded by the earlier turns of the conversation."""
+        if not self.turns:
+            return prompt
+        lines = ["Earlier requests in this session, oldest first:"]
+        for earlier_prompt, command in self.turns:
+            lines.append(f"- {earlier_prompt}\n  Command: {command}")
+        lines.append("")
+        lines.append(f"Current request, which may refer to them: {prompt}")
+        return "\n".join(lines)
+
+
+def run(
+    answer: Callable[[str, bool], str | None],
+    conversation: Conversation,
+    read: Callable[[str], str] | None = None,
+) -> None:
+    """Answer prompts until the user exits.
+
+    Args:
+        answer: Called with the prompt to send and whether it is a follow-up;
+            returns the command, or None if the prompt could not be answered
+        conversation: Conversation to record turns in
+        read: Reads a line of input after showing a prompt, input by default
+    """
+    read = read or input
+    try:
+        # Line editing and history for input(), where the platform has it
+        import readline  # noqa: F401
+    except ImportError:
+        pass
+
+    while True:
+        try:
+            line = read(PROMPT).strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            return
+        if not line:
+            continue
+        if line in EXIT_COMMANDS:
+            return
+        if line == RESET_COMMAND:
+            conversation.clear()
+            module_logger.debug("Conversation history cleared")
+            continue
+
+        command = answer(conversation.build_prompt(line), bool(conversation.turns))
+        if command is not None:
+            print(command)
+            conversation.add(line, command)
@@ -0,0 +1,189 @@
+"""Latency-aware provider routing for the auto model spec."""
+
+import os
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+import ask.config as config
+import ask.providers as providers
+from ask.cache import read_json, write_json
+from ask.exceptions import ConfigurationError
+from ask.providers.base import ProviderInterface
+from ask.providers.ollama_pool import shared_pool
+
+module_logger = logger.bind(module=__name__)
+
+AUTO_MODEL = "auto"
+STATS_FILE = "provider_stats.json"
+# Providers considered by auto when [ask] auto_candidates is not set
+DEFAULT_CANDIDATES = ("anthropic", "openai", "gemini", "grok", "ollama")
+# Weight given to the newest sample in the moving averages
+EWMA_ALPHA = 0.2
+# Lower bound on success rate, so flaky providers are penalized but not infinite
+MIN_SUCCESS_RATE = 0.05
+# Latency assumed for providers that have only ever failed
+FAILURE_LATENCY = 10.0
+
+# Serializes updates of the stats file by threads answering prompts at once
+_stats_lock = threading.Lock()
+
+
+class ProviderStats:
+    """Moving averages of latency and error rate per provider and model.
+
+    Stats are kept in a JSON file in the cache directory and updated after
+    every call, so each run routes based on all previous runs.
+    """
+
+    def __init__(self, path: Path | None = None):
+        """Initialize stats, loading previous samples from path."""
+        self.path = path or config.get_cache_dir() / STATS_FILE
+        self.stats = read_json(self.path)
+
+    def _update(self, key: str, change: Callable[[dict[str, Any]], None]) -> None:
+        """Apply change to the entry for key and write the stats file.
+
+        The file is read again under a lock, so updates made by other threads
+        since these stats were loaded are not lost.
+        """
+        with _stats_lock:
+            self.stats = read_json(self.path)
+            change(
+                self.stats.setdefault(
+                    key, {"latency": None, "error_rate": 0.0, "calls": 0}
+                )
+            )
+            write_json(self.path, self.stats)
+
+    def record(self, key: str, latency: float, ok: bool) -> None:
+        """Record the outcome of a single call.
+
+        Args:
+            key: Provider and model, as returned by stats_key
+            latency: Wall-clock seconds the call took
+            ok: Whether the call succeeded
+        """
+
+        def change(entry: dict[str, Any]) -> None:
+            if ok:
+                if entry["latency"] is None:
+                    entry["latency"] = latency
+                else:
+                    entry["latency"] = (
+                        EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * entry["latency"]
+                    )
+            entry["error_rate"] = (
+                EWMA_ALPHA * (0.0 if ok else 1.0)
+                + (1 - EWMA_ALPHA) * entry["error_rate"]
+            )
+            entry["calls"] += 1
+            entry["updated_at"] = time.time()
+
+        self._update(key, change)
+
+    def record_escalation(self, key: str) -> None:
+        """Record that output from key was rejected and a larger tier was tried."""
+
+        def change(entry: dict[str, Any]) -> None:
+            entry["escalations"] = entry.get("escalations", 0) + 1
+
+        self._update(key, change)
+
+    def expected_latency(self, key: str) -> float:
+        """Return the expected time to a successful response for key.
+
+        Keys that have never been called return 0 so that they are tried and
+        measured before the router settles on a provider.
+        """
+        entry = self.stats.get(key)
+        if not entry or not entry.get("calls"):
+            return 0.0
+        latency = entry.get("latency")
+        if latency is None:
+            latency = FAILURE_LATENCY
+        success_rate = max(1.0 - entry["error_rate"], MIN_SUCCESS_RATE)
+        return latency / success_rate
+
+
+def stats_key(provider_name: str, provider_config: dict[str, Any]) -> str:
+    """Return the stats key for a provider and its resolved config."""
+    model_name = provider_config.get("model_name")
+    if model_name is None:
+        provider_class = providers.get_provider_class(provider_name)
+        if provider_class is not None:
+            model_name = provider_class.get_default_config().get("model_name")
+    return f"{provider_name}:{model_name or 'default'}"
+
+
+def provider_stats_key(provider: ProviderInterface) -> str | None:
+    """Return the stats key for a provider instance, if it is registered."""
+    provider_name = providers.get_provider_name(provider)
+    if provider_name is None:
+        return None
+    return stats_key(provider_name, provider.config)
+
+
+def has_credentials(provider_name: str, provider_config: dict[str, Any]) -> bool:
+    """Check whether a provider can be used without failing authentication."""
+    provider_class = providers.get_provider_class(provider_name)
+    if provider_class is None:
+        return False
+    default_config = provider_class.get_default_config()
+    api_key_env = provider_config.get("api_key_env", default_config.get("api_key_env"))
+    if api_key_env:
+        return bool(os.environ.get(api_key_env))
+    if provider_name == "ollama":
+        return _ollama_reachable(provider_config)
+    return True
+
+
+def _ollama_reachable(provider_config: dict[str, Any]) -> bool:
+    """Check whether a server the Ollama provider would use is up."""
+    hosts = provider_config.get("hosts")
+    if not hosts:
+        host = provider_config.get("host", "localhost")
+        port = provider_config.get("port", 11434)
+        return config.check_ollama_available(f"http://{host}:{port}")
+    try:
+        pool = shared_pool(
+            hosts,
+            strategy=provider_config.get("host_strategy", "least_outstanding"),
+            health_ttl=provider_config.get("health_ttl", 30.0),
+        )
+    except ConfigurationError as e:
+        module_logger.warning(str(e))
+        return False
+    # Health checks are cached, so this only probes hosts checked long ago
+    pool.refresh()
+    return bool(pool.healthy_hosts())
+
+
+def choose_model(config_data: dict[str, Any], stats: ProviderStats) -> str | None:
+    """Pick the candidate with the best expected latency.
+
+    Args:
+        config_data: Configuration data loaded from the config file
+        stats: Latency statistics from previous calls
+
+    Returns:
+        The chosen model spec, or None if no candidate has credentials
+    """
+    candidates = config_data.get("ask", {}).get(
+        "auto_candidates", list(DEFAULT_CANDIDATES)
+    )
+    best_spec, best_latency = None, float("inf")
+    for spec in candidates:
+        provider_name, provider_config = config.get_provider_config(config_data, spec)
+        if not has_credentials(provider_name, provider_config):
+            module_logger.debug(f"Skipping {spec}: no credentials available")
+            continue
+        expected = stats.expected_latency(stats_key(provider_name, provider_config))
+        module_logger.debug(f"Expected latency for {spec}: {expected:.3f}s")
+        if expected < best_latency:
+            best_spec, best_latency = spec, expected
+    return best_spec
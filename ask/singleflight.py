@@ -0,0 +1,175 @@
+"""Cross-process coalescing of identical requests that are in flight together.
+
+The first process to send a prompt takes an exclusive lock on a file named
+after it and makes the request. Processes that send the same prompt while the
+lock is held wait for it, then read the answer the first process left next to
+the lock instead of calling the provider themselves. Locks are released by the
+operating system when their holder exits, so a crashed leader does not block
+anyone; the next waiter finds no answer and makes the request itself. Waiters
+give up after a timeout in case the leader hangs.
+
+Nobody knows when the last waiter has read an answer, so leaders remove files
+that have not been used for a while instead. A lock file is only removed while
+holding its lock, and a process that takes a lock checks that the file is still
+in place, so no two processes ever hold the lock for the same key.
+"""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+import ask.config as config
+from ask.cache import read_json, write_json
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+module_logger = logger.bind(module=__name__)
+
+# File locks need fcntl, which Windows lacks
+SUPPORTED = fcntl is not None
+LOCK_DIR = "inflight"
+# Seconds to wait for another process's request before making our own
+DEFAULT_TIMEOUT = 30.0
+# Seconds between attempts to take a held lock
+POLL_INTERVAL = 0.05
+# Seconds after which unused locks and answers are removed; answers this old
+# are older than any waiting process, which only accepts newer ones
+STALE_AFTER = 10 * DEFAULT_TIMEOUT
+
+
+def _is_current(lock_file: Any, path: Path) -> bool:
+    """Return whether an open lock file is still the one found at path."""
+    try:
+        found = os.stat(path)
+    except FileNotFoundError:
+        return False
+    opened = os.fstat(lock_file.fileno())
+    return (found.st_dev, found.st_ino) == (opened.st_dev, opened.st_ino)
+
+
+def remove_stale(directory: Path, max_age: float = STALE_AFTER) -> None:
+    """Remove locks and answers in directory that were not used recently.
+
+    Args:
+        directory: Directory holding the locks and answers
+        max_age: Seconds since a file was last used before it is removed
+    """
+    cutoff = time.time() - max_age
+    for path in directory.iterdir():
+        try:
+            if path.stat().st_mtime >= cutoff:
+                continue
+            if path.suffix != ".lock":
+                path.unlink()
+                continue
+            with open(path, "a") as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                if _is_current(lock_file, path):
+                    path.unlink()
+        except OSError as e:
+            module_logger.debug(f"Could not remove {path}: {e}")
+
+
+def flight_key(prompt: str, model: str | None = None) -> str:
+    """Return the key shared by identical requests.
+
+    Args:
+        prompt: Prompt sent to the provider
+        model: Model spec from --model, if any
+
+    Returns:
+        A digest of the model and prompt, ignoring differences in spacing
+    """
+    key = f"{model or ''}\0{' '.join(prompt.split())}"
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+class Flight:
+    """A request that identical requests from other processes can wait on.
+
+    Used as a context manager. On entry, result is set if another process
+    answered the same request while this one waited. Otherwise this process
+    holds the lock, unless waiting timed out, and should make the request and
+    publish its answer.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        timeout: float = DEFAULT_TIMEOUT,
+        directory: Path | None = None,
+    ):
+        """Initialize flight for a key from flight_key."""
+        directory = directory or config.get_cache_dir() / LOCK_DIR
+        directory.mkdir(parents=True, exist_ok=True)
+        self.lock_path = directory / f"{key}.lock"
+        self.result_path = directory / f"{key}.json"
+        self.timeout = timeout
+        self.result: str | None = None
+        self.leader = False
+        self._lock_file: Any = None
+
+    def __enter__(self) -> "Flight":
+        """Take the lock, or wait for the process holding it to answer."""
+        started = time.time()
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        while True:
+            lock_file = open(self.lock_path, "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                if time.monotonic() >= deadline:
+                    module_logger.warning(
+                        "Timed out waiting for an identical request in another "
+                        "process, sending this one"
+                    )
+                    return self
+                waited = True
+                time.sleep(POLL_INTERVAL)
+                continue
+            if _is_current(lock_file, self.lock_path):
+                break
+            # The file was removed as stale between opening and locking it
+            lock_file.close()
+
+        # Mark the lock as in use, so it is not removed as stale
+        os.utime(self.lock_path)
+        self._lock_file = lock_file
+        if waited:
+            data = read_json(self.result_path)
+            # Only answers published while this process waited are for it
+            if data.get("created", 0) >= started and data.get("command") is not None:
+                module_logger.debug("Answered by an identical request in flight")
+                self.result = data["command"]
+                return self
+        self.leader = True
+        return self
+
+    def publish(self, command: str) -> None:
+        """Leave the answer for processes waiting on this request."""
+        if self.leader:
+            write_json(self.result_path, {"created": time.time(), "command": command})
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Release the lock, waking the next waiting process.
+
+        Leaders then remove locks and answers that are no longer in use.
+        """
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+        if self.leader:
+            remove_stale(self.lock_path.parent)
@@ -0,0 +1,300 @@
+"""Append-only log of requests, with token counts, latency and estimated cost.
+
+Every answer is recorded, including those served from the instant template
+index or the prompt cache, so ``ask stats`` can report how often providers are
+called at all as well as what the calls cost.
+"""
+
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+import ask.config as config
+from ask.exceptions import ConfigurationError
+
+module_logger = logger.bind(module=__name__)
+
+USAGE_FILE = "usage.sqlite3"
+# Where an answer came from; only provider answers have tokens and cost
+SOURCE_PROVIDER = "provider"
+SOURCE_INSTANT = "instant"
+SOURCE_CACHE = "cache"
+# Answered by an identical request another process had in flight
+SOURCE_SHARED = "shared"
+DEFAULT_WINDOW = "7d"
+PERCENTILES = (50, 95, 99)
+
+# USD per million (input, output, cached input) tokens. Models that are not
+# listed, and local providers, are counted as free. Set [ask.prices] to add or
+# correct entries.
+PRICES: dict[str, tuple[float, float, float]] = {
+    "claude-3-haiku-20240307": (0.25, 1.25, 0.03),
+    "claude-3-5-haiku-latest": (0.8, 4.0, 0.08),
+    "claude-sonnet-4-0": (3.0, 15.0, 0.3),
+    "gpt-4o-mini": (0.15, 0.6, 0.075),
+    "gpt-4o": (2.5, 10.0, 1.25),
+    "gpt-4.1-mini": (0.4, 1.6, 0.1),
+    "gemini-2.5-flash": (0.3, 2.5, 0.075),
+    "gemini-2.5-flash-lite": (0.1, 0.4, 0.025),
+    "grok-3-fast": (5.0, 25.0, 1.25),
+    "grok-3-mini": (0.3, 0.5, 0.075),
+}
+
+WINDOW_PATTERN = re.compile(r"^(\d+)([hdw])$")
+WINDOW_SECONDS = {"h": 3600, "d": 86400, "w": 604800}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    created_at REAL NOT NULL,
+    source TEXT NOT NULL,
+    provider TEXT,
+    model TEXT,
+    ok INTEGER NOT NULL,
+    latency REAL NOT NULL,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    cached_tokens INTEGER
+);
+CREATE INDEX IF NOT EXISTS requests_created ON requests (created_at);
+"""
+
+
+def parse_window(window: str) -> float:
+    """Convert a window such as 24h, 7d or 2w to seconds."""
+    re_match = WINDOW_PATTERN.match(window.strip().lower())
+    if re_match is None:
+        raise ConfigurationError(
+            f"Invalid time window '{window}'. Use a number followed by h, d or w"
+        )
+    return int(re_match.group(1)) * WINDOW_SECONDS[re_match.group(2)]
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Return the nearest-rank percentile of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(-(-pct * len(ordered) // 100)), 1)
+    return ordered[rank - 1]
+
+
+def estimate_cost(
+    model: str | None,
+    input_tokens: int,
+    output_tokens: int,
+    cached_tokens: int,
+    prices: dict[str, Any] | None = None,
+) -> float:
+    """Estimate the USD cost of tokens used with a model.
+
+    Args:
+        model: Model name
+        input_tokens: Prompt tokens, including cached ones
+        output_tokens: Generated tokens
+        cached_tokens: Prompt tokens read from the provider's cache
+        prices: Per-million prices overriding PRICES, by model name
+
+    Returns:
+        The estimated cost, 0 for models without a known price
+    """
+    price = {**PRICES, **(prices or {})}.get(model or "")
+    if not price:
+        module_logger.debug(f"No price known for model {model}, counting it as free")
+        return 0.0
+    input_price, output_price = price[0], price[1]
+    cached_price = price[2] if len(price) > 2 else input_price
+    uncached = max(input_tokens - cached_tokens, 0)
+    return (
+        uncached * input_price
+        + cached_tokens * cached_price
+        + output_tokens * output_price
+    ) / 1_000_000
+
+
+class UsageStore:
+    """Requests recorded in a SQLite database in the cache directory."""
+
+    def __init__(self, path: Path | None = None):
+        """Open the usage database, creating it if needed."""
+        self.path = path or config.get_cache_dir() / USAGE_FILE
+        self.connection = sqlite3.connect(self.path, timeout=5.0)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    def record(
+        self,
+        source: str,
+        latency: float,
+        ok: bool = True,
+        provider: str | None = None,
+        model: str | None = None,
+        usage: Any = None,
+    ) -> None:
+        """Append a request.
+
+        Args:
+            source: Where the answer came from, one of the SOURCE_* values
+            latency: Wall-clock seconds taken to answer
+            ok: Whether an answer was produced
+            provider: Provider name, for provider requests
+            model: Model name, for provider requests
+            usage: TokenUsage reported by the provider, if any
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO requests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    time.time(),
+                    source,
+                    provider,
+                    model,
+                    int(ok),
+                    latency,
+                    getattr(usage, "input_tokens", None),
+                    getattr(usage, "output_tokens", None),
+                    getattr(usage, "cached_tokens", None),
+                ),
+            )
+
+    def summarize(
+        self, since: float = 0.0, prices: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """Summarize requests recorded after a point in time.
+
+        Args:
+            since: Unix time to start from
+            prices: Per-million prices overriding PRICES, by model name
+
+        Returns:
+            Request counts by source, and a row of stats per provider and model
+        """
+        sources = dict(
+            self.connection.execute(
+                "SELECT source, COUNT(*) FROM requests WHERE created_at >= ? "
+                "GROUP BY source",
+                (since,),
+            ).fetchall()
+        )
+        rows = self.connection.execute(
+            "SELECT provider, model, ok, latency, input_tokens, output_tokens, "
+            "cached_tokens FROM requests WHERE created_at >= ? AND source = ? "
+            "ORDER BY provider, model",
+            (since, SOURCE_PROVIDER),
+        ).fetchall()
+
+        groups: dict[tuple[str, str], list[tuple[Any, ...]]] = {}
+        for provider, model, *values in rows:
+            groups.setdefault((provider or "unknown", model or "default"), []).append(
+                tuple(values)
+            )
+
+        models = []
+        for (provider, model), requests in groups.items():
+            latencies = [latency for ok, latency, *_ in requests if ok]
+            counted = [request for request in requests if request[2] is not None]
+            input_tokens = sum(request[2] or 0 for request in counted)
+            output_tokens = sum(request[3] or 0 for request in counted)
+            cached_tokens = sum(request[4] or 0 for request in counted)
+            models.append(
+                {
+                    "provider": provider,
+                    "model": model,
+                    "requests": len(requests),
+                    "errors": sum(1 for ok, *_ in requests if not ok),
+                    "latency": {pct: percentile(latencies, pct) for pct in PERCENTILES},
+                    "input_per_request": (
+                        input_tokens / len(counted) if counted else None
+                    ),
+                    "output_per_request": (
+                        output_tokens / len(counted) if counted else None
+                    ),
+                    "cached_per_request": (
+                        cached_tokens / len(counted) if counted else None
+                    ),
+                    "cost": estimate_cost(
+                        model, input_tokens, output_tokens, cached_tokens, prices
+                    ),
+                }
+            )
+        return {"sources": sources, "models": models}
+
+
+def format_seconds(value: float | None) -> str:
+    """Format a latency for a report table."""
+    return "-" if value is None else f"{value:.2f}s"
+
+
+def format_tokens(value: float | None) -> str:
+    """Format a per-request token count for a report table."""
+    return "-" if value is None else f"{value:.0f}"
+
+
+def format_table(table: list[list[str]]) -> list[str]:
+    """Align table rows, the first column to the left and the rest to the right.
+
+    Args:
+        table: Rows of cells, starting with the header
+
+    Returns:
+        The formatted lines
+    """
+    widths = [max(len(row[column]) for row in table) for column in range(len(table[0]))]
+    lines = []
+    for row in table:
+        cells = [row[0].ljust(widths[0])]
+        cells += [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+        lines.append("  ".join(cells))
+    return lines
+
+
+def format_summary(summary: dict[str, Any], window: str) -> str:
+    """Render a summary from UsageStore.summarize as a table.
+
+    Args:
+        summary: The summary to render
+        window: Time window the summary covers, for the heading
+
+    Returns:
+        The report text
+    """
+    sources = summary["sources"]
+    total = sum(sources.values())
+    shared = sources.get(SOURCE_SHARED, 0)
+    local = sources.get(SOURCE_INSTANT, 0) + sources.get(SOURCE_CACHE, 0) + shared
+    lines = [
+        f"Last {window}: {total} requests, {local} answered locally "
+        f"(instant {sources.get(SOURCE_INSTANT, 0)}, "
+        f"cache {sources.get(SOURCE_CACHE, 0)}"
+        + (f", shared {shared})" if shared else ")")
+    ]
+    if not summary["models"]:
+        return lines[0]
+
+    header = ["model", "requests", "errors", "p50", "p95", "p99"]
+    header += ["in/req", "out/req", "cached/req", "cost"]
+    table = [header]
+    for row in summary["models"]:
+        table.append(
+            [
+                f"{row['provider']}:{row['model']}",
+                str(row["requests"]),
+                str(row["errors"]),
+                *(format_seconds(row["latency"][pct]) for pct in PERCENTILES),
+                format_tokens(row["input_per_request"]),
+                format_tokens(row["output_per_request"]),
+                format_tokens(row["cached_per_request"]),
+                f"${row['cost']:.4f}",
+            ]
+        )
+    lines.append("")
+    lines.extend(format_table(table))
+    return "\n".join(lines)
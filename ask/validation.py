@@ -0,0 +1,184 @@
+"""Local checks that generated output is a usable bash command."""
+
+import hashlib
+import os
+import re
+import shlex
+import shutil
+import subprocess  # nosec B404
+import tempfile
+from pathlib import Path
+
+from loguru import logger
+
+import ask.binaries as binaries
+import ask.config as config
+from ask.cache import read_json, write_json
+
+module_logger = logger.bind(module=__name__)
+
+VERDICT_CACHE_FILE = "validation.json"
+# Verdicts kept in the cache; the oldest are dropped first
+MAX_CACHED_VERDICTS = 1000
+
+# Lines that read like an explanation rather than a command
+PROSE_PATTERN = re.compile(
+    r"^\s*(here(?: is|'s| are)|sure\b|certainly\b|to \w+|this (?:command|will)|"
+    r"you can|the following|note:|explanation:|i )",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Seconds allowed for the bash syntax check
+SYNTAX_CHECK_TIMEOUT = 2.0
+
+
+def check_tokens(command: str) -> str | None:
+    """Tokenize command with shlex to catch unbalanced quoting.
+
+    This is only an approximation of bash's grammar, so it is used when bash
+    itself is not available.
+
+    Args:
+        command: The command to check
+
+    Returns:
+        The tokenizer error, or None if the command tokenizes
+    """
+    try:
+        shlex.split(command, comments=True)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def check_syntax(command: str) -> str | None:
+    """Parse command with bash -n without executing it.
+
+    bash runs without startup files and with a minimal environment, so nothing
+    like BASH_ENV can cause code to run during the check.
+
+    Args:
+        command: The command to check
+
+    Returns:
+        The syntax error reported by bash, or None if the command parses or
+        bash is not available
+    """
+    bash = shutil.which("bash")
+    if bash is None:
+        module_logger.debug("bash not found, skipping syntax check")
+        return None
+    try:
+        # The command is only parsed: it goes to bash -n on stdin, and the
+        # arguments are fixed
+        result = subprocess.run(  # nosec B603
+            [bash, "--noprofile", "--norc", "-n"],
+            input=command,
+            capture_output=True,
+            text=True,
+            timeout=SYNTAX_CHECK_TIMEOUT,
+            env={"PATH": os.defpath, "LC_ALL": "C"},
+            cwd=tempfile.gettempdir(),
+            start_new_session=True,
+        )
+    except subprocess.TimeoutExpired:
+        return "syntax check timed out"
+    if result.returncode != 0:
+        return result.stderr.strip() or "invalid bash syntax"
+    return None
+
+
+def find_problems(command: str) -> list[str]:
+    """Return reasons command is not a usable bash command.
+
+    Args:
+        command: The generated command
+
+    Returns:
+        A list of problems, empty if the command looks valid
+    """
+    if not command.strip():
+        return ["empty output"]
+
+    problems = []
+    if "```" in command:
+        problems.append("output contains a markdown code fence")
+    if PROSE_PATTERN.search(command):
+        problems.append("output contains prose instead of only a command")
+    if shutil.which("bash") is None:
+        token_error = check_tokens(command)
+        if token_error is not None:
+            problems.append(f"invalid quoting: {token_error}")
+    else:
+        syntax_error = check_syntax(command)
+        if syntax_error is not None:
+            problems.append(f"bash syntax error: {syntax_error}")
+    return problems
+
+
+def validate_command(command: str, cache_path: Path | None = None) -> list[str]:
+    """Return problems with command, reusing earlier verdicts for the same text.
+
+    Programs that are not on $PATH are not problems here: they may be aliases,
+    functions or tools installed elsewhere, so retrying would not help. See
+    warn_missing_commands.
+
+    Args:
+        command: The generated command
+        cache_path: File verdicts are cached in
+
+    Returns:
+        A list of problems, empty if the command looks valid
+    """
+    cache_path = cache_path or config.get_cache_dir() / VERDICT_CACHE_FILE
+    key = hashlib.sha256(command.encode()).hexdigest()
+    verdicts = read_json(cache_path)
+    if key in verdicts:
+        module_logger.debug("Using cached validation verdict")
+        return verdicts[key]
+
+    problems = find_problems(command)
+    verdicts[key] = problems
+    while len(verdicts) > MAX_CACHED_VERDICTS:
+        del verdicts[next(iter(verdicts))]
+    write_json(cache_path, verdicts)
+    return problems
+
+
+def warn_missing_commands(command: str) -> list[str]:
+    """Warn about programs command runs that are not on $PATH.
+
+    This is checked on every call, since installing a program does not change
+    the command text.
+
+    Args:
+        command: The generated command
+
+    Returns:
+        The names of the missing programs
+    """
+    missing = binaries.missing_commands(command, binaries.load_index())
+    if missing:
+        module_logger.warning(
+            f"Not found on $PATH: {', '.join(missing)}. "
+            "The command may rely on an alias, function or tool installed elsewhere."
+        )
+    return missing
+
+
+def retry_prompt(prompt: str, command: str, problems: list[str]) -> str:
+    """Build a follow-up prompt that feeds validation errors back to the model.
+
+    Args:
+        prompt: The original prompt
+        command: The rejected output
+        problems: Why the output was rejected
+
+    Returns:
+        The prompt to retry with
+    """
+    return (
+        f"{prompt}\n\n"
+        f"Your previous answer was:\n{command}\n"
+        f"It was rejected because: {'; '.join(problems)}. "
+        "Respond with only a corrected bash command."
+    )
@@ -0,0 +1,310 @@
+"""Shell keybinding that replaces the command line with a generated command.
+
+While a ``# ask: ...`` comment is being typed, the shell starts ``ask
+--prefetch`` for it in the background, after a short pause so that every
+keystroke does not start a request. The prefetch listens on a Unix socket
+named after the prompt and hands its answer to the ``ask`` run by the
+keybinding, which often finds it ready. When the comment changes, the shell
+kills the prefetch it started for the old text, which closes its connection
+to the provider and removes its socket.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+import ask.config as config
+from ask.exceptions import ConfigurationError, ProviderError
+
+module_logger = logger.bind(module=__name__)
+
+# Prefetch needs Unix sockets, which Windows builds of Python may lack
+SUPPORTED = hasattr(socket, "AF_UNIX")
+SOCKET_DIR = "prefetch"
+# Seconds a finished prefetch waits for the keybinding to collect its answer
+LINGER = 60.0
+# Seconds the keybinding waits for a prefetch that is still generating
+FETCH_TIMEOUT = 30.0
+
+ZSH_SCRIPT = r"""# ask shell integration for zsh. Add to ~/.zshrc:
+#   eval "$(ask shell-init zsh)"
+typeset -g _ask_prefetch_pid="" _ask_prefetch_prompt=""
+
+_ask_cancel_prefetch() {
+  [[ -n $_ask_prefetch_pid ]] && kill $_ask_prefetch_pid 2>/dev/null
+  _ask_prefetch_pid="" _ask_prefetch_prompt=""
+}
+
+_ask_prefetch() {
+  local prompt=""
+  [[ $BUFFER =~ '^#[[:space:]]*ask:[[:space:]]*(.*[^[:space:]])' ]] && prompt=$match[1]
+  [[ $prompt == "$_ask_prefetch_prompt" ]] && return
+  _ask_cancel_prefetch
+  [[ -z $prompt || ${ASK_PREFETCH:-1} == 0 ]] && return
+  _ask_prefetch_prompt=$prompt
+  _ask_prefetch_pid=$({ sleep ${ASK_PREFETCH_DELAY:-0.4}; \
+    exec ask --prefetch -- "$prompt"; } </dev/null >/dev/null 2>&1 & print $!)
+}
+
+_ask_widget() {
+  local prompt=$BUFFER result
+  [[ $BUFFER =~ '^#[[:space:]]*ask:[[:space:]]*(.*)' ]] && prompt=$match[1]
+  [[ -z ${prompt//[[:space:]]/} ]] && return
+  local trimmed=${prompt%"${prompt##*[![:space:]]}"}
+  if [[ $trimmed == "$_ask_prefetch_prompt" ]]; then
+    # The prefetch hands over its answer and exits by itself
+    _ask_prefetch_pid="" _ask_prefetch_prompt=""
+  else
+    _ask_cancel_prefetch
+  fi
+  zle -M "ask: generating..."
+  if result=$(command ask -- "$prompt" 2>/dev/null) && [[ -n $result ]]; then
+    BUFFER=$result
+    CURSOR=$#BUFFER
+    zle -M ""
+  else
+    zle -M "ask: no command generated"
+  fi
+}
+
+autoload -Uz add-zle-hook-widget
+add-zle-hook-widget line-pre-redraw _ask_prefetch
+add-zle-hook-widget line-finish _ask_cancel_prefetch
+zle -N _ask_widget
+bindkey "${ASK_WIDGET_KEY:-^Xa}" _ask_widget
+"""
+
+BASH_SCRIPT = r"""# ask shell integration for bash. Add to ~/.bashrc:
+#   eval "$(ask shell-init bash)"
+_ask_prefetch_pid="" _ask_prefetch_prompt=""
+
+_ask_cancel_prefetch() {
+  [[ -n $_ask_prefetch_pid ]] && kill "$_ask_prefetch_pid" 2>/dev/null
+  _ask_prefetch_pid="" _ask_prefetch_prompt=""
+}
+
+_ask_prefetch() {
+  local prompt="" pattern='^#[[:space:]]*ask:[[:space:]]*(.*[^[:space:]])'
+  [[ $READLINE_LINE =~ $pattern ]] && prompt=${BASH_REMATCH[1]}
+  [[ $prompt == "$_ask_prefetch_prompt" ]] && return
+  _ask_cancel_prefetch
+  [[ -z $prompt ]] && return
+  _ask_prefetch_prompt=$prompt
+  _ask_prefetch_pid=$({ sleep "${ASK_PREFETCH_DELAY:-0.4}"; \
+    exec ask --prefetch -- "$prompt"; } </dev/null >/dev/null 2>&1 & echo $!)
+}
+
+# Readline has no hook for edits, so prefetch as each word is finished
+_ask_space() {
+  READLINE_LINE="${READLINE_LINE:0:READLINE_POINT} ${READLINE_LINE:READLINE_POINT}"
+  READLINE_POINT=$((READLINE_POINT + 1))
+  _ask_prefetch
+}
+
+_ask_widget() {
+  local prompt=$READLINE_LINE result pattern='^#[[:space:]]*ask:[[:space:]]*(.*)'
+  [[ $READLINE_LINE =~ $pattern ]] && prompt=${BASH_REMATCH[1]}
+  [[ -z ${prompt//[[:space:]]/} ]] && return
+  local trimmed=${prompt%"${prompt##*[![:space:]]}"}
+  if [[ $trimmed == "$_ask_prefetch_prompt" ]]; then
+    # The prefetch hands over its answer and exits by itself
+    _ask_prefetch_pid="" _ask_prefetch_prompt=""
+  else
+    _ask_cancel_prefetch
+  fi
+  if result=$(command ask -- "$prompt" 2>/dev/null) && [[ -n $result ]]; then
+    READLINE_LINE=$result
+    READLINE_POINT=${#READLINE_LINE}
+  fi
+}
+
+bind -x "\"${ASK_WIDGET_KEY:-\C-xa}\": _ask_widget"
+if [[ ${ASK_PREFETCH:-1} != 0 ]]; then
+  bind -x '" ": _ask_space'
+fi
+PROMPT_COMMAND="_ask_cancel_prefetch${PROMPT_COMMAND:+;$PROMPT_COMMAND}"
+"""
+
+SCRIPTS = {"zsh": ZSH_SCRIPT, "bash": BASH_SCRIPT}
+
+
+def shell_script(shell: str | None = None) -> str:
+    """Return the integration script for a shell.
+
+    Args:
+        shell: Shell name, the basename of $SHELL by default
+
+    Returns:
+        The script, for the shell to evaluate
+
+    Raises:
+        ConfigurationError: If the shell is not supported
+    """
+    shell = shell or os.path.basename(os.environ.get("SHELL", ""))
+    if shell not in SCRIPTS:
+        raise ConfigurationError(
+            f"Unsupported shell '{shell}'. Supported shells: {', '.join(SCRIPTS)}"
+        )
+    return SCRIPTS[shell]
+
+
+def socket_path(
+    prompt: str, model: str | None = None, directory: Path | None = None
+) -> Path:
+    """Return the socket a prefetch of prompt listens on.
+
+    Args:
+        prompt: Natural language description of the task
+        model: Model spec from --model, if any
+        directory: Directory for sockets, in the cache directory by default
+
+    Returns:
+        The socket path
+    """
+    if directory is None:
+        directory = config.get_cache_dir() / SOCKET_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    key = f"{model or ''}\0{' '.join(prompt.split())}"
+    # Hashed to stay within the length limit of socket paths
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return directory / f"{digest}.sock"
+
+
+def _bind(path: Path) -> socket.socket | None:
+    """Listen on path, unless another prefetch is already listening there."""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(str(path))
+    except OSError:
+        if fetch_from(path, timeout=0.1, probe=True) is not None:
+            server.close()
+            return None
+        # Left behind by a prefetch that was killed before cleaning up
+        path.unlink(missing_ok=True)
+        server.bind(str(path))
+    server.listen(1)
+    return server
+
+
+def serve(path: Path, produce: Callable[[], str], linger: float = LINGER) -> None:
+    """Generate an answer in the background and hand it to the first client.
+
+    Args:
+        path: Socket to listen on, from socket_path
+        produce: Generates the command
+        linger: Seconds to wait for a client before giving up
+    """
+    server = _bind(path)
+    if server is None:
+        module_logger.debug("Another prefetch is already answering this prompt")
+        return
+
+    result: dict[str, Any] = {"error": "Prefetch failed"}
+
+    def work() -> None:
+        try:
+            result.update(command=produce(), error=None)
+        except (ProviderError, ConfigurationError) as e:
+            result["error"] = str(e)
+
+    # A daemon thread, so a killed prefetch exits without waiting for it
+    worker = threading.Thread(target=work, daemon=True)
+    worker.start()
+    deadline = time.monotonic() + linger
+    try:
+        while True:
+            server.settimeout(max(deadline - time.monotonic(), 0.001))
+            try:
+                connection, _ = server.accept()
+            except TimeoutError:
+                module_logger.debug("No client collected the prefetched answer")
+                return
+            with connection:
+                connection.settimeout(1.0)
+                try:
+                    request = connection.recv(1)
+                except OSError:
+                    continue
+                if request != b"!":
+                    # A probe from another prefetch checking this one is alive
+                    continue
+                worker.join()
+                connection.sendall(json.dumps(result).encode() + b"\n")
+                return
+    finally:
+        server.close()
+        path.unlink(missing_ok=True)
+
+
+def fetch_from(
+    path: Path, timeout: float = FETCH_TIMEOUT, probe: bool = False
+) -> dict[str, Any] | None:
+    """Connect to a prefetch and read its answer.
+
+    Args:
+        path: Socket the prefetch listens on
+        timeout: Seconds to wait for the answer
+        probe: Only check that the prefetch is alive, without taking its answer
+
+    Returns:
+        The prefetch result, an empty dict for a successful probe, or None if
+        no prefetch is listening
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(str(path))
+        client.sendall(b"?" if probe else b"!")
+        if probe:
+            return {}
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = client.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+    except OSError as e:
+        module_logger.debug(f"No prefetch answer from {path}: {e}")
+        return None
+    finally:
+        client.close()
+    try:
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+def fetch(
+    prompt: str, model: str | None = None, directory: Path | None = None
+) -> str | None:
+    """Return the answer of a prefetch of prompt, if one was started.
+
+    Args:
+        prompt: Natural language description of the task
+        model: Model spec from --model, if any
+        directory: Directory for sockets, in the cache directory by default
+
+    Returns:
+        The prefetched command, or None if there is none
+    """
+    if not SUPPORTED:
+        return None
+    path = socket_path(prompt, model, directory)
+    if not path.exists():
+        return None
+    result = fetch_from(path)
+    if result is None:
+        return None
+    if result.get("error"):
+        module_logger.debug(f"Prefetch failed: {result['error']}")
+        return None
+    module_logger.debug("Answered by a prefetch")
+    return result.get("command")
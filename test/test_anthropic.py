@@ -3,10 +3,17 @@
 import os
 from unittest.mock import MagicMock, patch
 
+import anthropic
+import httpx
 import pytest
 
 from ask.config import SYSTEM_PROMPT
-from ask.exceptions import APIError, AuthenticationError, RateLimitError
+from ask.exceptions import (
+    APIError,
+    AuthenticationError,
+    RateLimitError,
+    ServiceUnavailableError,
+)
 from ask.providers.anthropic import AnthropicProvider
 
 
@@ -171,3 +178,118 @@ def test_config_parameter_usage(mock_anthropic_key):
             system="Custom system prompt",
             messages=[{"role": "user", "content": "test prompt"}],
         )
+
+
+def test_get_bash_command_stop_sequences(mock_anthropic_key):
+    """Test stop sequences are forwarded."""
+    provider = AnthropicProvider({"stop": ["\n```"]})
+
+    mock_response = MagicMock()
+    mock_response.content = [MagicMock(text="```bash\nls -la")]
+
+    with patch("anthropic.Anthropic") as mock_anthropic:
+        mock_client = MagicMock()
+        mock_client.messages.create.return_value = mock_response
+        mock_anthropic.return_value = mock_client
+
+        result = provider.get_bash_command("list files")
+
+        assert result == "ls -la"
+        kwargs = mock_client.messages.create.call_args.kwargs
+        assert kwargs["stop_sequences"] == ["\n```"]
+
+
+def test_get_bash_command_whitespace_stop_sequences(mock_anthropic_key):
+    """Test whitespace-only stop sequences are applied locally, not sent."""
+    provider = AnthropicProvider({"stop": ["\n\n", "\n```"]})
+
+    with patch("anthropic.Anthropic") as mock_anthropic:
+        mock_client = MagicMock()
+        mock_response = MagicMock()
+        mock_response.content = [MagicMock(text="ls -la\n\nThis lists files")]
+        mock_client.messages.create.return_value = mock_response
+        mock_anthropic.return_value = mock_client
+
+        result = provider.get_bash_command("list files")
+
+        assert result == "ls -la"
+        kwargs = mock_client.messages.create.call_args.kwargs
+        assert kwargs["stop_sequences"] == ["\n```"]
+
+
+def test_get_bash_command_stream(mock_anthropic_key):
+    """Test streaming stops once the command is complete."""
+    provider = AnthropicProvider({"stream": True, "stop": ["\n\n"]})
+
+    with patch("anthropic.Anthropic") as mock_anthropic:
+        mock_client = MagicMock()
+        mock_stream = MagicMock()
+        mock_stream.text_stream = iter(["ls -la", "\n\nThis lists", " files"])
+        mock_client.messages.stream.return_value.__enter__.return_value = mock_stream
+        mock_anthropic.return_value = mock_client
+
+        result = provider.get_bash_command("list files")
+
+        assert result == "ls -la"
+        mock_client.messages.create.assert_not_called()
+        kwargs = mock_client.messages.stream.call_args.kwargs
+        assert "stop_sequences" not in kwargs
+        mock_client.messages.stream.return_value.__exit__.assert_called_once()
+
+
+def test_generate_records_usage(mock_anthropic_key):
+    """Test token usage and finish reason are read from the response."""
+    provider = AnthropicProvider({})
+
+    mock_response = MagicMock()
+    mock_response.content = [MagicMock(text="ls -la")]
+    mock_response.usage = MagicMock(
+        input_tokens=120, output_tokens=6, cache_read_input_tokens=100
+    )
+    mock_response.stop_reason = "max_tokens"
+
+    with patch("anthropic.Anthropic") as mock_anthropic:
+        mock_anthropic.return_value.messages.create.return_value = mock_response
+        result = provider.generate("list files")
+
+    assert result.usage is not None
+    assert result.usage.input_tokens == 120
+    assert result.usage.output_tokens == 6
+    assert result.usage.cached_tokens == 100
+    assert result.finish_reason == "max_tokens"
+    assert result.truncated
+    assert (result.provider, result.model) == ("anthropic", "claude-3-haiku-20240307")
+    assert result.raw_text == "ls -la"
+    assert result.latency is not None
+
+
+def test_handle_api_error_sdk_status():
+    """Test SDK errors are classified by status with the Retry-After hint."""
+    provider = AnthropicProvider({})
+    response = httpx.Response(
+        429,
+        headers={"retry-after": "2"},
+        request=httpx.Request("POST", "https://api.anthropic.com/v1/messages"),
+    )
+    error = anthropic.RateLimitError("slow down", response=response, body=None)
+
+    with pytest.raises(RateLimitError) as exc_info:
+        provider._handle_api_error(error)
+
+    assert exc_info.value.status == 429
+    assert exc_info.value.retry_after == 2.0
+    assert exc_info.value.transient
+
+
+def test_handle_api_error_overloaded():
+    """Test overloaded responses are transient."""
+    provider = AnthropicProvider({})
+    response = httpx.Response(
+        529, request=httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    )
+    error = anthropic.InternalServerError("Overloaded", response=response, body=None)
+
+    with pytest.raises(ServiceUnavailableError) as exc_info:
+        provider._handle_api_error(error)
+
+    assert exc_info.value.transient
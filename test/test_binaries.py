@@ -0,0 +1,173 @@
+"""Tests for the installed-binaries index."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from ask.binaries import (
+    INDEX_FILE,
+    BinaryIndex,
+    command_names,
+    describe,
+    load_index,
+    missing_commands,
+    relevant_tools,
+    tool_context,
+)
+
+
+def _make_tool(directory, name, output=""):
+    """Create an executable script that prints output."""
+    path = directory / name
+    path.write_text(f"#!/bin/sh\ncat <<'EOF'\n{output}\nEOF\n")
+    path.chmod(0o755)
+    return path
+
+
+@pytest.fixture
+def bin_dirs(tmp_path):
+    """Two directories of fake executables."""
+    first = tmp_path / "bin1"
+    second = tmp_path / "bin2"
+    first.mkdir()
+    second.mkdir()
+    _make_tool(first, "jq", "jq-1.7.1\njq is a tool for processing JSON inputs")
+    _make_tool(second, "jq")
+    _make_tool(second, "grep")
+    (second / "notes.txt").write_text("not executable")
+    return first, second
+
+
+@pytest.fixture
+def index(tmp_path, bin_dirs):
+    """Refreshed index over the fake directories."""
+    index = BinaryIndex(
+        tmp_path / "binaries.json", search_path=os.pathsep.join(map(str, bin_dirs))
+    )
+    index.refresh()
+    return index
+
+
+@pytest.mark.parametrize(
+    "command,expected",
+    [
+        ("ls -la | grep foo && echo $(date +%s); cd /tmp", ["ls", "grep", "date"]),
+        ("FOO=1 sudo fd -e py 2>/dev/null || rg x", ["fd", "rg"]),
+        ("if true; then jq . f; fi", ["jq"]),
+        ('echo "a | b" | wc -l', ["wc"]),
+        ('for f in *.txt; do mv "$f" "${f%.txt}.md"; done', ["mv"]),
+        ("ls 2>&1 | tee out", ["ls", "tee"]),
+        ("(cd x && make)", ["make"]),
+        ("./run.sh && /usr/bin/python3 x", []),
+        ("cat <<EOF\nfoo\nEOF", []),
+        ("echo 'unterminated", []),
+        ('f() { du -sh "$1"; }; f src', ["du"]),
+        ("function g { ls; }; g", ["ls"]),
+        ("coproc nc -l 8080", ["nc"]),
+        ("coproc SRV { nc -l 8080; }", ["nc"]),
+    ],
+)
+def test_command_names(command, expected):
+    """Test programs are found at the start of each simple command."""
+    assert command_names(command) == expected
+
+
+def test_relevant_tools():
+    """Test tools are matched by name or keyword."""
+    assert relevant_tools("pretty print this JSON") == ["jq"]
+    assert relevant_tools("use ffmpeg to trim a clip") == ["ffmpeg"]
+    assert relevant_tools("show the date") == []
+
+
+def test_refresh_lists_executables(index, bin_dirs):
+    """Test only executables are indexed, with search path precedence."""
+    first, second = bin_dirs
+
+    assert index.which("jq") == str(first / "jq")
+    assert index.which("grep") == str(second / "grep")
+    assert index.which("notes.txt") is None
+    assert index.which("fd") is None
+
+
+def test_refresh_only_lists_changed_directories(tmp_path, index, bin_dirs):
+    """Test unchanged directories are not listed again."""
+    first, second = bin_dirs
+    index.save()
+    _make_tool(second, "fd")
+    # Directory mtimes can have coarse resolution, so make the change visible
+    os.utime(second, (0, 12345))
+
+    reloaded = BinaryIndex(
+        tmp_path / "binaries.json", search_path=os.pathsep.join(map(str, bin_dirs))
+    )
+    with patch.object(BinaryIndex, "_list", wraps=BinaryIndex._list) as mock_list:
+        reloaded.refresh()
+
+    mock_list.assert_called_once_with(str(second))
+    assert reloaded.which("fd") == str(second / "fd")
+    assert reloaded.changed
+
+
+def test_save_only_when_changed(tmp_path, index):
+    """Test the index is written only after a change."""
+    index.save()
+    assert (tmp_path / "binaries.json").exists()
+    (tmp_path / "binaries.json").unlink()
+
+    index.save()
+
+    assert not (tmp_path / "binaries.json").exists()
+
+
+def test_describe(bin_dirs):
+    """Test version and summary are read from the tool's output."""
+    first, _ = bin_dirs
+
+    assert describe("jq", str(first / "jq")) == {
+        "version": "1.7.1",
+        "summary": "jq is a tool for processing JSON inputs",
+    }
+
+
+def test_describe_tools_cached_by_mtime(index, bin_dirs):
+    """Test tools are only run again after they change."""
+    first, _ = bin_dirs
+
+    with patch("ask.binaries.describe", return_value={"version": "1"}) as mock_run:
+        assert index.describe_tools(["jq", "fd"]) == {
+            "jq": {"mtime": os.stat(first / "jq").st_mtime, "version": "1"}
+        }
+        index.describe_tools(["jq"])
+        mock_run.assert_called_once()
+
+        os.utime(first / "jq", (0, 12345))
+        index.describe_tools(["jq"])
+        assert mock_run.call_count == 2
+
+
+def test_missing_commands(index):
+    """Test programs that are not installed are reported."""
+    assert missing_commands("fd -e json | jq . | grep x", index) == ["fd"]
+    assert missing_commands("cd /tmp && echo ok", index) == []
+
+
+def test_tool_context(index):
+    """Test installed and missing relevant tools are summarized."""
+    context = tool_context("find json files", index)
+
+    assert context == (
+        "Relevant tools installed on this system:\n"
+        "- jq 1.7.1: jq is a tool for processing JSON inputs\n"
+        "Not installed, do not use: fd"
+    )
+    assert tool_context("show the date", index) is None
+
+
+def test_load_index(isolated_cache_dir, bin_dirs):
+    """Test the index is built for $PATH and saved in the cache directory."""
+    with patch.dict(os.environ, {"PATH": str(bin_dirs[1])}):
+        index = load_index()
+
+    assert index.which("grep") == str(bin_dirs[1] / "grep")
+    assert (isolated_cache_dir / INDEX_FILE).exists()
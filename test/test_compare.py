@@ -0,0 +1,157 @@
+"""Tests for model comparison."""
+
+from ask.compare import Sample, format_report, run
+from ask.exceptions import APIError, AuthenticationError
+from ask.providers.base import CommandResult, TokenUsage
+
+
+def _result(command, latency=1.0, first_token=None, tokens=(100, 10)):
+    return CommandResult(
+        command,
+        usage=TokenUsage(*tokens),
+        latency=latency,
+        first_token_latency=first_token,
+    )
+
+
+def test_run_samples_each_model():
+    """Test each model is created once and run repeat times."""
+    created = []
+
+    def create(spec):
+        if spec == "bad":
+            raise AuthenticationError("Error: Invalid API key")
+        created.append(spec)
+        return spec
+
+    samples = run(
+        ["anthropic", "bad", "openai"], create, lambda spec: _result(spec), repeat=3
+    )
+
+    assert list(samples) == ["anthropic", "bad", "openai"]
+    assert sorted(created) == ["anthropic", "openai"]
+    assert [run.result.command for run in samples["openai"]] == ["openai"] * 3
+    assert str(samples["bad"][0].error) == "Error: Invalid API key"
+
+
+def test_run_records_failed_runs():
+    """Test runs that fail are kept with their error."""
+    outcomes = iter([APIError("Error: timeout"), _result("ls")])
+
+    def generate(provider):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    samples = run(["openai"], lambda spec: spec, generate, repeat=2)
+
+    assert [run.error is None for run in samples["openai"]] == [False, True]
+
+
+def test_run_uses_request_latency():
+    """Test a run's latency is the request's, without retry backoff."""
+    samples = run(["openai"], lambda spec: spec, lambda spec: _result("ls", 0.25))
+
+    assert samples["openai"][0].latency == 0.25
+
+
+def test_run_timed_when_latency_unknown():
+    """Test runs without a reported latency are timed around the call."""
+    samples = run(["openai"], lambda spec: spec, lambda spec: _result("ls", None))
+
+    assert 0 <= samples["openai"][0].latency < 1
+
+
+def test_run_repeated_spec_once():
+    """Test a spec listed twice is created and run once."""
+    created = []
+
+    def create(spec):
+        created.append(spec)
+        return spec
+
+    samples = run(["openai", "openai"], create, lambda spec: _result(spec))
+
+    assert created == ["openai"]
+    assert len(samples["openai"]) == 1
+
+
+def test_format_report_groups_agreeing_models():
+    """Test models with the same command share a letter."""
+    samples = {
+        "anthropic": [Sample(0.5, _result("ls  -la", first_token=0.2), None)],
+        "openai": [Sample(0.8, _result("ls -la"), None)],
+        "gemini": [Sample(0.3, _result("ls -a", tokens=(None, None)), None)],
+    }
+
+    lines = format_report(samples).splitlines()
+
+    assert lines[0].split() == [
+        "model",
+        "runs",
+        "errors",
+        "latency",
+        "ttft",
+        "in",
+        "out",
+        "output",
+    ]
+    assert lines[1].split() == [
+        "anthropic",
+        "1",
+        "0",
+        "0.50s",
+        "0.20s",
+        "100",
+        "10",
+        "A",
+    ]
+    assert lines[2].split() == ["openai", "1", "0", "0.80s", "1.00s", "100", "10", "A"]
+    assert lines[3].split() == ["gemini", "1", "0", "0.30s", "1.00s", "-", "-", "B"]
+    assert lines[5:] == ["A: ls -la", "B: ls -a"]
+
+
+def test_format_report_repeated_runs():
+    """Test repeated runs report latency percentiles and failures."""
+    samples = {
+        "anthropic": [
+            Sample(latency, _result("ls", first_token=latency / 2), None)
+            for latency in (0.4, 0.6, 1.0)
+        ]
+        + [Sample(2.0, None, APIError("Error: timeout"))],
+        "openai": [Sample(0.0, None, AuthenticationError("Error: Invalid API key"))],
+    }
+
+    lines = format_report(samples, repeat=3).splitlines()
+
+    assert lines[0].split()[3:7] == ["p50", "p95", "max", "ttft"]
+    assert lines[1].split() == [
+        "anthropic",
+        "3",
+        "1",
+        "0.60s",
+        "1.00s",
+        "1.00s",
+        "0.30s",
+        "100",
+        "10",
+        "A",
+    ]
+    assert lines[2].split()[:3] == ["openai", "0", "1"]
+    assert lines[2].split()[-1] == "-"
+    assert lines[4:] == [
+        "A: ls",
+        "anthropic failed: Error: timeout",
+        "openai failed: Error: Invalid API key",
+    ]
+
+
+def test_format_report_all_agree():
+    """Test agreement is called out when every model gives the same command."""
+    samples = {
+        "anthropic": [Sample(0.5, _result("ls"), None)],
+        "openai": [Sample(0.5, _result("ls"), None)],
+    }
+
+    assert format_report(samples).endswith("All models agree:\nA: ls")
@@ -1,17 +1,25 @@
 """Tests for the configuration system."""
 
 import os
+import time
 from unittest.mock import patch
 
+import httpx
+import ollama
 import pytest
 
 from ask.config import (
+    COMPILED_CONFIG_FILE,
+    OLLAMA_PROBE_TIMEOUT,
     SYSTEM_PROMPT,
+    ConfigWatcher,
     check_ollama_available,
+    get_cache_dir,
     get_config_path,
     get_default_model,
     get_default_provider,
     get_provider_config,
+    get_tiers,
     load_config,
 )
 from ask.exceptions import ConfigurationError
@@ -98,6 +106,94 @@ def test_load_config_permission_error(temp_config_dir):
                 load_config()
 
 
+def _old_config(directory, text):
+    """Write a config file last modified an hour ago."""
+    config_file = directory / "config.toml"
+    config_file.write_text(text)
+    old = time.time() - 3600
+    os.utime(config_file, (old, old))
+    return config_file
+
+
+def test_load_config_reuses_compiled(temp_config_dir):
+    """Test an unchanged config file is not parsed again."""
+    config_file = _old_config(temp_config_dir, '[ask]\ndefault_model = "openai"\n')
+
+    with patch("ask.config.get_config_path", return_value=config_file):
+        assert load_config() == {"ask": {"default_model": "openai"}}
+        with patch("ask.config.parse_toml", side_effect=AssertionError):
+            assert load_config() == {"ask": {"default_model": "openai"}}
+
+
+def test_load_config_reparses_changed_file(temp_config_dir):
+    """Test a config file that changed is parsed again."""
+    config_file = _old_config(temp_config_dir, '[ask]\ndefault_model = "openai"\n')
+
+    with patch("ask.config.get_config_path", return_value=config_file):
+        load_config()
+        _old_config(temp_config_dir, '[ask]\ndefault_model = "anthropic"\n')
+        assert load_config()["ask"]["default_model"] == "anthropic"
+
+
+def test_load_config_skips_compiling_fresh_file(temp_config_dir):
+    """Test a file modified just now is not compiled."""
+    config_file = temp_config_dir / "config.toml"
+    config_file.write_text('[ask]\ndefault_model = "openai"\n')
+
+    with patch("ask.config.get_config_path", return_value=config_file):
+        load_config()
+
+    assert not (get_cache_dir() / COMPILED_CONFIG_FILE).exists()
+
+
+def test_load_config_with_datetime(temp_config_dir):
+    """Test values marshal cannot store are loaded without being compiled."""
+    config_file = _old_config(temp_config_dir, "[ask]\nsince = 2024-01-01\n")
+
+    with patch("ask.config.get_config_path", return_value=config_file):
+        assert str(load_config()["ask"]["since"]) == "2024-01-01"
+
+    assert not (get_cache_dir() / COMPILED_CONFIG_FILE).exists()
+
+
+def test_config_watcher_reloads_changed_file(temp_config_dir):
+    """Test the watcher swaps in the config after the file changes."""
+    config_file = _old_config(temp_config_dir, '[ask]\ndefault_model = "openai"\n')
+
+    with patch("ask.config.get_config_path", return_value=config_file):
+        watcher = ConfigWatcher(load_config(), interval=0)
+        assert watcher.poll() is False
+        config_file.write_text('[ask]\ndefault_model = "anthropic"\n')
+        assert watcher.poll() is True
+        assert watcher.poll() is False
+
+    assert watcher.config["ask"]["default_model"] == "anthropic"
+    assert watcher.generation == 1
+
+
+def test_config_watcher_keeps_config_on_error(temp_config_dir):
+    """Test a file that fails to load leaves the previous config in place."""
+    config_file = _old_config(temp_config_dir, '[ask]\ndefault_model = "openai"\n')
+
+    with patch("ask.config.get_config_path", return_value=config_file):
+        watcher = ConfigWatcher(load_config(), interval=0)
+        config_file.write_text("[ask\n")
+        assert watcher.poll() is False
+
+    assert watcher.config == {"ask": {"default_model": "openai"}}
+    assert watcher.generation == 0
+
+
+def test_config_watcher_interval(temp_config_dir):
+    """Test the file is not checked again within the interval."""
+    config_file = _old_config(temp_config_dir, '[ask]\ndefault_model = "openai"\n')
+
+    with patch("ask.config.get_config_path", return_value=config_file):
+        watcher = ConfigWatcher(load_config(), interval=60)
+        config_file.write_text('[ask]\ndefault_model = "anthropic"\n')
+        assert watcher.poll() is False
+
+
 def test_get_provider_config_simple():
     """Test simple provider name parsing."""
     config = {"anthropic": {"model_name": "claude-3-haiku-20240307"}}
@@ -201,10 +297,54 @@ def test_get_default_provider_ollama(mock_env_vars):
         assert get_default_provider() == "ollama"
 
 
+@pytest.mark.parametrize(
+    "error",
+    [
+        ConnectionError("refused"),
+        httpx.ReadError("Connection reset by peer"),
+        httpx.ConnectTimeout("timed out"),
+        ollama.ResponseError("bad gateway", 502),
+    ],
+)
+def test_check_ollama_available_down(error):
+    """Test unreachable or failing servers count as unavailable."""
+    with patch("ollama.Client") as mock_client_class:
+        mock_client_class.return_value.list.side_effect = error
+        assert check_ollama_available("http://10.255.255.1:11434") is False
+
+
 def test_check_ollama_available():
     """Test check_ollama_available."""
-    with patch("ollama.list", return_value=["llama3.1:8b"]):
+    with patch("ollama.Client") as mock_client_class:
         assert check_ollama_available() is True
+        assert check_ollama_available("http://gpu1:11434") is True
+
+    assert mock_client_class.call_args_list[0].kwargs["host"] is None
+    mock_client_class.assert_called_with(
+        host="http://gpu1:11434", timeout=OLLAMA_PROBE_TIMEOUT
+    )
+
+
+def test_get_cache_dir_xdg_cache_home(temp_config_dir):
+    """Test XDG_CACHE_HOME cache directory resolution."""
+    with patch.dict(os.environ, {"XDG_CACHE_HOME": str(temp_config_dir)}):
+        cache_dir = get_cache_dir()
+
+    assert cache_dir == temp_config_dir / "ask"
+    assert cache_dir.is_dir()
+
+
+def test_get_cache_dir_default(temp_config_dir):
+    """Test default ~/.cache directory."""
+    with patch.dict(os.environ, {}, clear=True):
+        with patch("pathlib.Path.home", return_value=temp_config_dir):
+            assert get_cache_dir() == temp_config_dir / ".cache" / "ask"
+
 
-    with patch("ollama.list", side_effect=ConnectionError):
-        assert check_ollama_available() is False
+def test_get_tiers():
+    """Test tier retrieval."""
+    assert get_tiers({"ask": {"tiers": ["ollama", "anthropic"]}}) == [
+        "ollama",
+        "anthropic",
+    ]
+    assert get_tiers({}) == []
@@ -0,0 +1,186 @@
+"""Tests for the environment context collector."""
+
+import os
+import subprocess  # nosec B404
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from ask import environment
+from ask.environment import SOURCE_TIMEOUT, SOURCES, collect
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    """Directory with a few files."""
+    directory = tmp_path / "work"
+    directory.mkdir()
+    (directory / "b.txt").write_text("")
+    (directory / "a").mkdir()
+    (directory / ".hidden").write_text("")
+    return directory
+
+
+def test_collect_files(tmp_path, workdir):
+    """Test the directory listing skips hidden files and marks directories."""
+    context = collect(["files"], cwd=str(workdir), cache_path=tmp_path / "env.json")
+
+    assert context == f"Current directory: {workdir}\nFiles: a/, b.txt"
+
+
+def test_collect_files_truncated(tmp_path, workdir):
+    """Test long listings are truncated."""
+    with patch("ask.environment.MAX_LISTED_FILES", 1):
+        context = collect(["files"], cwd=str(workdir), cache_path=tmp_path / "env.json")
+
+    assert context.endswith("Files: a/ (and 1 more)")
+
+
+def test_collect_uses_cache_until_mtime_changes(tmp_path, workdir):
+    """Test cached values are reused until the directory changes."""
+    cache_path = tmp_path / "env.json"
+    collect(["files"], cwd=str(workdir), cache_path=cache_path)
+
+    with patch.dict(SOURCES, {"files": (SOURCES["files"][0], None)}):
+        # The collector would fail if it ran, so this must come from the cache
+        assert "b.txt" in collect(["files"], cwd=str(workdir), cache_path=cache_path)
+
+    (workdir / "c.txt").write_text("")
+    os.utime(workdir, (0, 12345))
+    assert "c.txt" in collect(["files"], cwd=str(workdir), cache_path=cache_path)
+
+
+def test_collect_cached_per_directory(tmp_path, workdir):
+    """Test listings of different directories are cached separately."""
+    cache_path = tmp_path / "env.json"
+    other = tmp_path / "other"
+    other.mkdir()
+
+    collect(["files"], cwd=str(workdir), cache_path=cache_path)
+    assert "(empty)" in collect(["files"], cwd=str(other), cache_path=cache_path)
+    assert "b.txt" in collect(["files"], cwd=str(workdir), cache_path=cache_path)
+
+
+def test_collect_timeout(tmp_path, workdir):
+    """Test slow sources are dropped instead of delaying the run."""
+    release = threading.Event()
+
+    def slow(cwd, timeout):
+        release.wait(5)
+        return "slow"
+
+    with patch.dict(SOURCES, {"slow": (lambda cwd: [cwd], slow)}):
+        try:
+            context = collect(
+                ["slow", "files"],
+                cwd=str(workdir),
+                timeout=0.05,
+                cache_path=tmp_path / "env.json",
+            )
+        finally:
+            release.set()
+
+    assert context.startswith("Current directory")
+    assert "slow" not in context
+
+
+def test_collect_timeout_cached_for_next_run(tmp_path, workdir):
+    """Test a source that misses the wait finishes and is cached for next time."""
+    cache_path = tmp_path / "env.json"
+    release = threading.Event()
+    finished = threading.Event()
+
+    def slow(cwd, timeout):
+        release.wait(5)
+        return "slow"
+
+    def store(*args):
+        real_store(*args)
+        finished.set()
+
+    real_store = environment._store
+    with patch.dict(SOURCES, {"slow": (lambda cwd: [cwd], slow)}):
+        with patch("ask.environment._store", side_effect=store):
+            try:
+                first = collect(
+                    ["slow"], cwd=str(workdir), timeout=0.05, cache_path=cache_path
+                )
+            finally:
+                release.set()
+            assert finished.wait(5)
+
+        assert first is None
+        assert collect(["slow"], cwd=str(workdir), cache_path=cache_path) == "slow"
+
+
+def test_collect_failing_source(tmp_path):
+    """Test a source that raises is skipped."""
+    missing = tmp_path / "missing"
+
+    assert (
+        collect(["files"], cwd=str(missing), cache_path=tmp_path / "env.json") is None
+    )
+
+
+def test_collect_unknown_sources_ignored(tmp_path, workdir):
+    """Test unknown source names are ignored."""
+    assert collect(["nope"], cwd=str(workdir), cache_path=tmp_path / "env.json") is None
+
+
+def test_collect_shell(tmp_path, workdir):
+    """Test the shell is described by its version output."""
+    with patch.dict(os.environ, {"SHELL": "/bin/bash"}):
+        with patch(
+            "ask.environment._run", return_value="GNU bash, version 5.2\nmore"
+        ) as mock_run:
+            context = collect(
+                ["shell"], cwd=str(workdir), cache_path=tmp_path / "env.json"
+            )
+
+    mock_run.assert_called_once_with(
+        ["/bin/bash", "--version"], str(workdir), SOURCE_TIMEOUT
+    )
+    assert context == "Shell: GNU bash, version 5.2"
+
+
+def test_collect_os(tmp_path, workdir):
+    """Test the OS is always described."""
+    context = collect(["os"], cwd=str(workdir), cache_path=tmp_path / "env.json")
+
+    assert context.startswith("OS: ")
+
+
+def test_collect_git(tmp_path, workdir):
+    """Test git status is included inside a repository."""
+    cache_path = tmp_path / "env.json"
+    assert collect(["git"], cwd=str(workdir), cache_path=cache_path) is None
+
+    try:
+        subprocess.run(  # nosec B603 B607
+            ["git", "init", "-q", "-b", "main"], cwd=workdir, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip("git is not available")
+
+    context = collect(["git"], cwd=str(workdir), timeout=5, cache_path=cache_path)
+
+    assert context.startswith("Git status:\n## No commits yet on main")
+    assert "?? b.txt" in context
+
+
+def test_collect_git_expires(tmp_path, workdir):
+    """Test cached git status is collected again after the TTL."""
+    (workdir / ".git").mkdir()
+    cache_path = tmp_path / "env.json"
+    statuses = iter(["## main\n", "## main\n M b.txt\n"])
+    with patch("ask.environment._run", side_effect=lambda *args: next(statuses)):
+        with patch("ask.environment.time.time", return_value=1000.0):
+            collect(["git"], cwd=str(workdir), cache_path=cache_path)
+            assert "M b.txt" not in collect(
+                ["git"], cwd=str(workdir), cache_path=cache_path
+            )
+        with patch("ask.environment.time.time", return_value=1000.0 + 60):
+            assert "M b.txt" in collect(
+                ["git"], cwd=str(workdir), cache_path=cache_path
+            )
@@ -0,0 +1,214 @@
+"""Tests for evaluation against a prompt corpus."""
+
+import json
+
+import pytest
+
+import ask.evaluation as evaluation
+from ask.evaluation import (
+    GRADE_ERROR,
+    GRADE_EXACT,
+    GRADE_MISS,
+    GRADE_SEMANTIC,
+    canonical,
+    format_report,
+    grade,
+    load_corpus,
+    parse_cases,
+    run,
+    summarize,
+)
+from ask.exceptions import APIError, ConfigurationError
+from ask.providers.base import CommandResult, TokenUsage
+
+CORPUS = """
+[[cases]]
+prompt = "list all files"
+expect = ["ls -la", "ls -a"]
+
+[[cases]]
+prompt = "find big files"
+match = 'find \\S+ .*-size \\+100M'
+"""
+
+
+def _result(command, latency=1.0, tokens=(100, 10), model="gpt-4o-mini"):
+    return CommandResult(
+        command, usage=TokenUsage(*tokens), latency=latency, model=model
+    )
+
+
+def _generate(answers):
+    def generate(prompt):
+        answer = answers[prompt]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    return generate
+
+
+def test_load_corpus(tmp_path):
+    """Test cases are read with their expected commands and patterns."""
+    path = tmp_path / "corpus.toml"
+    path.write_text(CORPUS)
+
+    cases = load_corpus(path)
+
+    assert [case.prompt for case in cases] == ["list all files", "find big files"]
+    assert cases[0].expect == ["ls -la", "ls -a"]
+    assert cases[1].patterns[0].search("find . -size +100M")
+
+
+def test_load_corpus_without_cases(tmp_path):
+    """Test an empty corpus is reported."""
+    path = tmp_path / "corpus.toml"
+    path.write_text("")
+
+    with pytest.raises(ConfigurationError, match="has no"):
+        load_corpus(path)
+
+
+@pytest.mark.parametrize(
+    "entry",
+    [{"prompt": "list files"}, {"expect": "ls"}, {"prompt": "x", "match": "("}],
+)
+def test_parse_invalid_cases(entry):
+    """Test cases without an answer or with a bad pattern are rejected."""
+    with pytest.raises(ConfigurationError, match="(?i)case 1"):
+        parse_cases([entry])
+
+
+def test_canonical_ignores_quoting_and_flag_order():
+    """Test commands written differently reduce to the same tokens."""
+    assert canonical("ls -la") == canonical("ls -a  -l")
+    assert canonical("grep 'foo bar' x.txt") == canonical('grep "foo bar" x.txt')
+    assert canonical("cp a b") != canonical("cp b a")
+    assert canonical("echo 'unterminated") is None
+
+
+def test_canonical_keeps_single_dash_options():
+    """Test find-style options are not split into short flags."""
+    assert canonical("find . -name x -type f") == (
+        "find",
+        ".",
+        "-name",
+        "x",
+        "-type",
+        "f",
+    )
+    assert canonical("find . -name x -type f") != canonical("find . -mane x -type f")
+    assert canonical("find . -type f -o -name x") != canonical(
+        "find . -o -type f -name x"
+    )
+    assert canonical("sudo find / -name x | wc -lc") == canonical(
+        "sudo find / -name x | wc -c -l"
+    )
+
+
+@pytest.mark.parametrize(
+    ("command", "expected"),
+    [
+        ("ls  -la", GRADE_EXACT),
+        ("ls -al", GRADE_SEMANTIC),
+        ("ls -l", GRADE_MISS),
+    ],
+)
+def test_grade(command, expected):
+    """Test answers are graded exact, semantic or miss."""
+    case = parse_cases([{"prompt": "list all files", "expect": "ls -la"}])[0]
+
+    assert grade(case, command) == expected
+
+
+def test_grade_pattern():
+    """Test an answer matching a pattern is a semantic match."""
+    case = parse_cases([{"prompt": "find big files", "match": r"-size \+100M"}])[0]
+
+    assert grade(case, "find / -type f -size +100M") == GRADE_SEMANTIC
+    assert grade(case, "find / -size +1G") == GRADE_MISS
+
+
+def test_run_grades_in_case_order():
+    """Test every case is answered and errors are kept as outcomes."""
+    cases = parse_cases(
+        [
+            {"prompt": "a", "expect": "ls"},
+            {"prompt": "b", "expect": "pwd"},
+            {"prompt": "c", "expect": "df"},
+        ]
+    )
+    answers = {"a": _result("ls"), "b": APIError("Error: timeout"), "c": _result("du")}
+
+    outcomes = run(cases, _generate(answers), concurrency=2)
+
+    assert [outcome.grade for outcome in outcomes] == [
+        GRADE_EXACT,
+        GRADE_ERROR,
+        GRADE_MISS,
+    ]
+    assert str(outcomes[1].error) == "Error: timeout"
+
+
+def test_summarize():
+    """Test match rates, latency percentiles, throughput and cost."""
+    cases = parse_cases(
+        [
+            {"prompt": "a", "expect": "ls -la"},
+            {"prompt": "b", "expect": "ls -la"},
+            {"prompt": "c", "expect": "pwd"},
+            {"prompt": "d", "expect": "df"},
+        ]
+    )
+    answers = {
+        "a": _result("ls -la", latency=1.0, tokens=(1_000_000, 20)),
+        "b": _result("ls -al", latency=3.0, tokens=(None, None)),
+        "c": _result("ls", latency=2.0, tokens=(0, 20)),
+        "d": APIError("Error: timeout"),
+    }
+    outcomes = run(cases, _generate(answers))
+
+    summary = summarize(outcomes, elapsed=2.0)
+
+    assert summary["cases"] == 4
+    assert summary["errors"] == 1
+    assert summary["exact"] == 0.25
+    assert summary["semantic"] == 0.5
+    assert summary["p50"] == 2.0
+    assert summary["p99"] == 3.0
+    # Only requests that reported output tokens count towards throughput
+    assert summary["tokens_per_second"] == pytest.approx(40 / 3.0)
+    assert summary["requests_per_second"] == 2.0
+    assert summary["cost"] == pytest.approx(0.15 + 40 * 0.6 / 1_000_000)
+
+
+def test_format_report_lists_misses():
+    """Test the report shows the summary and the cases that were missed."""
+    cases = parse_cases([{"prompt": "a", "expect": "pwd"}])
+    outcomes = run(cases, _generate({"a": _result("ls")}))
+
+    report = format_report(summarize(outcomes, 1.0), outcomes)
+
+    assert "exact      0.0%" in report
+    assert "miss: a\n  expected pwd\n  got      ls" in report
+
+
+def test_main_exits_below_min_match(tmp_path, capsys, mocker):
+    """Test ask-eval prints JSON results and fails below --min-match."""
+    path = tmp_path / "corpus.toml"
+    path.write_text(CORPUS)
+    provider = mocker.MagicMock()
+    provider.config = {}
+    provider.generate.side_effect = lambda prompt: _result(
+        "ls -a" if prompt == "list all files" else "du -sh"
+    )
+    mocker.patch.object(evaluation.cli, "load_configuration", return_value={})
+    mocker.patch.object(evaluation.cli, "resolve_provider", return_value=provider)
+
+    with pytest.raises(SystemExit) as exc_info:
+        evaluation.main([str(path), "--json", "--min-match", "0.9"])
+
+    assert exc_info.value.code == 1
+    output = json.loads(capsys.readouterr().out)
+    assert output["exact"] == 0.5
+    assert [case["grade"] for case in output["results"]] == [GRADE_EXACT, GRADE_MISS]
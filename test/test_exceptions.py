@@ -1,10 +1,20 @@
 """Tests for custom exception classes."""
 
+from unittest.mock import MagicMock
+
+import pytest
+
 from ask.exceptions import (
     APIError,
     AuthenticationError,
     ConfigurationError,
+    InvalidRequestError,
+    ModelNotFoundError,
+    ProviderError,
+    QuotaExceededError,
     RateLimitError,
+    ServiceUnavailableError,
+    classify_error,
 )
 
 
@@ -53,3 +63,146 @@ def test_exception_hierarchy():
     assert not issubclass(AuthenticationError, ConfigurationError)
     assert not issubclass(APIError, ConfigurationError)
     assert not issubclass(APIError, AuthenticationError)
+
+
+class StatusError(Exception):
+    """SDK-style exception with an HTTP status and response headers."""
+
+    def __init__(self, message, status_code, headers=None, code=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = MagicMock(headers=headers or {})
+        self.code = code
+
+
+class GrpcError(Exception):
+    """gRPC-style exception whose status is returned by code()."""
+
+    def __init__(self, status):
+        super().__init__(status)
+        self._status = status
+
+    def code(self):
+        status = MagicMock()
+        status.name = self._status
+        return status
+
+
+def test_provider_error_defaults():
+    """Test errors carry status, retry hint and whether they are transient."""
+    assert not APIError("boom").transient
+    assert RateLimitError("slow down").transient
+    assert not QuotaExceededError("no credit").transient
+    assert ServiceUnavailableError("overloaded").transient
+    assert not ServiceUnavailableError("down", transient=False).transient
+
+    error = RateLimitError("slow down", status=429, retry_after=1.5)
+    assert (error.status, error.retry_after) == (429, 1.5)
+    assert isinstance(error, ProviderError)
+    assert isinstance(AuthenticationError("bad key"), ProviderError)
+
+
+@pytest.mark.parametrize(
+    ("status", "expected"),
+    [
+        (401, AuthenticationError),
+        (403, AuthenticationError),
+        (404, ModelNotFoundError),
+        (400, InvalidRequestError),
+        (422, InvalidRequestError),
+        (429, RateLimitError),
+        (500, ServiceUnavailableError),
+        (529, ServiceUnavailableError),
+        (418, APIError),
+    ],
+)
+def test_classify_error_status(status, expected):
+    """Test errors are classified by HTTP status code."""
+    error = classify_error(StatusError("request failed", status))
+
+    assert type(error) is expected
+    assert error.status == status
+
+
+def test_classify_error_quota():
+    """Test quota errors that will not clear up are permanent."""
+    error = classify_error(
+        StatusError("You exceeded your quota", 429, code="insufficient_quota")
+    )
+
+    assert isinstance(error, QuotaExceededError)
+    assert not error.transient
+
+
+def test_classify_error_retry_after():
+    """Test Retry-After hints are read from the response headers."""
+    assert (
+        classify_error(StatusError("slow down", 429, {"retry-after": "3"})).retry_after
+        == 3.0
+    )
+    assert (
+        classify_error(
+            StatusError("slow down", 429, {"retry-after-ms": "250"})
+        ).retry_after
+        == 0.25
+    )
+    assert classify_error(StatusError("slow down", 429)).retry_after is None
+
+
+def test_classify_error_retry_delay_details():
+    """Test retry delays in error details are read."""
+    error = StatusError("RESOURCE_EXHAUSTED", 429)
+    error.details = {"error": {"details": [{"retryDelay": "7s"}]}}
+
+    assert classify_error(error).retry_after == 7.0
+
+
+def test_classify_error_grpc_status():
+    """Test gRPC status codes are mapped to HTTP statuses."""
+    assert isinstance(classify_error(GrpcError("RESOURCE_EXHAUSTED")), RateLimitError)
+    assert isinstance(classify_error(GrpcError("UNAUTHENTICATED")), AuthenticationError)
+    unavailable = classify_error(GrpcError("UNAVAILABLE"))
+    assert isinstance(unavailable, ServiceUnavailableError)
+    assert unavailable.status == 503
+
+
+def test_classify_error_ignores_code_methods_needing_arguments():
+    """Test a code() method that cannot be called does not hide the status."""
+
+    class CodeMethodError(Exception):
+        status_code = None
+        status = 429
+
+        def code(self, value):
+            return value
+
+    assert isinstance(classify_error(CodeMethodError("slow down")), RateLimitError)
+
+
+def test_classify_error_connection_errors():
+    """Test the SDK's connection errors are transient."""
+    error = classify_error(ConnectionResetError("reset"), (ConnectionError,))
+
+    assert isinstance(error, ServiceUnavailableError)
+    assert error.transient
+
+
+def test_classify_error_message_fallback():
+    """Test plain exceptions are classified by their message."""
+    assert isinstance(classify_error(Exception("Unauthorized")), AuthenticationError)
+    assert isinstance(classify_error(Exception("HTTP 429")), RateLimitError)
+    assert isinstance(classify_error(Exception("quota exceeded")), RateLimitError)
+    assert isinstance(
+        classify_error(Exception("insufficient_quota")), QuotaExceededError
+    )
+    assert isinstance(
+        classify_error(Exception("request timed out")), ServiceUnavailableError
+    )
+    assert type(classify_error(Exception("model is loading"))) is APIError
+
+
+def test_classify_error_passes_through_provider_errors():
+    """Test already classified errors are returned unchanged."""
+    error = APIError("Error: API returned empty response")
+
+    assert classify_error(error) is error
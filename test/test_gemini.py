@@ -4,7 +4,7 @@ import os
 from unittest.mock import MagicMock, patch
 
 import pytest
-from google.genai.types import GenerateContentConfig
+from google.genai.types import FinishReason, GenerateContentConfig
 
 from ask.config import SYSTEM_PROMPT
 from ask.exceptions import APIError, AuthenticationError, RateLimitError
@@ -242,3 +242,66 @@ def test_config_parameter_usage(mock_gemini_key):
                 system_instruction="Custom system prompt",
             ),
         )
+
+
+def test_get_bash_command_stop_sequences(mock_gemini_key):
+    """Test stop sequences are forwarded."""
+    provider = GeminiProvider({"stop": ["\n\n"]})
+
+    mock_part = MagicMock(text="ls -la")
+    mock_response = MagicMock()
+    mock_response.candidates = [MagicMock()]
+    mock_response.candidates[0].content.parts = [mock_part]
+
+    with patch("google.genai.Client") as mock_genai:
+        mock_client = MagicMock()
+        mock_client.models.generate_content.return_value = mock_response
+        mock_genai.return_value = mock_client
+
+        assert provider.get_bash_command("list files") == "ls -la"
+        config = mock_client.models.generate_content.call_args.kwargs["config"]
+        assert config.stop_sequences == ["\n\n"]
+
+
+def test_get_bash_command_stream(mock_gemini_key):
+    """Test streaming stops once the command is complete."""
+    provider = GeminiProvider({"stream": True, "stop": ["\n\n"]})
+
+    def chunk(text):
+        mock_chunk = MagicMock()
+        mock_chunk.candidates = [MagicMock()]
+        mock_chunk.candidates[0].content.parts = [MagicMock(text=text)]
+        return mock_chunk
+
+    with patch("google.genai.Client") as mock_genai:
+        mock_client = MagicMock()
+        mock_client.models.generate_content_stream.return_value = iter(
+            [chunk("du -sh *"), chunk("\n\nShows usage")]
+        )
+        mock_genai.return_value = mock_client
+
+        assert provider.get_bash_command("disk usage") == "du -sh *"
+        mock_client.models.generate_content.assert_not_called()
+
+
+def test_generate_records_usage(mock_gemini_key):
+    """Test token usage and finish reason are read from the usage metadata."""
+    provider = GeminiProvider({})
+
+    mock_response = MagicMock()
+    mock_response.candidates[0].content.parts = [MagicMock(text="ls -la")]
+    mock_response.usage_metadata.prompt_token_count = 80
+    mock_response.usage_metadata.candidates_token_count = 5
+    mock_response.usage_metadata.cached_content_token_count = None
+    mock_response.candidates[0].finish_reason = FinishReason.MAX_TOKENS
+
+    with patch("google.genai.Client") as mock_genai:
+        mock_genai.return_value.models.generate_content.return_value = mock_response
+        result = provider.generate("list files")
+
+    assert result.usage is not None
+    assert result.usage.input_tokens == 80
+    assert result.usage.output_tokens == 5
+    assert result.usage.cached_tokens is None
+    assert result.finish_reason == "max_tokens"
+    assert result.truncated
@@ -245,3 +245,25 @@ def test_get_bash_command_multiline_code_block(mock_user, mock_system, mock_grok
 
         expected = "find . -name '*.py' \\\n  -type f \\\n  -exec grep -l 'test' {} \\;"
         assert result == expected
+
+
+@patch("ask.providers.grok.system")
+@patch("ask.providers.grok.user")
+def test_get_bash_command_stop_and_stream(mock_user, mock_system, mock_grok_key):
+    """Test stop sequences are forwarded and streaming stops early."""
+    provider = GrokProvider({"stream": True, "stop": ["\n\n"]})
+
+    mock_chat = MagicMock()
+    mock_chat.stream.return_value = iter(
+        [
+            (MagicMock(), MagicMock(content="ls -la")),
+            (MagicMock(), MagicMock(content="\n\nLists files")),
+        ]
+    )
+    mock_client = MagicMock()
+    mock_client.chat.create.return_value = mock_chat
+    provider.client = mock_client
+
+    assert provider.get_bash_command("list files") == "ls -la"
+    mock_client.chat.create.assert_called_once_with(model="grok-3-fast", stop=["\n\n"])
+    mock_chat.sample.assert_not_called()
@@ -0,0 +1,139 @@
+"""Tests for the offline instant-answer template index."""
+
+from unittest.mock import patch
+
+import pytest
+
+from ask.exceptions import ConfigurationError
+from ask.instant import (
+    Template,
+    TemplateIndex,
+    get_templates_path,
+    normalize_prompt,
+)
+
+
+@pytest.fixture
+def index():
+    """Template index with only the built-in templates."""
+    return TemplateIndex.load()
+
+
+def test_normalize_prompt():
+    """Test prompts are lowercased and trailing punctuation stripped."""
+    assert (
+        normalize_prompt("  Kill  process on PORT 80?! ") == "kill process on port 80"
+    )
+
+
+@pytest.mark.parametrize(
+    "prompt,expected",
+    [
+        (
+            "find all py files changed in the last 3 days",
+            "find . -type f -name '*.py' -mtime -3",
+        ),
+        (
+            "Find Python files modified in the past week?",
+            "find . -type f -name '*.py' -mtime -7",
+        ),
+        ("find files modified in the last week", "find . -type f -mtime -7"),
+        ("kill process on port 8080", "lsof -ti tcp:8080 | xargs kill"),
+        ("which process is using port 443", "lsof -i :443"),
+        ("disk usage by directory", "du -sh -- */ | sort -hr"),
+        ("How do I find files larger than 100 MB", "find . -type f -size +100M"),
+        ("untar backup.tar.gz", "tar -xf backup.tar.gz"),
+    ],
+)
+def test_lookup_builtin(index, prompt, expected):
+    """Test stock prompts are answered with slots filled in."""
+    assert index.lookup(prompt) == expected
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    [
+        "list files",
+        "find all files",
+        "kill process on port 99999",
+        "find py files changed in the last week and delete them",
+    ],
+)
+def test_lookup_no_match(index, prompt):
+    """Test prompts without a confident match fall through."""
+    assert index.lookup(prompt) is None
+
+
+def test_template_keeps_unknown_braces():
+    """Test braces that are not slots are left in the command."""
+    template = Template(["count lines in {ext} files"], "find . -exec wc -l {} +")
+
+    assert template.match("count lines in js files") == "find . -exec wc -l {} +"
+
+
+def test_template_quotes_slot_values():
+    """Test slot values are shell quoted."""
+    template = Template(["cat {name}"], "cat {name}")
+
+    assert template.match("cat a-b.txt") == "cat a-b.txt"
+    assert template.match("cat it's") is None
+
+
+def test_template_unknown_slot():
+    """Test unknown slots are rejected."""
+    with pytest.raises(ConfigurationError, match="Unknown template slot 'host'"):
+        Template(["ping {host}"], "ping {host}")
+
+
+def test_template_invalid_pattern():
+    """Test invalid regexes are rejected."""
+    with pytest.raises(ConfigurationError, match="Invalid template pattern"):
+        Template(["list (files"], "ls")
+
+
+def test_load_user_templates(tmp_path):
+    """Test user templates are loaded and take precedence over built-ins."""
+    path = tmp_path / "templates.toml"
+    path.write_text(
+        "[[templates]]\n"
+        'pattern = ["kill process on port {port}", "free port {port}"]\n'
+        'command = "fuser -k {port}/tcp"\n'
+        "\n"
+        "[[templates]]\n"
+        'pattern = "tail the last {count} log lines"\n'
+        'command = "tail -n {count} app.log"\n'
+        "defaults = {count = 10}\n"
+    )
+
+    index = TemplateIndex.load(path)
+
+    assert index.lookup("kill process on port 80") == "fuser -k 80/tcp"
+    assert index.lookup("free port 3000") == "fuser -k 3000/tcp"
+    assert index.lookup("disk usage by folder") == "du -sh -- */ | sort -hr"
+
+
+def test_load_user_templates_missing_keys(tmp_path):
+    """Test templates without a command are rejected."""
+    path = tmp_path / "templates.toml"
+    path.write_text('[[templates]]\npattern = "list files"\n')
+
+    with pytest.raises(ConfigurationError, match="'pattern' and 'command'"):
+        TemplateIndex.load(path)
+
+
+def test_load_user_templates_invalid_toml(tmp_path):
+    """Test invalid TOML is reported as a configuration error."""
+    path = tmp_path / "templates.toml"
+    path.write_text("[[templates]\n")
+
+    with pytest.raises(ConfigurationError, match="Failed to load templates"):
+        TemplateIndex.load(path)
+
+
+def test_get_templates_path(tmp_path):
+    """Test the template file is looked up next to config.toml."""
+    with patch("ask.config.get_config_path", return_value=tmp_path / "config.toml"):
+        assert get_templates_path() == tmp_path / "templates.toml"
+
+    with patch("ask.config.get_config_path", return_value=None):
+        assert get_templates_path() is None
@@ -0,0 +1,97 @@
+"""Tests for resumable batch jobs."""
+
+import io
+
+import pytest
+
+from ask.exceptions import ConfigurationError
+from ask.jobs import (
+    FAILURES_FILE,
+    RESULTS_FILE,
+    Job,
+    Progress,
+    format_duration,
+    read_prompts,
+)
+
+
+def test_read_prompts():
+    """Test prompts are read one per line, skipping blank lines."""
+    source = io.StringIO("list files\n\n  show disk usage  \n")
+
+    assert read_prompts(source) == ["list files", "show disk usage"]
+
+
+def test_create_and_open(tmp_path):
+    """Test a job keeps its prompts and model."""
+    job = Job.create(["list files", "show disk usage"], "anthropic", tmp_path)
+
+    opened = Job.open(job.id, tmp_path)
+
+    assert opened.model == "anthropic"
+    assert [item["prompt"] for item in opened.items] == [
+        "list files",
+        "show disk usage",
+    ]
+
+
+def test_open_missing_job(tmp_path):
+    """Test opening an unknown job is reported."""
+    with pytest.raises(ConfigurationError, match="No batch job 'nope'"):
+        Job.open("nope", tmp_path)
+
+
+def test_outstanding(tmp_path):
+    """Test finished items are skipped, and failed ones unless retried."""
+    job = Job.create(["a", "b", "c"], directory=tmp_path)
+    job.record_result(job.items[0], "ls")
+    job.record_failure(job.items[1], "Error: API request failed")
+
+    assert [item["prompt"] for item in job.outstanding()] == ["c"]
+    assert [item["prompt"] for item in job.outstanding(retry_failed=True)] == [
+        "b",
+        "c",
+    ]
+
+
+def test_failed_excludes_later_successes(tmp_path):
+    """Test items that succeeded on retry no longer count as failed."""
+    job = Job.create(["a", "b"], directory=tmp_path)
+    job.record_failure(job.items[0], "Error: timeout")
+    job.record_failure(job.items[1], "Error: timeout")
+    job.record_result(job.items[0], "ls")
+
+    assert list(job.failed()) == [1]
+    assert job.completed()[0]["command"] == "ls"
+
+
+def test_incomplete_log_entry_is_skipped(tmp_path):
+    """Test an entry cut short by a crash is treated as not done."""
+    job = Job.create(["a", "b"], directory=tmp_path)
+    job.record_result(job.items[0], "ls")
+    with open(job.path / RESULTS_FILE, "a") as log:
+        log.write('{"index": 1, "prompt": "b", "comm')
+    (job.path / FAILURES_FILE).write_text("")
+
+    assert list(job.completed()) == [0]
+    assert [item["index"] for item in job.outstanding()] == [1]
+
+
+def test_format_duration():
+    """Test durations are formatted as hours, minutes and seconds."""
+    assert format_duration(5) == "0:00:05"
+    assert format_duration(3725.9) == "1:02:05"
+
+
+def test_progress_status():
+    """Test progress reports throughput and time remaining."""
+    progress = Progress(4, stream=io.StringIO())
+    progress.start -= 2.0
+    progress.update()
+    progress.update(failed=True)
+
+    status = progress.status()
+
+    assert status.startswith("2/4 done, 1 failed, 1.00/s")
+    assert status.endswith("ETA 0:00:02")
+    assert progress.stream.getvalue() == ""
@@ -0,0 +1,225 @@
+"""Tests for llama.cpp provider."""
+
+import sys
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import ask.providers.llamacpp as llamacpp
+from ask.config import SYSTEM_PROMPT
+from ask.exceptions import APIError, ConfigurationError
+from ask.providers import get_provider
+from ask.providers.llamacpp import LlamaCppProvider
+
+
+@pytest.fixture(autouse=True)
+def clear_model_cache():
+    """Clear loaded models between tests."""
+    llamacpp._MODEL_CACHE.clear()
+    llamacpp._MODEL_LOCKS.clear()
+    yield
+    llamacpp._MODEL_CACHE.clear()
+    llamacpp._MODEL_LOCKS.clear()
+
+
+@pytest.fixture
+def model_file(tmp_path):
+    """Create a placeholder GGUF file."""
+    path = tmp_path / "model.gguf"
+    path.write_bytes(b"GGUF")
+    return path
+
+
+@pytest.fixture
+def mock_llama_cpp():
+    """Install a fake llama_cpp module."""
+    module = MagicMock()
+    with patch.dict(sys.modules, {"llama_cpp": module}):
+        yield module
+
+
+def _completion(text):
+    return {"choices": [{"message": {"content": text}}]}
+
+
+def test_registered(model_file):
+    """Test provider is available from the registry."""
+    provider = get_provider("llamacpp", {"model_path": str(model_file)})
+    assert isinstance(provider, LlamaCppProvider)
+    assert provider.model is None
+
+
+def test_validate_config_loads_mmapped_model(model_file, mock_llama_cpp):
+    """Test model loading options."""
+    provider = LlamaCppProvider({"model_path": str(model_file), "n_threads": 4})
+
+    provider.validate_config()
+
+    mock_llama_cpp.Llama.assert_called_once_with(
+        model_path=str(model_file),
+        n_ctx=2048,
+        use_mmap=True,
+        verbose=False,
+        n_threads=4,
+    )
+    assert provider.model is mock_llama_cpp.Llama.return_value
+
+
+def test_validate_config_reuses_loaded_model(model_file, mock_llama_cpp):
+    """Test a second provider for the same model does not reload it."""
+    LlamaCppProvider({"model_path": str(model_file)}).validate_config()
+    provider = LlamaCppProvider({"model_path": str(model_file)})
+    provider.validate_config()
+
+    mock_llama_cpp.Llama.assert_called_once()
+    assert provider.model is mock_llama_cpp.Llama.return_value
+
+
+def test_validate_config_missing_model_path():
+    """Test model_path is required."""
+    with pytest.raises(ConfigurationError, match="model_path is required"):
+        LlamaCppProvider({}).validate_config()
+
+
+def test_validate_config_model_not_found(tmp_path):
+    """Test missing model file."""
+    provider = LlamaCppProvider({"model_path": str(tmp_path / "missing.gguf")})
+
+    with pytest.raises(ConfigurationError, match="Model file not found"):
+        provider.validate_config()
+
+
+def test_validate_config_not_installed(model_file):
+    """Test helpful error when llama-cpp-python is missing."""
+    provider = LlamaCppProvider({"model_path": str(model_file)})
+
+    with patch.dict(sys.modules, {"llama_cpp": None}):
+        with pytest.raises(ConfigurationError, match="pip install"):
+            provider.validate_config()
+
+
+def test_validate_config_load_failure(model_file, mock_llama_cpp):
+    """Test model load errors."""
+    mock_llama_cpp.Llama.side_effect = ValueError("bad magic")
+    provider = LlamaCppProvider({"model_path": str(model_file)})
+
+    with pytest.raises(ConfigurationError, match="Failed to load model"):
+        provider.validate_config()
+
+
+def test_get_bash_command(model_file, mock_llama_cpp):
+    """Test command generation."""
+    model = mock_llama_cpp.Llama.return_value
+    model.create_chat_completion.return_value = _completion("```bash\nls -la\n```")
+    provider = LlamaCppProvider({"model_path": str(model_file), "stop": ["\n\n"]})
+
+    assert provider.get_bash_command("list files") == "ls -la"
+    model.create_chat_completion.assert_called_once_with(
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": "list files"},
+        ],
+        max_tokens=150,
+        temperature=0.5,
+        stop=["\n\n"],
+        stream=False,
+    )
+
+
+def test_get_bash_command_stream(model_file, mock_llama_cpp):
+    """Test streaming generation stops once the command is complete."""
+    model = mock_llama_cpp.Llama.return_value
+    model.create_chat_completion.return_value = iter(
+        [
+            {"choices": [{"delta": {"role": "assistant"}}]},
+            {"choices": [{"delta": {"content": "pwd"}}]},
+            {"choices": [{"delta": {"content": "\n\nPrints"}}]},
+        ]
+    )
+    provider = LlamaCppProvider(
+        {"model_path": str(model_file), "stream": True, "stop": ["\n\n"]}
+    )
+
+    assert provider.get_bash_command("where am I") == "pwd"
+
+
+def test_generate_one_thread_at_a_time(model_file, mock_llama_cpp):
+    """Test providers sharing a loaded model never generate at the same time."""
+    running = 0
+    overlapped = []
+    barrier = threading.Barrier(4)
+
+    def create_chat_completion(**kwargs):
+        nonlocal running
+        running += 1
+        overlapped.append(running > 1)
+        # Give the other threads a chance to enter while this one is running
+        threading.Event().wait(0.01)
+        running -= 1
+        return _completion("ls")
+
+    model = mock_llama_cpp.Llama.return_value
+    model.create_chat_completion.side_effect = create_chat_completion
+    providers = [LlamaCppProvider({"model_path": str(model_file)}) for _ in range(4)]
+
+    def generate(provider):
+        barrier.wait()
+        provider.get_bash_command("list files")
+
+    threads = [
+        threading.Thread(target=generate, args=(provider,)) for provider in providers
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    mock_llama_cpp.Llama.assert_called_once()
+    assert overlapped == [False] * 4
+
+
+def test_get_bash_command_generation_error(model_file, mock_llama_cpp):
+    """Test generation failures."""
+    model = mock_llama_cpp.Llama.return_value
+    model.create_chat_completion.side_effect = RuntimeError("context overflow")
+    provider = LlamaCppProvider({"model_path": str(model_file)})
+
+    with pytest.raises(APIError, match="context overflow"):
+        provider.get_bash_command("list files")
+
+
+def test_get_bash_command_empty_response(model_file, mock_llama_cpp):
+    """Test empty responses."""
+    model = mock_llama_cpp.Llama.return_value
+    model.create_chat_completion.return_value = _completion(None)
+    provider = LlamaCppProvider({"model_path": str(model_file)})
+
+    with pytest.raises(APIError, match="empty response"):
+        provider.get_bash_command("list files")
+
+
+def test_get_default_config():
+    """Test default configuration values."""
+    default_config = LlamaCppProvider.get_default_config()
+
+    assert default_config["use_mmap"] is True
+    assert default_config["system_prompt"] == SYSTEM_PROMPT
+
+
+def test_generate_records_usage(model_file, mock_llama_cpp):
+    """Test token counts and finish reason are read from the completion."""
+    model = mock_llama_cpp.Llama.return_value
+    model.create_chat_completion.return_value = {
+        "choices": [{"message": {"content": "ls"}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 50, "completion_tokens": 2},
+    }
+    provider = LlamaCppProvider({"model_path": str(model_file)})
+
+    result = provider.generate("list files")
+
+    assert result.usage is not None
+    assert result.usage.input_tokens == 50
+    assert result.usage.output_tokens == 2
+    assert result.finish_reason == "stop"
+    assert result.provider == "llamacpp"
@@ -1,18 +1,72 @@
 """Tests for the CLI interface."""
 
 import argparse
+import io
+import sqlite3
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from ask.exceptions import APIError, AuthenticationError, ConfigurationError
+from ask.cache import read_json
+from ask.exceptions import (
+    APIError,
+    AuthenticationError,
+    ConfigurationError,
+    QuotaExceededError,
+    RateLimitError,
+    ServiceUnavailableError,
+)
+from ask.jobs import Job
 from ask.main import (
+    answer_prompt,
+    build_system_context,
+    cache_answer,
     configure_logging,
+    generate_answer,
+    generate_command,
+    generate_validated,
+    generate_with_tiers,
+    get_warm_provider,
     load_configuration,
+    lookup_cached_answer,
+    lookup_instant_answer,
     main,
+    mark_reloaded,
     parse_arguments,
+    resolve_auto_model,
     resolve_provider,
+    retry_delay,
+    run_batch,
+    run_compare,
+    run_interactive,
+    run_pipe,
 )
+from ask.providers.anthropic import AnthropicProvider
+from ask.providers.base import CommandResult, TokenUsage
+from ask.providers.openai import OpenAIProvider
+from ask.routing import ProviderStats
+from ask.singleflight import Flight, flight_key
+from ask.usage import UsageStore
+
+
+def _cli_args(**kwargs):
+    with patch("sys.argv", ["ask", "prompt"]):
+        args = parse_arguments()
+    vars(args).update(kwargs)
+    return args
+
+
+def _mock_provider(command=None, error=None):
+    provider = MagicMock()
+    provider.config = {}
+    provider.generate.side_effect = lambda prompt: CommandResult(
+        provider.get_bash_command(prompt)
+    )
+    if error is not None:
+        provider.get_bash_command.side_effect = error
+    else:
+        provider.get_bash_command.return_value = command
+    return provider
 
 
 def test_parse_arguments_basic():
@@ -40,6 +94,21 @@ def test_parse_arguments_with_verbose():
         assert args.verbose is True
 
 
+def test_parse_arguments_interactive():
+    """Test --interactive makes the prompt optional."""
+    with patch("sys.argv", ["ask", "-i"]):
+        args = parse_arguments()
+        assert args.prompt is None
+        assert args.interactive is True
+
+
+def test_parse_arguments_requires_prompt():
+    """Test a prompt is required without --interactive."""
+    with patch("sys.argv", ["ask"]):
+        with pytest.raises(SystemExit):
+            parse_arguments()
+
+
 def test_configure_logging_verbose():
     """Test verbose logging configuration."""
     with patch("ask.main.logger") as mock_logger:
@@ -137,10 +206,9 @@ def test_resolve_provider_no_keys():
 
     with patch("ask.config.get_default_model", return_value=None):
         with patch("ask.config.get_default_provider", return_value=None):
-            with patch("ask.main.logger") as mock_logger:
-                with pytest.raises(SystemExit):
+            with patch("ask.main.logger"):
+                with pytest.raises(ConfigurationError, match="no API keys found"):
                     resolve_provider(args, config_data)
-                mock_logger.error.assert_called()
 
 
 def test_resolve_provider_config_error():
@@ -152,24 +220,22 @@ def test_resolve_provider_config_error():
         with patch(
             "ask.providers.get_provider", side_effect=ConfigurationError("Config error")
         ) as mock_get_provider:
-            with patch("ask.main.logger"):
-                with pytest.raises(SystemExit):
-                    resolve_provider(args, config_data)
+            with pytest.raises(ConfigurationError, match="Error: Config error"):
+                resolve_provider(args, config_data)
 
-                mock_get_provider.assert_called_once_with("anthropic", {})
+            mock_get_provider.assert_called_once_with("anthropic", {})
 
 
 def test_main_success():
     """Test successful main function execution."""
-    mock_provider = MagicMock()
-    mock_provider.get_bash_command.return_value = "ls -la"
+    mock_provider = _mock_provider("ls -la")
 
     with patch("ask.main.parse_arguments") as mock_parse:
         with patch("ask.main.configure_logging"):
             with patch("ask.main.load_configuration", return_value={}):
                 with patch("ask.main.resolve_provider", return_value=mock_provider):
                     with patch("builtins.print") as mock_print:
-                        mock_parse.return_value = argparse.Namespace(
+                        mock_parse.return_value = _cli_args(
                             prompt="list files", model=None, verbose=False
                         )
 
@@ -192,7 +258,7 @@ def test_main_authentication_error():
             with patch("ask.main.load_configuration", return_value={}):
                 with patch("ask.main.resolve_provider", return_value=mock_provider):
                     with patch("ask.main.logger") as mock_logger:
-                        mock_parse.return_value = argparse.Namespace(
+                        mock_parse.return_value = _cli_args(
                             prompt="list files", model=None, verbose=False
                         )
 
@@ -204,15 +270,14 @@ def test_main_authentication_error():
 
 def test_main_api_error():
     """Test API error handling."""
-    mock_provider = MagicMock()
-    mock_provider.get_bash_command.side_effect = APIError("API request failed")
+    mock_provider = _mock_provider(error=APIError("API request failed"))
 
     with patch("ask.main.parse_arguments") as mock_parse:
         with patch("ask.main.configure_logging"):
             with patch("ask.main.load_configuration", return_value={}):
                 with patch("ask.main.resolve_provider", return_value=mock_provider):
                     with patch("ask.main.logger") as mock_logger:
-                        mock_parse.return_value = argparse.Namespace(
+                        mock_parse.return_value = _cli_args(
                             prompt="list files", model=None, verbose=False
                         )
 
@@ -220,3 +285,922 @@ def test_main_api_error():
                             main()
 
                         mock_logger.error.assert_called_once_with("API request failed")
+
+
+def test_resolve_auto_model_passthrough():
+    """Test non-auto model specs are returned unchanged."""
+    assert resolve_auto_model("anthropic:sonnet", {}) == "anthropic:sonnet"
+
+
+def test_resolve_auto_model():
+    """Test auto model spec is routed."""
+    with patch("ask.routing.choose_model", return_value="openai") as mock_choose:
+        assert resolve_auto_model("auto", {"ask": {}}) == "openai"
+        mock_choose.assert_called_once()
+
+
+def test_resolve_auto_model_no_candidates():
+    """Test auto model spec without any usable provider."""
+    with patch("ask.routing.choose_model", return_value=None):
+        with pytest.raises(ConfigurationError, match="auto selection"):
+            resolve_auto_model("auto", {})
+
+
+def test_resolve_provider_auto_model():
+    """Test --model auto resolves through routing."""
+    args = argparse.Namespace(model="auto")
+    mock_provider = MagicMock()
+
+    with patch("ask.routing.choose_model", return_value="gemini"):
+        with patch(
+            "ask.config.get_provider_config", return_value=("gemini", {})
+        ) as mock_get_config:
+            with patch("ask.providers.get_provider", return_value=mock_provider):
+                assert resolve_provider(args, {}) == mock_provider
+                mock_get_config.assert_called_once_with({}, "gemini")
+
+
+def test_generate_command_records_stats(isolated_cache_dir):
+    """Test latency is recorded for registered providers."""
+    provider = AnthropicProvider({"model_name": "claude-x"})
+
+    with patch.object(provider, "generate", return_value=CommandResult("ls")):
+        assert generate_command(provider, "list files").command == "ls"
+
+    stats = ProviderStats()
+    assert stats.stats["anthropic:claude-x"]["calls"] == 1
+    assert stats.stats["anthropic:claude-x"]["error_rate"] == 0.0
+
+
+def test_generate_command_records_errors(isolated_cache_dir):
+    """Test failures are recorded and re-raised."""
+    provider = AnthropicProvider({"model_name": "claude-x"})
+
+    with patch.object(provider, "generate", side_effect=APIError("boom")):
+        with pytest.raises(APIError):
+            generate_command(provider, "list files")
+
+    assert ProviderStats().stats["anthropic:claude-x"]["error_rate"] > 0
+
+
+def test_generate_with_tiers_first_tier_valid():
+    """Test the first tier is used when its output is valid."""
+    fast = _mock_provider("ls -la")
+    slow = _mock_provider("ls -la")
+
+    with patch("ask.providers.get_provider", side_effect=[fast, slow]):
+        result = generate_with_tiers(["ollama", "anthropic"], "list files", {})
+
+    assert result.command == "ls -la"
+    slow.get_bash_command.assert_not_called()
+
+
+def test_generate_with_tiers_escalates_on_invalid_output(isolated_cache_dir):
+    """Test escalation when output fails validation."""
+    fast = _mock_provider("Here is the command: ls -la")
+    slow = _mock_provider("ls -la")
+
+    with patch("ask.providers.get_provider", side_effect=[fast, slow]):
+        result = generate_with_tiers(["ollama:qwen", "anthropic"], "list", {})
+
+    assert result.command == "ls -la"
+    stats = ProviderStats().stats
+    assert stats["ollama:llama3.2"]["escalations"] == 1
+
+
+def test_generate_with_tiers_escalates_on_error():
+    """Test escalation when a tier fails."""
+    fast = _mock_provider(error=AuthenticationError("no server"))
+    slow = _mock_provider("ls -la")
+
+    with patch("ask.providers.get_provider", side_effect=[fast, slow]):
+        result = generate_with_tiers(["ollama", "anthropic"], "list", {})
+
+    assert result.command == "ls -la"
+
+
+def test_generate_with_tiers_all_invalid():
+    """Test the last output is returned when no tier validates."""
+    fast = _mock_provider("")
+    slow = _mock_provider("Sure! ls -la")
+
+    with patch("ask.providers.get_provider", side_effect=[fast, slow]):
+        result = generate_with_tiers(["ollama", "anthropic"], "list", {})
+
+    assert result.command == "Sure! ls -la"
+
+
+def test_generate_with_tiers_all_fail():
+    """Test the last error is raised when every tier fails."""
+    fast = _mock_provider(error=AuthenticationError("no server"))
+    slow = _mock_provider(error=APIError("overloaded"))
+
+    with patch("ask.providers.get_provider", side_effect=[fast, slow]):
+        with pytest.raises(APIError, match="overloaded"):
+            generate_with_tiers(["ollama", "anthropic"], "list", {})
+
+
+def test_main_uses_tiers():
+    """Test main escalates through configured tiers."""
+    config_data = {"ask": {"tiers": ["ollama", "anthropic"], "tool_hints": False}}
+
+    with patch("ask.main.parse_arguments") as mock_parse:
+        with patch("ask.main.configure_logging"):
+            with patch("ask.main.load_configuration", return_value=config_data):
+                with patch(
+                    "ask.main.generate_with_tiers",
+                    return_value=CommandResult("ls -la"),
+                ) as mock_tiers:
+                    with patch("builtins.print") as mock_print:
+                        mock_parse.return_value = _cli_args(
+                            prompt="list files", model=None, verbose=False
+                        )
+
+                        main()
+
+                        mock_tiers.assert_called_once_with(
+                            ["ollama", "anthropic"], "list files", config_data, None
+                        )
+                        mock_print.assert_called_once_with("ls -la")
+
+
+def test_generate_validated_first_attempt():
+    """Test valid output is returned without retrying."""
+    provider = _mock_provider("ls -la")
+
+    assert generate_validated(provider, "list files", {}).command == "ls -la"
+    provider.get_bash_command.assert_called_once_with("list files")
+
+
+def test_generate_validated_retries_with_errors():
+    """Test invalid output is retried with the problems fed back."""
+    provider = _mock_provider()
+    provider.get_bash_command.side_effect = ["echo 'oops", "echo 'fixed'"]
+
+    assert generate_validated(provider, "say oops", {}).command == "echo 'fixed'"
+    retry = provider.get_bash_command.call_args_list[1].args[0]
+    assert retry.startswith("say oops")
+    assert "echo 'oops" in retry
+    assert "rejected" in retry
+
+
+def test_generate_validated_bounded_attempts():
+    """Test retries stop at max_attempts."""
+    provider = _mock_provider("Sure! ls")
+    config_data = {"ask": {"max_attempts": 2}}
+
+    result = generate_validated(provider, "list files", config_data)
+
+    assert result.command == "Sure! ls"
+    assert provider.get_bash_command.call_count == 2
+
+
+def test_generate_validated_missing_binary_not_retried():
+    """Test a program missing from $PATH is warned about, not retried."""
+    provider = _mock_provider("ll -h")
+
+    with patch("ask.binaries.missing_commands", return_value=["ll"]):
+        with patch("ask.validation.module_logger") as mock_logger:
+            result = generate_validated(provider, "list files", {})
+
+    assert result.command == "ll -h"
+    provider.get_bash_command.assert_called_once()
+    assert "ll" in mock_logger.warning.call_args.args[0]
+
+
+def test_generate_with_tiers_missing_binary_not_escalated():
+    """Test a program missing from $PATH does not escalate to the next tier."""
+    fast = _mock_provider("ll -h")
+    slow = _mock_provider("ls -lh")
+
+    with patch("ask.providers.get_provider", side_effect=[fast, slow]):
+        with patch("ask.binaries.missing_commands", return_value=["ll"]):
+            result = generate_with_tiers(["ollama", "anthropic"], "list", {})
+
+    assert result.command == "ll -h"
+    slow.get_bash_command.assert_not_called()
+
+
+def test_main_validation_disabled():
+    """Test validation can be turned off."""
+    mock_provider = _mock_provider("Sure! ls")
+
+    with patch("ask.main.parse_arguments") as mock_parse:
+        with patch("ask.main.configure_logging"):
+            with patch(
+                "ask.main.load_configuration",
+                return_value={"ask": {"validate": False}},
+            ):
+                with patch("ask.main.resolve_provider", return_value=mock_provider):
+                    with patch("builtins.print") as mock_print:
+                        mock_parse.return_value = _cli_args(
+                            prompt="list files", model=None, verbose=False
+                        )
+
+                        main()
+
+                        mock_provider.get_bash_command.assert_called_once()
+                        mock_print.assert_called_once_with("Sure! ls")
+
+
+def test_main_instant_answer_skips_provider():
+    """Test stock prompts are answered without resolving a provider."""
+    with patch("ask.main.parse_arguments") as mock_parse:
+        with patch("ask.main.configure_logging"):
+            with patch("ask.main.load_configuration", return_value={}):
+                with patch("ask.main.resolve_provider") as mock_resolve:
+                    with patch("builtins.print") as mock_print:
+                        mock_parse.return_value = _cli_args(
+                            prompt="kill process on port 8080",
+                            model=None,
+                            verbose=False,
+                        )
+
+                        main()
+
+                        mock_resolve.assert_not_called()
+                        mock_print.assert_called_once_with(
+                            "lsof -ti tcp:8080 | xargs kill"
+                        )
+
+
+def test_lookup_instant_answer_skipped():
+    """Test instant answers are skipped with --model or instant = false."""
+    args = argparse.Namespace(prompt="disk usage by directory", model=None)
+
+    assert lookup_instant_answer(args, {}) == "du -sh -- */ | sort -hr"
+    assert lookup_instant_answer(args, {"ask": {"instant": False}}) is None
+    args.model = "anthropic"
+    assert lookup_instant_answer(args, {}) is None
+
+
+def test_main_caches_and_reuses_answers():
+    """Test generated commands are reused for near-duplicate prompts."""
+    mock_provider = _mock_provider("ls -S | head -10")
+
+    with patch("ask.main.parse_arguments") as mock_parse:
+        with patch("ask.main.configure_logging"):
+            with patch("ask.main.load_configuration", return_value={}):
+                with patch("ask.main.resolve_provider", return_value=mock_provider):
+                    with patch("builtins.print") as mock_print:
+                        for prompt in [
+                            "show the ten largest files here",
+                            "display the ten largest files here",
+                        ]:
+                            mock_parse.return_value = _cli_args(
+                                prompt=prompt, model=None, verbose=False
+                            )
+                            main()
+
+    mock_provider.get_bash_command.assert_called_once()
+    assert mock_print.call_count == 2
+    mock_print.assert_called_with("ls -S | head -10")
+
+
+def test_lookup_cached_answer_skipped():
+    """Test the prompt cache is skipped with --model or cache = false."""
+    cache_answer("list files", "ls", {})
+    args = argparse.Namespace(prompt="list files", model=None)
+
+    assert lookup_cached_answer(args, {}) == "ls"
+    assert lookup_cached_answer(args, {"ask": {"cache": False}}) is None
+    args.model = "anthropic"
+    assert lookup_cached_answer(args, {}) is None
+
+
+def test_cache_answer_skips_invalid_commands():
+    """Test commands that fail validation are not cached."""
+    args = argparse.Namespace(prompt="say hello", model=None)
+
+    cache_answer("say hello", "echo 'hello", {})
+
+    assert lookup_cached_answer(args, {}) is None
+
+
+def test_lookup_cached_answer_database_error():
+    """Test cache failures fall through to generation."""
+    args = argparse.Namespace(prompt="list files", model=None)
+
+    with patch("ask.prompt_cache.PromptCache", side_effect=sqlite3.Error("locked")):
+        assert lookup_cached_answer(args, {}) is None
+        cache_answer("list files", "ls", {})
+
+
+def test_build_system_context():
+    """Test static context and tool hints are combined."""
+    config_data = {"ask": {"system_context": "Prefer GNU tools."}}
+
+    with patch("ask.binaries.tool_context", return_value="Not installed: fd"):
+        assert build_system_context("find files", config_data) == (
+            "Prefer GNU tools.\n\nNot installed: fd"
+        )
+
+    config_data["ask"]["tool_hints"] = False
+    assert build_system_context("find files", config_data) == "Prefer GNU tools."
+    assert build_system_context("find files", {"ask": {"tool_hints": False}}) is None
+
+
+def test_generate_answer_adds_system_context():
+    """Test the gathered context reaches the provider config."""
+    mock_provider = _mock_provider("ls -la")
+    args = argparse.Namespace(prompt="list files", model=None)
+
+    with patch("ask.main.build_system_context", return_value="OS: Linux"):
+        with patch(
+            "ask.main.resolve_provider", return_value=mock_provider
+        ) as mock_resolve:
+            result = generate_answer(args, {"ask": {"validate": False}})
+
+    assert result.command == "ls -la"
+
+    config_data = mock_resolve.call_args.args[1]
+    assert config_data["ask"] == {"validate": False, "system_context": "OS: Linux"}
+
+
+def test_build_system_context_environment():
+    """Test environment details are added when enabled."""
+    config_data = {
+        "ask": {
+            "tool_hints": False,
+            "environment_context": True,
+            "context_sources": ["os"],
+            "context_timeout": 0.1,
+        }
+    }
+
+    with patch("ask.environment.collect", return_value="OS: Linux") as mock_collect:
+        assert build_system_context("list files", config_data) == "OS: Linux"
+
+    mock_collect.assert_called_once_with(sources=["os"], timeout=0.1)
+
+
+def test_generate_command_records_usage(isolated_cache_dir):
+    """Test provider requests are recorded with their token usage."""
+    provider = AnthropicProvider({"model_name": "claude-x"})
+
+    result = CommandResult("ls", usage=TokenUsage(input_tokens=120, output_tokens=8))
+
+    with patch.object(provider, "generate", return_value=result):
+        generate_command(provider, "list files")
+
+    (row,) = UsageStore().summarize()["models"]
+    assert (row["provider"], row["model"]) == ("anthropic", "claude-x")
+    assert row["input_per_request"] == 120
+    assert row["output_per_request"] == 8
+
+
+def test_generate_command_usage_disabled(isolated_cache_dir):
+    """Test nothing is recorded with usage = false."""
+    provider = AnthropicProvider({"model_name": "claude-x", "usage": False})
+
+    with patch.object(provider, "generate", return_value=CommandResult("ls")):
+        generate_command(provider, "list files")
+
+    assert UsageStore().summarize()["sources"] == {}
+
+
+def test_main_records_local_answers():
+    """Test answers from the template index are recorded."""
+    with patch("ask.main.parse_arguments") as mock_parse:
+        mock_parse.return_value = _cli_args(
+            prompt="list files modified in the last 3 days", model=None, verbose=False
+        )
+        with patch("ask.main.configure_logging"):
+            with patch("ask.main.load_configuration", return_value={}):
+                with patch("builtins.print"):
+                    main()
+
+    assert UsageStore().summarize()["sources"] == {"instant": 1}
+
+
+def test_main_stats_command():
+    """Test ask stats prints the usage report."""
+    store = UsageStore()
+    store.record("cache", 0.01)
+    store.close()
+
+    with patch("sys.argv", ["ask", "stats", "--since", "24h"]):
+        with patch("ask.main.configure_logging"):
+            with patch("ask.main.load_configuration", return_value={}):
+                with patch("builtins.print") as mock_print:
+                    main()
+
+    mock_print.assert_called_once_with(
+        "Last 24h: 1 requests, 1 answered locally (instant 0, cache 1)"
+    )
+
+
+def test_main_stats_command_invalid_window():
+    """Test ask stats exits on an invalid time window."""
+    with patch("sys.argv", ["ask", "stats", "--since", "soon"]):
+        with patch("ask.main.configure_logging"):
+            with patch("ask.main.load_configuration", return_value={}):
+                with pytest.raises(SystemExit) as exc_info:
+                    main()
+
+    assert exc_info.value.code == 1
+
+
+def test_generate_validated_retries_truncated_output():
+    """Test output cut off at max_tokens is retried."""
+    provider = MagicMock()
+    provider.generate.side_effect = [
+        CommandResult("find . -name '*.py'", finish_reason="length"),
+        CommandResult("find . -name '*.py' | wc -l", finish_reason="stop"),
+    ]
+
+    result = generate_validated(provider, "count python files", {})
+
+    assert result.command == "find . -name '*.py' | wc -l"
+    retry = provider.generate.call_args_list[1].args[0]
+    assert "cut off at the max_tokens limit" in retry
+
+
+def test_main_does_not_cache_truncated_output():
+    """Test truncated output is printed but not cached."""
+    result = CommandResult("ls -S | head", finish_reason="max_tokens")
+
+    with patch("ask.main.parse_arguments") as mock_parse:
+        mock_parse.return_value = _cli_args(
+            prompt="show the ten largest files here", model=None, verbose=False
+        )
+        with patch("ask.main.configure_logging"):
+            with patch("ask.main.load_configuration", return_value={}):
+                with patch("ask.main.generate_answer", return_value=result):
+                    with patch("ask.main.cache_answer") as mock_cache:
+                        with patch("builtins.print") as mock_print:
+                            main()
+
+    mock_cache.assert_not_called()
+    mock_print.assert_called_once_with("ls -S | head")
+
+
+def test_generate_command_retries_transient_errors():
+    """Test transient errors are retried after the requested delay."""
+    provider = _mock_provider()
+    provider.get_bash_command.side_effect = [
+        RateLimitError("slow down", retry_after=0.25),
+        "ls",
+    ]
+
+    with patch("ask.main.time.sleep") as mock_sleep:
+        assert generate_command(provider, "list files").command == "ls"
+
+    mock_sleep.assert_called_once_with(0.25)
+
+
+def test_generate_command_does_not_retry_permanent_errors():
+    """Test permanent errors and long waits are not retried."""
+    for error in [
+        AuthenticationError("bad key"),
+        QuotaExceededError("no credit"),
+        RateLimitError("slow down", retry_after=30),
+    ]:
+        provider = _mock_provider(error=error)
+
+        with patch("ask.main.time.sleep") as mock_sleep:
+            with pytest.raises(type(error)):
+                generate_command(provider, "list files")
+
+        mock_sleep.assert_not_called()
+        provider.get_bash_command.assert_called_once()
+
+
+def test_retry_delay():
+    """Test retries back off and stop after transient_retries."""
+    error = ServiceUnavailableError("overloaded")
+
+    assert retry_delay(error, 0, {}) == 0.5
+    assert retry_delay(error, 1, {}) is None
+    assert retry_delay(error, 1, {"transient_retries": 3}) == 1.0
+    assert retry_delay(error, 0, {"transient_retries": 0}) is None
+    assert retry_delay(error, 2, {"transient_retries": 3, "max_retry_delay": 1}) is None
+
+
+def test_run_interactive_keeps_provider_warm():
+    """Test the session resolves one provider and sends follow-ups with history."""
+    mock_provider = _mock_provider("ls -la")
+    args = argparse.Namespace(prompt=None, model=None, verbose=False)
+    lines = iter(["show the ten largest files here", "now only in src/"])
+
+    def read(prompt):
+        line = next(lines, None)
+        if line is None:
+            raise EOFError
+        return line
+
+    with patch("ask.main.resolve_provider", return_value=mock_provider) as resolve:
+        with patch("ask.main.cache_answer") as mock_cache:
+            with patch("builtins.input", side_effect=read):
+                with patch("builtins.print"):
+                    run_interactive(args, {"ask": {"tool_hints": False}})
+
+    resolve.assert_called_once()
+    mock_provider.validate_config.assert_called_once()
+    follow_up = mock_provider.get_bash_command.call_args_list[1].args[0]
+    assert "show the ten largest files here" in follow_up
+    assert follow_up.endswith("now only in src/")
+    mock_cache.assert_called_once_with(
+        "show the ten largest files here", "ls -la", {"ask": {"tool_hints": False}}
+    )
+
+
+def test_get_warm_provider_after_reload():
+    """Test a reload rebuilds only providers whose settings changed."""
+    settings = {"model_name": "claude-3-haiku-20240307"}
+    providers = {}
+    with patch.object(AnthropicProvider, "validate_config") as validate:
+
+        def warm(config_data):
+            return get_warm_provider(
+                "",
+                lambda: AnthropicProvider(dict(settings)),
+                config_data,
+                providers,
+            )
+
+        kept = warm({"ask": {"system_context": "Installed tools: rg"}})
+        mark_reloaded(providers)
+        assert warm({}) is kept
+        assert kept.config_reloaded is False
+
+        settings["model_name"] = "claude-3-5-haiku-latest"
+        mark_reloaded(providers)
+        rebuilt = warm({})
+
+    assert rebuilt is not kept
+    assert rebuilt.config["model_name"] == "claude-3-5-haiku-latest"
+    assert providers[""] is rebuilt
+    assert validate.call_count == 2
+
+
+@pytest.mark.parametrize(
+    ("model", "error"),
+    [
+        ("unknown", None),
+        ("openai", AuthenticationError("Error: OPENAI_API_KEY is not set")),
+        ("openai", ConfigurationError("Error: Unknown model")),
+    ],
+)
+def test_get_warm_provider_keeps_provider_after_bad_reload(
+    model, error, mock_anthropic_key
+):
+    """Test an unknown provider, missing key or bad settings after a reload."""
+    args = _cli_args(model=None)
+    providers = {}
+
+    def warm(config_data):
+        return get_warm_provider(
+            "", lambda: resolve_provider(args, config_data), {}, providers
+        )
+
+    with patch.object(AnthropicProvider, "validate_config"):
+        kept = warm({"ask": {"default_model": "anthropic"}})
+    mark_reloaded(providers)
+    with patch.object(OpenAIProvider, "validate_config", side_effect=error):
+        with patch("ask.main.logger") as mock_logger:
+            assert warm({"ask": {"default_model": model}}) is kept
+
+    mock_logger.error.assert_called_once()
+    assert providers[""] is kept
+    assert kept.config_reloaded is False
+
+
+def test_main_without_provider_exits(mock_env_vars):
+    """Test the CLI exits with an error when no provider can be resolved."""
+    with patch("ask.main.parse_arguments", return_value=_cli_args(model=None)):
+        with patch("ask.main.configure_logging"):
+            with patch("ask.main.load_configuration", return_value={}):
+                with patch("ask.config.check_ollama_available", return_value=False):
+                    with patch("ask.main.logger") as mock_logger:
+                        with pytest.raises(SystemExit) as exc_info:
+                            main()
+
+    assert exc_info.value.code == 1
+    assert "no API keys found" in mock_logger.error.call_args.args[0]
+
+
+def test_run_interactive_uses_reloaded_config():
+    """Test prompts after an edit to the config file use the new config."""
+    args = argparse.Namespace(prompt="list files", model=None, verbose=False)
+    reloaded = {"ask": {"default_model": "openai"}}
+    watcher = MagicMock(config=reloaded)
+    watcher.poll.return_value = True
+
+    with patch("ask.main.watch_config", return_value=watcher):
+        with patch("ask.main.answer_prompt", return_value="ls") as mock_answer:
+            with patch("ask.main.repl.run"):
+                with patch("builtins.print"):
+                    run_interactive(args, {})
+
+    assert mock_answer.call_args.args[1] is reloaded
+
+
+def test_run_interactive_continues_after_errors():
+    """Test a failed prompt is reported without ending the session."""
+    mock_provider = _mock_provider(error=APIError("Error: API request failed"))
+    args = argparse.Namespace(prompt="list files", model=None, verbose=False)
+
+    with patch("ask.main.resolve_provider", return_value=mock_provider):
+        with patch("ask.main.repl.run") as mock_run:
+            with patch("ask.main.logger") as mock_logger:
+                run_interactive(args, {"ask": {"tool_hints": False}})
+
+    mock_logger.error.assert_called_once_with("Error: API request failed")
+    mock_run.assert_called_once()
+    assert mock_run.call_args.args[1].turns == []
+
+
+def test_main_shell_init_command():
+    """Test shell-init prints the integration script."""
+    with patch("sys.argv", ["ask", "shell-init", "bash"]):
+        with patch("builtins.print") as mock_print:
+            main()
+
+    assert "_ask_widget" in mock_print.call_args.args[0]
+
+
+def test_main_shell_init_unsupported():
+    """Test shell-init fails for unsupported shells."""
+    with patch("sys.argv", ["ask", "shell-init", "fish"]):
+        with patch("ask.main.logger") as mock_logger:
+            with pytest.raises(SystemExit):
+                main()
+
+    mock_logger.error.assert_called_once()
+
+
+def test_main_uses_prefetched_answer():
+    """Test an answer prefetched by the shell is used without a provider."""
+    with patch("ask.main.parse_arguments") as mock_parse:
+        with patch("ask.main.configure_logging"):
+            with patch("ask.main.load_configuration", return_value={}):
+                with patch("ask.main.widget.fetch", return_value="ls -la"):
+                    with patch("ask.main.answer_prompt") as mock_answer:
+                        with patch("builtins.print") as mock_print:
+                            mock_parse.return_value = _cli_args(
+                                prompt="list files", model=None, verbose=False
+                            )
+
+                            main()
+
+    mock_answer.assert_not_called()
+    mock_print.assert_called_once_with("ls -la")
+
+
+def test_main_prefetch_serves_answer():
+    """Test --prefetch answers in the background instead of printing."""
+    args = _cli_args(prompt="list files", model=None, verbose=False, prefetch=True)
+
+    with patch("ask.main.parse_arguments", return_value=args):
+        with patch("ask.main.configure_logging"):
+            with patch("ask.main.load_configuration", return_value={}):
+                with patch("ask.main.signal.signal"):
+                    with patch("ask.main.widget.serve") as mock_serve:
+                        with patch(
+                            "ask.main.answer_prompt", return_value="ls"
+                        ) as mock_answer:
+                            with patch("builtins.print") as mock_print:
+                                main()
+
+                                path, produce = mock_serve.call_args.args
+                                assert produce() == "ls"
+
+    mock_answer.assert_called_once_with(args, {})
+    mock_print.assert_not_called()
+
+
+def test_main_prefetch_disabled():
+    """Test prefetch = false turns prefetching off."""
+    args = _cli_args(prompt="list files", model=None, verbose=False, prefetch=True)
+    config_data = {"ask": {"prefetch": False}}
+
+    with patch("ask.main.parse_arguments", return_value=args):
+        with patch("ask.main.configure_logging"):
+            with patch("ask.main.load_configuration", return_value=config_data):
+                with patch("ask.main.widget.serve") as mock_serve:
+                    main()
+
+    mock_serve.assert_not_called()
+
+
+def test_answer_prompt_shares_identical_request_in_flight():
+    """Test a prompt already in flight elsewhere reuses that answer."""
+    args = argparse.Namespace(prompt="show disk usage of src", model=None)
+    config_data = {"ask": {"tool_hints": False, "cache": False}}
+
+    with patch("ask.main.singleflight.Flight") as mock_flight:
+        mock_flight.return_value.__enter__.return_value = mock_flight.return_value
+        mock_flight.return_value.result = "du -sh src"
+        with patch("ask.main.generate_answer") as mock_generate:
+            assert answer_prompt(args, config_data) == "du -sh src"
+
+    mock_generate.assert_not_called()
+    assert mock_flight.call_args.args == (flight_key("show disk usage of src"),)
+    assert UsageStore().summarize()["sources"] == {"shared": 1}
+
+
+def test_answer_prompt_publishes_answer():
+    """Test the leading request leaves its answer for identical requests."""
+    args = argparse.Namespace(prompt="show disk usage of src", model=None)
+    config_data = {"ask": {"tool_hints": False, "cache": False}}
+
+    with patch("ask.main.generate_answer", return_value=CommandResult("du -sh src")):
+        assert answer_prompt(args, config_data) == "du -sh src"
+
+    flight = Flight(flight_key("show disk usage of src"))
+    assert read_json(flight.result_path)["command"] == "du -sh src"
+    with flight:
+        assert flight.leader is True
+
+
+def test_answer_prompt_singleflight_disabled():
+    """Test singleflight = false sends every request."""
+    args = argparse.Namespace(prompt="show disk usage of src", model=None)
+    config_data = {"ask": {"singleflight": False, "cache": False}}
+
+    with patch("ask.main.singleflight.Flight") as mock_flight:
+        with patch(
+            "ask.main.generate_answer", return_value=CommandResult("du -sh src")
+        ):
+            assert answer_prompt(args, config_data) == "du -sh src"
+
+    mock_flight.assert_not_called()
+
+
+def _batch_args(**kwargs):
+    values = {
+        "prompt": None,
+        "model": None,
+        "verbose": False,
+        "batch": None,
+        "resume": None,
+        "retry_failed": False,
+    }
+    values.update(kwargs)
+    return argparse.Namespace(**values)
+
+
+def test_run_batch_resumes_outstanding(tmp_path, capsys):
+    """Test a batch records answers, and resuming skips them."""
+    prompts = tmp_path / "prompts.txt"
+    prompts.write_text("list files\nshow disk usage\n")
+    commands = iter(["ls", KeyboardInterrupt(), "du -sh"])
+
+    def answer(args, config_data, providers):
+        command = next(commands)
+        if isinstance(command, BaseException):
+            raise command
+        return command
+
+    with patch("ask.main.answer_prompt", side_effect=answer) as mock_answer:
+        with pytest.raises(SystemExit) as exc_info:
+            run_batch(_batch_args(batch=str(prompts)), {})
+        assert exc_info.value.code == 130
+        job_id = capsys.readouterr().err.split()[1].rstrip(":")
+
+        run_batch(_batch_args(resume=job_id), {})
+
+    assert [call.args[0].prompt for call in mock_answer.call_args_list] == [
+        "list files",
+        "show disk usage",
+        "show disk usage",
+    ]
+    assert list(Job.open(job_id).completed()) == [0, 1]
+    assert '"command": "du -sh"' in capsys.readouterr().out
+
+
+def test_run_batch_retry_failed(tmp_path, capsys):
+    """Test failed prompts are skipped on resume unless retried."""
+    prompts = tmp_path / "prompts.txt"
+    prompts.write_text("list files\n")
+
+    with patch(
+        "ask.main.answer_prompt", side_effect=APIError("Error: API request failed")
+    ):
+        with pytest.raises(SystemExit):
+            run_batch(_batch_args(batch=str(prompts)), {})
+    err = capsys.readouterr().err
+    assert "--retry-failed" in err
+    job_id = err.split()[1].rstrip(":")
+
+    with patch("ask.main.answer_prompt", return_value="ls") as mock_answer:
+        with pytest.raises(SystemExit):
+            run_batch(_batch_args(resume=job_id), {})
+        mock_answer.assert_not_called()
+        run_batch(_batch_args(resume=job_id, retry_failed=True), {})
+        mock_answer.assert_called_once()
+
+    assert Job.open(job_id).failed() == {}
+
+
+def test_run_batch_stops_on_authentication_error(tmp_path):
+    """Test a batch stops when credentials are rejected."""
+    prompts = tmp_path / "prompts.txt"
+    prompts.write_text("list files\nshow disk usage\n")
+
+    with patch(
+        "ask.main.answer_prompt", side_effect=AuthenticationError("Invalid API key")
+    ) as mock_answer:
+        with pytest.raises(SystemExit):
+            run_batch(_batch_args(batch=str(prompts)), {})
+
+    mock_answer.assert_called_once()
+
+
+def test_run_batch_unknown_job():
+    """Test resuming a job that does not exist is reported."""
+    with patch("ask.main.logger") as mock_logger:
+        with pytest.raises(SystemExit):
+            run_batch(_batch_args(resume="nope"), {})
+
+    assert "No batch job 'nope'" in mock_logger.error.call_args.args[0]
+
+
+def test_parse_arguments_retry_failed_requires_resume():
+    """Test --retry-failed is only accepted with --resume."""
+    with patch("sys.argv", ["ask", "--batch", "prompts.txt", "--retry-failed"]):
+        with pytest.raises(SystemExit):
+            parse_arguments()
+
+
+def test_run_pipe_writes_commands(capsys):
+    """Test each stdin line is answered on its own output line."""
+    args = argparse.Namespace(
+        prompt=None, model=None, verbose=False, concurrency=2, ordered=True
+    )
+
+    def answer(line_args, config_data, providers):
+        if line_args.prompt == "bad":
+            raise APIError("Error: API request failed")
+        return f"echo {line_args.prompt}"
+
+    with patch("sys.stdin", io.StringIO("one\nbad\ntwo\n")):
+        with patch("ask.main.answer_prompt", side_effect=answer):
+            with patch("ask.main.logger") as mock_logger:
+                with pytest.raises(SystemExit) as exc_info:
+                    run_pipe(args, {})
+
+    assert exc_info.value.code == 1
+    assert capsys.readouterr().out == "echo one\n\necho two\n"
+    mock_logger.error.assert_called_once_with("bad: Error: API request failed")
+
+
+def test_parse_arguments_pipe():
+    """Test --pipe takes no prompt and pipe options require --pipe."""
+    with patch("sys.argv", ["ask", "--pipe", "--ordered", "--concurrency", "8"]):
+        args = parse_arguments()
+        assert args.pipe is True
+        assert args.concurrency == 8
+    with patch("sys.argv", ["ask", "--pipe", "list files"]):
+        with pytest.raises(SystemExit):
+            parse_arguments()
+    with patch("sys.argv", ["ask", "--ordered", "list files"]):
+        with pytest.raises(SystemExit):
+            parse_arguments()
+
+
+def test_run_compare_prints_report(capsys):
+    """Test --compare answers with each model and prints the comparison."""
+    args = argparse.Namespace(
+        prompt="list files", model=None, compare="anthropic, openai", repeat=2
+    )
+    created = {}
+
+    def get_provider(name, provider_config):
+        created[name] = _mock_provider(f"ls {name}")
+        return created[name]
+
+    with patch("ask.providers.get_provider", side_effect=get_provider):
+        run_compare(args, {"ask": {"tool_hints": False}})
+
+    assert created["anthropic"].get_bash_command.call_count == 2
+    created["openai"].validate_config.assert_called_once()
+    out = capsys.readouterr().out
+    assert "A: ls anthropic" in out
+    assert "B: ls openai" in out
+
+
+def test_run_compare_rejects_repeated_model():
+    """Test a model listed twice is rejected instead of merged."""
+    args = argparse.Namespace(
+        prompt="list files", model=None, compare="openai,anthropic,openai", repeat=1
+    )
+
+    with patch("ask.providers.get_provider") as mock_get_provider:
+        with pytest.raises(SystemExit):
+            run_compare(args, {"ask": {"tool_hints": False}})
+
+    mock_get_provider.assert_not_called()
+
+
+def test_parse_arguments_compare():
+    """Test --repeat needs --compare and a positive count."""
+    with patch("sys.argv", ["ask", "list files", "--compare", "a,b", "--repeat", "3"]):
+        args = parse_arguments()
+        assert args.compare == "a,b"
+        assert args.repeat == 3
+    for argv in (["--repeat", "3"], ["--compare", "a", "--repeat", "0"]):
+        with patch("sys.argv", ["ask", "list files", *argv]):
+            with pytest.raises(SystemExit):
+                parse_arguments()
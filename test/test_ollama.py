@@ -2,10 +2,17 @@
 
 from unittest.mock import ANY, MagicMock, patch
 
+import ollama
 import pytest
 
 from ask.config import SYSTEM_PROMPT
-from ask.exceptions import APIError, AuthenticationError
+from ask.exceptions import (
+    APIError,
+    AuthenticationError,
+    ConfigurationError,
+    ModelNotFoundError,
+    ServiceUnavailableError,
+)
 from ask.providers.ollama import OllamaProvider
 
 
@@ -167,8 +174,29 @@ def test_handle_api_error_model_not_found():
     """Test model not found error mapping."""
     provider = OllamaProvider({})
 
-    with pytest.raises(APIError, match="Model issue"):
-        provider._handle_api_error(Exception("model not found"))
+    with pytest.raises(ModelNotFoundError, match="Model not found"):
+        provider._handle_api_error(ollama.ResponseError("model 'x' not found", 404))
+
+
+def test_handle_api_error_uses_status():
+    """Test errors are classified by status, not by words in the message."""
+    provider = OllamaProvider({})
+
+    with pytest.raises(ServiceUnavailableError) as exc_info:
+        provider._handle_api_error(ollama.ResponseError("model is loading", 503))
+
+    assert exc_info.value.transient
+    assert exc_info.value.status == 503
+
+
+def test_handle_api_error_connection_is_transient():
+    """Test connection failures are reported as transient."""
+    provider = OllamaProvider({})
+
+    with pytest.raises(AuthenticationError) as exc_info:
+        provider._handle_api_error(ConnectionError("refused"))
+
+    assert exc_info.value.transient
 
 
 def test_handle_api_error_generic():
@@ -292,3 +320,294 @@ def test_get_bash_command_exception_during_generation():
                 provider.get_bash_command("test prompt")
 
             mock_handle_error.assert_called_once()
+
+
+def _mock_host_client(models, response_text="ls -la"):
+    client = MagicMock()
+    client.list.return_value = {
+        "models": [MagicMock(model=model_name) for model_name in models]
+    }
+    client.generate.return_value = MagicMock(response=response_text)
+    return client
+
+
+def test_validate_config_hosts():
+    """Test validation with a list of hosts."""
+    provider = OllamaProvider({"hosts": ["gpu1", "gpu2:8080"]})
+
+    with patch("ollama.Client") as mock_client_class:
+        gpu1 = _mock_host_client(["llama3.2:latest"])
+        gpu2 = _mock_host_client(["llama3.2:latest"])
+        mock_client_class.side_effect = [gpu1, gpu2]
+
+        provider.validate_config()
+
+        assert provider.pool is not None
+        assert [host.url for host in provider.pool.hosts] == [
+            "http://gpu1:11434",
+            "http://gpu2:8080",
+        ]
+        assert provider.client is gpu1
+
+
+def test_validate_config_hosts_shares_pool():
+    """Test providers for the same hosts, as in pipe workers, share a pool."""
+    first = OllamaProvider({"hosts": ["gpu1"]})
+    second = OllamaProvider({"hosts": ["gpu1"]})
+
+    with patch("ollama.Client") as mock_client_class:
+        mock_client_class.return_value = _mock_host_client(["llama3.2:latest"])
+
+        first.validate_config()
+        second.validate_config()
+
+    assert second.pool is first.pool
+    mock_client_class.return_value.list.assert_called_once()
+
+
+def test_validate_config_hosts_none_reachable():
+    """Test validation when no host is reachable."""
+    provider = OllamaProvider({"hosts": ["gpu1", "gpu2"]})
+
+    with patch("ollama.Client") as mock_client_class:
+        mock_client_class.return_value.list.side_effect = ConnectionError("refused")
+
+        with pytest.raises(AuthenticationError, match="No Ollama server running"):
+            provider.validate_config()
+
+
+def test_get_bash_command_hosts_routes_to_model_host():
+    """Test requests go to a host that serves the model."""
+    provider = OllamaProvider({"model_name": "codellama", "hosts": ["gpu1", "gpu2"]})
+
+    with patch("ollama.Client") as mock_client_class:
+        gpu1 = _mock_host_client(["llama3.2:latest"])
+        gpu2 = _mock_host_client(["codellama:latest"], "find . -name '*.py'")
+        mock_client_class.side_effect = [gpu1, gpu2]
+
+        result = provider.get_bash_command("find python files")
+
+        assert result == "find . -name '*.py'"
+        gpu1.generate.assert_not_called()
+        gpu2.generate.assert_called_once()
+
+
+def test_get_bash_command_hosts_failover():
+    """Test failover to the next host on connection errors."""
+    provider = OllamaProvider({"model_name": "llama3.2", "hosts": ["gpu1", "gpu2"]})
+
+    with patch("ollama.Client") as mock_client_class:
+        gpu1 = _mock_host_client(["llama3.2:latest"])
+        gpu1.generate.side_effect = ConnectionError("Failed to connect")
+        gpu2 = _mock_host_client(["llama3.2:latest"], "ls -la")
+        mock_client_class.side_effect = [gpu1, gpu2]
+
+        provider.validate_config()
+        provider.pool.hosts[1].latency = 10.0
+
+        result = provider.get_bash_command("list files")
+
+        assert result == "ls -la"
+        assert not provider.pool.hosts[0].healthy
+        gpu2.generate.assert_called_once()
+
+
+def test_get_bash_command_hosts_model_missing():
+    """Test model missing on every host."""
+    provider = OllamaProvider({"model_name": "codellama", "hosts": ["gpu1"]})
+
+    with patch("ollama.Client") as mock_client_class:
+        mock_client_class.return_value = _mock_host_client(["llama3.2:latest"])
+
+        with pytest.raises(APIError, match="Model 'codellama' not found"):
+            provider.get_bash_command("test prompt")
+
+
+def test_get_bash_command_hosts_all_fail():
+    """Test error when every host fails mid-request."""
+    provider = OllamaProvider({"model_name": "llama3.2", "hosts": ["gpu1", "gpu2"]})
+
+    with patch("ollama.Client") as mock_client_class:
+        client = _mock_host_client(["llama3.2:latest"])
+        client.generate.side_effect = ConnectionError("Failed to connect")
+        mock_client_class.return_value = client
+
+        with pytest.raises(AuthenticationError, match="any Ollama server"):
+            provider.get_bash_command("test prompt")
+
+
+def test_build_options_defaults():
+    """Test default generation options."""
+    provider = OllamaProvider({"temperature": 0.1, "max_tokens": 64})
+
+    assert provider._build_options() == {"temperature": 0.1, "num_predict": 64}
+
+
+def test_build_options_pass_through():
+    """Test Ollama option fields in the config section and options table."""
+    provider = OllamaProvider(
+        {
+            "num_ctx": 2048,
+            "num_thread": 8,
+            "stop": ["\n\n"],
+            "host": "localhost",
+            "options": {"num_batch": 256, "num_ctx": 1024},
+        }
+    )
+
+    options = provider._build_options()
+
+    assert options["num_thread"] == 8
+    assert options["num_batch"] == 256
+    assert options["num_ctx"] == 1024  # options table wins
+    assert options["stop"] == ["\n\n"]
+    assert "host" not in options
+
+
+def test_get_bash_command_raw_and_keep_alive(mock_ollama_server):
+    """Test raw and keep_alive are forwarded to generate."""
+    provider = OllamaProvider({"model_name": "llama3.2", "raw": True, "keep_alive": -1})
+
+    with patch("ollama.Client") as mock_client_class:
+        mock_client = _mock_host_client(["llama3.2:latest"])
+        mock_client_class.return_value = mock_client
+
+        provider.get_bash_command("list files")
+
+        kwargs = mock_client.generate.call_args.kwargs
+        assert kwargs["raw"] is True
+        assert kwargs["keep_alive"] == -1
+
+
+def test_get_bash_command_strips_code_fence():
+    """Test fenced responses, including ones cut off by a stop sequence."""
+    provider = OllamaProvider({"model_name": "llama3.2"})
+
+    with patch("ollama.Client") as mock_client_class:
+        mock_client = _mock_host_client(["llama3.2:latest"], "```bash\nls -la")
+        mock_client_class.return_value = mock_client
+
+        assert provider.get_bash_command("list files") == "ls -la"
+
+
+def test_get_bash_command_chat_endpoint():
+    """Test the /api/chat endpoint."""
+    provider = OllamaProvider({"model_name": "llama3.2", "endpoint": "chat"})
+
+    with patch("ollama.Client") as mock_client_class:
+        mock_client = _mock_host_client(["llama3.2:latest"])
+        mock_client.chat.return_value = MagicMock(message=MagicMock(content="pwd"))
+        mock_client_class.return_value = mock_client
+
+        result = provider.get_bash_command("where am I")
+
+        assert result == "pwd"
+        mock_client.generate.assert_not_called()
+        messages = mock_client.chat.call_args.kwargs["messages"]
+        assert messages[0] == {"role": "system", "content": SYSTEM_PROMPT}
+        assert messages[1] == {"role": "user", "content": "where am I"}
+
+
+def test_get_bash_command_auto_endpoint():
+    """Test auto endpoint selection records timings."""
+    provider = OllamaProvider({"model_name": "llama3.2", "endpoint": "auto"})
+
+    with patch("ollama.Client") as mock_client_class:
+        mock_client = _mock_host_client(["llama3.2:latest"])
+        mock_client_class.return_value = mock_client
+
+        provider.get_bash_command("list files")
+
+        mock_client.generate.assert_called_once()
+        timings = provider.endpoint_selector.timings
+        assert timings["http://localhost:11434|llama3.2"]["generate"][1] == 1
+
+
+def test_validate_config_invalid_endpoint():
+    """Test unknown endpoint configuration."""
+    provider = OllamaProvider({"endpoint": "completions"})
+
+    with pytest.raises(ConfigurationError, match="Unknown Ollama endpoint"):
+        provider.validate_config()
+
+
+def test_get_bash_command_stream():
+    """Test streaming stops at the configured stop sequence."""
+    provider = OllamaProvider(
+        {"model_name": "llama3.2", "stream": True, "stop": ["\n"]}
+    )
+
+    with patch("ollama.Client") as mock_client_class:
+        mock_client = _mock_host_client(["llama3.2:latest"])
+        mock_client.generate.return_value = iter(
+            [MagicMock(response="pwd"), MagicMock(response="\nPrints the dir")]
+        )
+        mock_client_class.return_value = mock_client
+
+        assert provider.get_bash_command("where am I") == "pwd"
+        kwargs = mock_client.generate.call_args.kwargs
+        assert kwargs["stream"] is True
+        assert kwargs["options"]["stop"] == ["\n"]
+
+
+def test_get_bash_command_with_examples():
+    """Test retrieved examples are added to the prompt."""
+    provider = OllamaProvider({"examples": 2, "embedding_model": "all-minilm"})
+    provider.client = _mock_host_client(["llama3.2:latest"])
+
+    with patch("ask.providers.ollama.ExampleIndex") as mock_index_class:
+        mock_index = mock_index_class.return_value
+        mock_index.search.return_value = [("list files", "ls", 0.9)]
+        provider.get_bash_command("list all files")
+
+    mock_index_class.assert_called_once_with(provider.client, model="all-minilm")
+    mock_index.update.assert_called_once()
+    mock_index.search.assert_called_once_with("list all files", 2, 0.5)
+    prompt = provider.client.generate.call_args.kwargs["prompt"]
+    assert "Request: list files\nCommand: ls" in prompt
+    assert prompt.endswith("Request: list all files\nCommand:")
+
+
+def test_get_bash_command_examples_unavailable():
+    """Test generation continues without examples when retrieval fails."""
+    provider = OllamaProvider({"examples": 2})
+    provider.client = _mock_host_client(["llama3.2:latest"])
+
+    with patch("ask.providers.ollama.ExampleIndex") as mock_index_class:
+        mock_index_class.return_value.update.side_effect = ConnectionError
+        provider.get_bash_command("list all files")
+
+    assert provider.client.generate.call_args.kwargs["prompt"] == "list all files"
+
+
+def test_validate_config_examples_requires_numpy():
+    """Test examples fail early when numpy is missing."""
+    provider = OllamaProvider({"examples": 2})
+
+    with patch(
+        "ask.providers.ollama.import_numpy",
+        side_effect=ConfigurationError("numpy is required"),
+    ):
+        with pytest.raises(ConfigurationError, match="numpy is required"):
+            provider.validate_config()
+
+
+def test_generate_records_usage(mock_ollama_server):
+    """Test token counts and finish reason are read from the response."""
+    provider = OllamaProvider({"model_name": "llama3.2"})
+
+    mock_response = MagicMock(
+        response="ls -la", prompt_eval_count=70, eval_count=3, done_reason="length"
+    )
+    mock_model = MagicMock()
+    mock_model.model = "llama3.2"
+    mock_ollama_server.list.return_value = {"models": [mock_model]}
+    mock_ollama_server.generate.return_value = mock_response
+
+    result = provider.generate("list files")
+
+    assert result.usage is not None
+    assert result.usage.input_tokens == 70
+    assert result.usage.output_tokens == 3
+    assert result.truncated
+    assert (result.provider, result.model) == ("ollama", "llama3.2")
@@ -0,0 +1,164 @@
+"""Tests for Ollama few-shot example retrieval."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ask.exceptions import ConfigurationError
+from ask.prompt_cache import PromptCache
+from ask.providers.ollama_examples import (
+    ExampleIndex,
+    format_examples,
+    import_numpy,
+)
+
+VOCAB = ["find", "file", "git", "branch", "disk", "usage", "port", "kill"]
+
+
+def _bag_of_words(model, input):
+    """Embed texts as word counts over VOCAB."""
+    vectors = [[text.split().count(word) + 0.01 for word in VOCAB] for text in input]
+    return MagicMock(embeddings=vectors)
+
+
+@pytest.fixture
+def prompt_cache_path(tmp_path):
+    """Prompt cache with a few accepted commands."""
+    path = tmp_path / "prompts.sqlite3"
+    cache = PromptCache(path)
+    cache.store("find big file", "find . -size +100M")
+    cache.store("delete git branch", "git branch -d feature")
+    cache.store("disk usage here", "du -sh .")
+    cache.close()
+    return path
+
+
+@pytest.fixture
+def client():
+    """Ollama client with a deterministic embeddings endpoint."""
+    client = MagicMock()
+    client.embed.side_effect = _bag_of_words
+    return client
+
+
+def test_format_examples():
+    """Test examples are placed before the prompt."""
+    prompt = format_examples([("list files", "ls", 0.9)], "list all files")
+
+    assert prompt == (
+        "Examples of requests and the commands that answer them:\n\n"
+        "Request: list files\nCommand: ls\n\n"
+        "Request: list all files\nCommand:"
+    )
+    assert format_examples([], "list all files") == "list all files"
+
+
+def test_import_numpy_missing():
+    """Test a helpful error when numpy is not installed."""
+    with patch("importlib.import_module", side_effect=ImportError):
+        with pytest.raises(ConfigurationError, match="numpy is required"):
+            import_numpy()
+
+
+def test_update_batched_and_incremental(tmp_path, client, prompt_cache_path):
+    """Test new entries are embedded in batches, once."""
+    pytest.importorskip("numpy")
+    index = ExampleIndex(
+        client, path=tmp_path / "index", prompt_cache_path=prompt_cache_path
+    )
+
+    assert index.update(batch_size=2) == 3
+    assert client.embed.call_count == 2
+    assert index.meta == {"dim": len(VOCAB), "count": 3, "last_id": 3}
+
+    reopened = ExampleIndex(
+        client, path=tmp_path / "index", prompt_cache_path=prompt_cache_path
+    )
+    assert reopened.update() == 0
+
+    cache = PromptCache(prompt_cache_path)
+    cache.store("kill port 80", "fuser -k 80/tcp")
+    cache.close()
+    assert reopened.update() == 1
+    assert reopened.count == 4
+    assert (tmp_path / "index" / "vectors.f32").stat().st_size == 4 * len(VOCAB) * 4
+
+
+def test_update_limit(tmp_path, client, prompt_cache_path):
+    """Test a large backlog is indexed over several runs."""
+    pytest.importorskip("numpy")
+    index = ExampleIndex(
+        client, path=tmp_path / "index", prompt_cache_path=prompt_cache_path
+    )
+
+    assert index.update(limit=2) == 2
+    assert index.update(limit=2) == 1
+
+
+def test_update_overwrites_partial_rows(tmp_path, client, prompt_cache_path):
+    """Test rows written after the last recorded count are replaced."""
+    pytest.importorskip("numpy")
+    index = ExampleIndex(
+        client, path=tmp_path / "index", prompt_cache_path=prompt_cache_path
+    )
+    index.update(limit=1)
+    with open(tmp_path / "index" / "vectors.f32", "ab") as f:
+        f.write(b"partial")
+
+    index.update()
+
+    assert (tmp_path / "index" / "vectors.f32").stat().st_size == 3 * len(VOCAB) * 4
+
+
+def test_update_dimension_change(tmp_path, client, prompt_cache_path):
+    """Test switching to a model with another embedding size is reported."""
+    pytest.importorskip("numpy")
+    index = ExampleIndex(
+        client, path=tmp_path / "index", prompt_cache_path=prompt_cache_path
+    )
+    index.update(limit=1)
+    client.embed.side_effect = lambda model, input: MagicMock(
+        embeddings=[[1.0, 0.0] for _ in input]
+    )
+
+    with pytest.raises(ValueError, match="Embedding size changed"):
+        index.update()
+
+
+def test_search_top_k(tmp_path, client, prompt_cache_path):
+    """Test the most similar examples are returned first."""
+    pytest.importorskip("numpy")
+    index = ExampleIndex(
+        client, path=tmp_path / "index", prompt_cache_path=prompt_cache_path
+    )
+    index.update()
+
+    results = index.search("git branch list", k=2, min_similarity=0.0)
+
+    assert [command for _, command, _ in results][0] == "git branch -d feature"
+    assert len(results) == 2
+    assert results[0][2] >= results[1][2]
+
+
+def test_search_min_similarity(tmp_path, client, prompt_cache_path):
+    """Test dissimilar examples are dropped."""
+    pytest.importorskip("numpy")
+    index = ExampleIndex(
+        client, path=tmp_path / "index", prompt_cache_path=prompt_cache_path
+    )
+    index.update()
+
+    results = index.search("git branch", k=3, min_similarity=0.5)
+
+    assert [command for _, command, _ in results] == ["git branch -d feature"]
+
+
+def test_search_empty_index(tmp_path, client, prompt_cache_path):
+    """Test searching before anything is indexed."""
+    pytest.importorskip("numpy")
+    index = ExampleIndex(
+        client, path=tmp_path / "index", prompt_cache_path=prompt_cache_path
+    )
+
+    assert index.search("git branch", k=3) == []
+    client.embed.assert_not_called()
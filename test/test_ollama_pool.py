@@ -0,0 +1,201 @@
+"""Tests for the Ollama host pool."""
+
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ask.exceptions import ConfigurationError
+from ask.providers.ollama_pool import (
+    ENDPOINT_SAMPLES,
+    EndpointSelector,
+    OllamaHost,
+    OllamaHostPool,
+    model_available,
+    normalize_host,
+    shared_pool,
+)
+
+
+def _model(name: str) -> MagicMock:
+    model = MagicMock()
+    model.model = name
+    return model
+
+
+def test_normalize_host():
+    """Test host normalization."""
+    assert normalize_host("gpu1") == "http://gpu1:11434"
+    assert normalize_host("gpu1:8080") == "http://gpu1:8080"
+    assert normalize_host("https://gpu1/") == "https://gpu1:11434"
+    assert normalize_host("http://gpu1:9999") == "http://gpu1:9999"
+
+
+def test_model_available():
+    """Test model matching with and without tags."""
+    assert model_available("llama3.2", ["llama3.2:latest"])
+    assert model_available("llama3.2:3b", ["llama3.2:3b"])
+    assert not model_available("llama3.2:1b", ["llama3.2:3b"])
+    assert not model_available("codellama", ["llama3.2:latest"])
+
+
+def test_host_has_model_unknown():
+    """Test hosts without a model list are assumed to serve every model."""
+    host = OllamaHost("http://gpu1:11434")
+    assert host.has_model("anything")
+
+    host.models = ["llama3.2:latest"]
+    assert host.has_model("llama3.2")
+    assert not host.has_model("codellama")
+
+
+def test_host_record_latency():
+    """Test latency moving average."""
+    host = OllamaHost("http://gpu1:11434")
+    host.record_latency(1.0)
+    assert host.latency == 1.0
+
+    host.record_latency(2.0)
+    assert host.latency == pytest.approx(1.3)
+    assert host.probe_latency is None
+
+    host.record_probe(0.01)
+    assert host.probe_latency == 0.01
+    assert host.latency == pytest.approx(1.3)
+
+
+def test_pool_invalid_strategy(tmp_path):
+    """Test unknown selection strategy."""
+    with pytest.raises(ConfigurationError, match="Unknown Ollama host strategy"):
+        OllamaHostPool(["gpu1"], strategy="random", cache_path=tmp_path / "h.json")
+
+
+def test_pool_refresh_records_health(tmp_path):
+    """Test health checks record models and write the cache."""
+    cache_path = tmp_path / "hosts.json"
+    pool = OllamaHostPool(["gpu1", "gpu2"], cache_path=cache_path)
+
+    with patch("ollama.Client") as mock_client_class:
+        good = MagicMock()
+        good.list.return_value = {"models": [_model("llama3.2:latest")]}
+        bad = MagicMock()
+        bad.list.side_effect = ConnectionError("refused")
+        mock_client_class.side_effect = [good, bad]
+
+        pool.refresh()
+
+    gpu1, gpu2 = pool.hosts
+    assert gpu1.healthy and gpu1.models == ["llama3.2:latest"]
+    # Probes are not generations, so they must not rank the host
+    assert gpu1.probe_latency is not None
+    assert gpu1.latency is None
+    assert not gpu2.healthy
+    assert pool.healthy_hosts() == [gpu1]
+
+    cached = json.loads(cache_path.read_text())
+    assert cached["http://gpu1:11434"]["healthy"] is True
+    assert cached["http://gpu2:11434"]["healthy"] is False
+
+
+def test_pool_uses_cached_health(tmp_path):
+    """Test fresh cached health checks skip probing."""
+    cache_path = tmp_path / "hosts.json"
+    cache_path.write_text(
+        json.dumps(
+            {
+                "http://gpu1:11434": {
+                    "healthy": False,
+                    "latency": 0.2,
+                    "models": [],
+                    "checked_at": time.time(),
+                }
+            }
+        )
+    )
+
+    pool = OllamaHostPool(["gpu1"], cache_path=cache_path)
+    with patch("ollama.Client") as mock_client_class:
+        pool.refresh()
+        mock_client_class.assert_not_called()
+
+    assert not pool.hosts[0].healthy
+    assert pool.hosts[0].latency == 0.2
+
+
+def test_pool_candidates_least_outstanding(tmp_path):
+    """Test least-outstanding selection."""
+    pool = OllamaHostPool(["gpu1", "gpu2", "gpu3"], cache_path=tmp_path / "h.json")
+    gpu1, gpu2, gpu3 = pool.hosts
+    gpu1.outstanding = 2
+    gpu2.latency = 0.5
+    gpu3.latency = 0.1
+    gpu3.models = ["codellama:latest"]
+
+    assert pool.candidates("llama3.2") == [gpu2, gpu1]
+    assert pool.candidates("codellama") == [gpu3, gpu2, gpu1]
+
+
+def test_pool_candidates_latency(tmp_path):
+    """Test latency-weighted selection."""
+    pool = OllamaHostPool(
+        ["gpu1", "gpu2", "gpu3"], strategy="latency", cache_path=tmp_path / "h.json"
+    )
+    gpu1, gpu2, gpu3 = pool.hosts
+    gpu1.latency = 0.9
+    gpu1.outstanding = 0
+    gpu2.latency = 0.1
+    gpu2.outstanding = 5
+    gpu3.healthy = False
+
+    assert pool.candidates("llama3.2") == [gpu2, gpu1]
+
+
+def test_pool_reserve_tracks_outstanding(tmp_path):
+    """Test in-flight request accounting."""
+    pool = OllamaHostPool(["gpu1"], cache_path=tmp_path / "h.json")
+    host = pool.hosts[0]
+
+    with pool.reserve(host):
+        assert host.outstanding == 1
+    assert host.outstanding == 0
+    assert host.latency is not None
+
+    with pytest.raises(ValueError):
+        with pool.reserve(host):
+            raise ValueError("boom")
+    assert host.outstanding == 0
+
+
+def test_pool_mark_failed(tmp_path):
+    """Test failed hosts leave rotation."""
+    pool = OllamaHostPool(["gpu1", "gpu2"], cache_path=tmp_path / "h.json")
+    pool.mark_failed(pool.hosts[0])
+
+    assert pool.candidates("llama3.2") == [pool.hosts[1]]
+
+
+def test_shared_pool():
+    """Test providers with the same hosts share one pool and its load counts."""
+    pool = shared_pool(["gpu1", "http://gpu2:11434"])
+
+    assert shared_pool(["http://gpu1:11434", "gpu2"]) is pool
+    assert shared_pool(["gpu1", "gpu2"], strategy="latency") is not pool
+    assert shared_pool(["gpu1"]) is not pool
+
+
+def test_endpoint_selector_samples_then_picks_faster(tmp_path):
+    """Test both endpoints are sampled before the faster one is chosen."""
+    cache_path = tmp_path / "endpoints.json"
+    selector = EndpointSelector(cache_path=cache_path)
+    host, model = "http://gpu1:11434", "llama3.2"
+
+    for _ in range(ENDPOINT_SAMPLES):
+        assert selector.select(host, model) == "generate"
+        selector.record(host, model, "generate", 0.5)
+    for _ in range(ENDPOINT_SAMPLES):
+        assert selector.select(host, model) == "chat"
+        selector.record(host, model, "chat", 0.2)
+
+    assert selector.select(host, model) == "chat"
+    assert EndpointSelector(cache_path=cache_path).select(host, model) == "chat"
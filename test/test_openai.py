@@ -4,10 +4,17 @@ import os
 import re
 from unittest.mock import MagicMock, patch
 
+import httpx
+import openai
 import pytest
 
 from ask.config import SYSTEM_PROMPT
-from ask.exceptions import APIError, AuthenticationError, RateLimitError
+from ask.exceptions import (
+    APIError,
+    AuthenticationError,
+    QuotaExceededError,
+    RateLimitError,
+)
 from ask.providers.openai import OpenAIProvider
 
 
@@ -259,3 +266,108 @@ def test_regex_bash_extraction():
             result = input_text
 
         assert result == expected
+
+
+def test_get_bash_command_stop(mock_openai_key):
+    """Test stop sequences are forwarded."""
+    provider = OpenAIProvider({"stop": ["\n\n"]})
+
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = "ls -la"
+
+    with patch("openai.OpenAI") as mock_openai:
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = mock_response
+        mock_openai.return_value = mock_client
+
+        assert provider.get_bash_command("list files") == "ls -la"
+        kwargs = mock_client.chat.completions.create.call_args.kwargs
+        assert kwargs["stop"] == ["\n\n"]
+
+
+def test_get_bash_command_stream(mock_openai_key):
+    """Test streaming closes the connection once the command is complete."""
+    provider = OpenAIProvider({"stream": True})
+
+    def chunk(text):
+        mock_chunk = MagicMock()
+        mock_chunk.choices = [MagicMock()]
+        mock_chunk.choices[0].delta.content = text
+        return mock_chunk
+
+    mock_stream = MagicMock()
+    mock_stream.__iter__.return_value = iter(
+        [chunk("```bash\n"), chunk("ls -la\n```"), chunk("\nMore text")]
+    )
+
+    with patch("openai.OpenAI") as mock_openai:
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = mock_stream
+        mock_openai.return_value = mock_client
+
+        assert provider.get_bash_command("list files") == "ls -la"
+        assert mock_client.chat.completions.create.call_args.kwargs["stream"] is True
+        mock_stream.close.assert_called_once()
+
+
+def test_generate_records_usage(mock_openai_key):
+    """Test token usage and finish reason are read from the response."""
+    provider = OpenAIProvider({})
+
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = "```bash\nls -la\n```"
+    mock_response.choices[0].finish_reason = "stop"
+    mock_response.usage.prompt_tokens = 90
+    mock_response.usage.completion_tokens = 4
+    mock_response.usage.prompt_tokens_details.cached_tokens = 64
+
+    with patch("openai.OpenAI") as mock_openai:
+        mock_openai.return_value.chat.completions.create.return_value = mock_response
+        result = provider.generate("list files")
+
+    assert result.usage is not None
+    assert result.usage.input_tokens == 90
+    assert result.usage.output_tokens == 4
+    assert result.usage.cached_tokens == 64
+    assert result.command == "ls -la"
+    assert result.raw_text == "```bash\nls -la\n```"
+    assert result.finish_reason == "stop"
+    assert not result.truncated
+    assert (result.provider, result.model) == ("openai", "gpt-4o-mini")
+
+
+def test_get_bash_command_without_usage(mock_openai_key):
+    """Test servers that leave out usage are handled."""
+    provider = OpenAIProvider({})
+
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = "ls -la"
+    mock_response.usage = None
+
+    with patch("openai.OpenAI") as mock_openai:
+        mock_openai.return_value.chat.completions.create.return_value = mock_response
+        result = provider.generate("list files")
+
+    assert result.command == "ls -la"
+    assert result.usage is None
+
+
+def test_handle_api_error_insufficient_quota():
+    """Test an exhausted quota is not treated as a transient rate limit."""
+    provider = OpenAIProvider({})
+    response = httpx.Response(
+        429, request=httpx.Request("POST", "https://api.openai.com/v1/chat")
+    )
+    error = openai.RateLimitError(
+        "You exceeded your current quota",
+        response=response,
+        body={"code": "insufficient_quota"},
+    )
+
+    with pytest.raises(QuotaExceededError) as exc_info:
+        provider._handle_api_error(error)
+
+    assert not exc_info.value.transient
@@ -0,0 +1,167 @@
+"""Tests for OpenAI-compatible provider."""
+
+import os
+from unittest.mock import MagicMock, patch
+
+import openai
+import pytest
+
+import ask.providers.openai_compatible as openai_compatible
+from ask.config import SYSTEM_PROMPT
+from ask.exceptions import (
+    AuthenticationError,
+    ConfigurationError,
+    RateLimitError,
+    ServiceUnavailableError,
+)
+from ask.providers import get_provider
+from ask.providers.openai_compatible import OpenAICompatibleProvider
+
+
+@pytest.fixture(autouse=True)
+def reset_http_client():
+    """Reset the shared HTTP client between tests."""
+    openai_compatible._HTTP_CLIENT = None
+    yield
+    openai_compatible._HTTP_CLIENT = None
+
+
+def test_registered():
+    """Test provider is available from the registry."""
+    provider = get_provider("openai_compatible", {"base_url": "http://vllm:8000/v1"})
+    assert isinstance(provider, OpenAICompatibleProvider)
+
+
+def test_validate_config_no_auth(mock_env_vars):
+    """Test servers without authentication."""
+    provider = OpenAICompatibleProvider({"base_url": "http://vllm:8000/v1"})
+
+    with patch("openai.OpenAI") as mock_openai:
+        provider.validate_config()
+
+        kwargs = mock_openai.call_args.kwargs
+        assert kwargs["api_key"] == openai_compatible.NO_API_KEY
+        assert kwargs["base_url"] == "http://vllm:8000/v1"
+        assert kwargs["max_retries"] == 0
+        assert kwargs["http_client"] is openai_compatible.get_http_client()
+
+
+def test_validate_config_with_auth():
+    """Test servers that require an API key."""
+    provider = OpenAICompatibleProvider(
+        {"base_url": "http://vllm:8000/v1", "api_key_env": "VLLM_API_KEY"}
+    )
+
+    with patch.dict(os.environ, {"VLLM_API_KEY": "secret"}):
+        with patch("openai.OpenAI") as mock_openai:
+            provider.validate_config()
+            assert mock_openai.call_args.kwargs["api_key"] == "secret"
+
+
+def test_validate_config_missing_key(mock_env_vars):
+    """Test missing API key when one is configured."""
+    provider = OpenAICompatibleProvider(
+        {"base_url": "http://vllm:8000/v1", "api_key_env": "VLLM_API_KEY"}
+    )
+
+    with pytest.raises(AuthenticationError, match="VLLM_API_KEY"):
+        provider.validate_config()
+
+
+def test_validate_config_missing_base_url():
+    """Test base_url is required."""
+    provider = OpenAICompatibleProvider({})
+
+    with pytest.raises(ConfigurationError, match="base_url is required"):
+        provider.validate_config()
+
+
+def test_http_client_shared_between_servers(mock_env_vars):
+    """Test providers for different servers share one connection pool."""
+    first = OpenAICompatibleProvider({"base_url": "http://vllm:8000/v1"})
+    second = OpenAICompatibleProvider({"base_url": "http://llamacpp:8080/v1"})
+
+    with patch("openai.OpenAI") as mock_openai:
+        first.validate_config()
+        second.validate_config()
+
+        clients = [call.kwargs["http_client"] for call in mock_openai.call_args_list]
+        assert clients[0] is clients[1]
+        base_urls = [call.kwargs["base_url"] for call in mock_openai.call_args_list]
+        assert base_urls == ["http://vllm:8000/v1", "http://llamacpp:8080/v1"]
+
+
+def test_get_bash_command(mock_env_vars):
+    """Test request arguments sent to the server."""
+    provider = OpenAICompatibleProvider(
+        {"base_url": "http://vllm:8000/v1", "model_name": "qwen2.5-coder"}
+    )
+
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = "ls -la"
+
+    with patch("openai.OpenAI") as mock_openai:
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = mock_response
+        mock_openai.return_value = mock_client
+
+        assert provider.get_bash_command("list files") == "ls -la"
+        mock_client.chat.completions.create.assert_called_once_with(
+            model="qwen2.5-coder",
+            max_tokens=150,
+            temperature=0.5,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": "list files"},
+            ],
+        )
+
+
+def test_handle_api_error_connection():
+    """Test unreachable server error mapping."""
+    provider = OpenAICompatibleProvider({"base_url": "http://vllm:8000/v1"})
+    error = openai.APIConnectionError(request=MagicMock())
+
+    with pytest.raises(
+        ServiceUnavailableError, match="Cannot connect to server"
+    ) as exc_info:
+        provider._handle_api_error(error)
+
+    assert exc_info.value.transient is True
+
+
+def test_handle_api_error_timeout():
+    """Test timeouts are reported as an unavailable server."""
+    provider = OpenAICompatibleProvider({"base_url": "http://vllm:8000/v1"})
+    error = openai.APITimeoutError(request=MagicMock())
+
+    with pytest.raises(ServiceUnavailableError, match="Cannot connect to server"):
+        provider._handle_api_error(error)
+
+
+def test_handle_api_error_rejected_key():
+    """Test a server rejecting the key is an authentication error."""
+    provider = OpenAICompatibleProvider({"base_url": "http://vllm:8000/v1"})
+    response = MagicMock(status_code=401, headers={})
+    error = openai.AuthenticationError("Unauthorized", response=response, body=None)
+
+    with pytest.raises(AuthenticationError, match="Invalid API key"):
+        provider._handle_api_error(error)
+
+
+def test_handle_api_error_rate_limit():
+    """Test other errors fall back to OpenAI error mapping."""
+    provider = OpenAICompatibleProvider({"base_url": "http://vllm:8000/v1"})
+
+    with pytest.raises(RateLimitError):
+        provider._handle_api_error(Exception("rate limit exceeded"))
+
+
+def test_get_default_config():
+    """Test default configuration values."""
+    default_config = OpenAICompatibleProvider.get_default_config()
+
+    assert default_config["base_url"] == "http://localhost:8000/v1"
+    assert default_config["max_retries"] == 0
+    assert default_config["system_prompt"] == SYSTEM_PROMPT
@@ -0,0 +1,114 @@
+"""Tests for the stdin pipeline."""
+
+import threading
+import time
+
+from ask.exceptions import APIError
+from ask.pipeline import run
+
+
+def _answer(delays):
+    """Return an answer function that sleeps per prompt before answering."""
+
+    def answer(prompt):
+        time.sleep(delays.get(prompt, 0))
+        return f"cmd {prompt}"
+
+    return answer
+
+
+def test_run_emits_as_ready():
+    """Test unordered output follows completion, not input order."""
+    emitted = []
+
+    failures = run(
+        ["slow\n", "fast\n"],
+        _answer({"slow": 0.2}),
+        lambda outcome: emitted.append(outcome.command),
+        concurrency=2,
+    )
+
+    assert failures == 0
+    assert emitted == ["cmd fast", "cmd slow"]
+
+
+def test_run_ordered():
+    """Test ordered output follows input order."""
+    emitted = []
+
+    run(
+        ["slow", "fast", "", "last"],
+        _answer({"slow": 0.2}),
+        lambda outcome: emitted.append((outcome.index, outcome.command)),
+        concurrency=3,
+        ordered=True,
+    )
+
+    assert emitted == [(0, "cmd slow"), (1, "cmd fast"), (2, "cmd last")]
+
+
+def test_run_counts_failures():
+    """Test failed prompts are emitted with their error and counted."""
+    emitted = []
+
+    def answer(prompt):
+        if prompt == "bad":
+            raise APIError("Error: API request failed")
+        return "ls"
+
+    failures = run(["good", "bad"], answer, emitted.append, ordered=True)
+
+    assert failures == 1
+    assert emitted[0].command == "ls"
+    assert emitted[1].command is None
+    assert str(emitted[1].error) == "Error: API request failed"
+
+
+def test_run_does_not_wait_for_input():
+    """Test commands are emitted while the producer has no next line yet."""
+    first_emitted = threading.Event()
+    emitted_before_next_line = []
+
+    def lines():
+        yield "first"
+        emitted_before_next_line.append(first_emitted.wait(5))
+        yield "second"
+
+    run(lines(), _answer({}), lambda outcome: first_emitted.set())
+
+    assert emitted_before_next_line == [True]
+
+
+def test_run_bounds_lines_read_ahead():
+    """Test unbounded input is only read as fast as answers are written."""
+    read = 0
+    emitted = 0
+    most_ahead = 0
+    # Two workers with two slots each, plus the line waiting for a slot
+    limit = 5
+    reader_full = threading.Event()
+
+    def lines():
+        nonlocal read, most_ahead
+        for index in range(50):
+            read += 1
+            most_ahead = max(most_ahead, read - emitted)
+            if read == limit:
+                reader_full.set()
+            yield f"prompt {index}"
+
+    def answer(prompt):
+        # Hold back the first answer until the reader has filled every slot,
+        # so nothing can be written and the reader must stop at the limit
+        if prompt == "prompt 0":
+            reader_full.wait(5)
+        return f"cmd {prompt}"
+
+    def emit(outcome):
+        nonlocal emitted
+        emitted += 1
+
+    run(lines(), answer, emit, concurrency=2, ordered=True)
+
+    assert emitted == 50
+    assert most_ahead == limit
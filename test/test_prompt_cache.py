@@ -0,0 +1,207 @@
+"""Tests for the near-duplicate prompt cache."""
+
+from unittest.mock import patch
+
+import pytest
+
+from ask.prompt_cache import (
+    BANDS,
+    CACHE_FILE,
+    NUM_PERM,
+    PromptCache,
+    band_keys,
+    jaccard,
+    literals,
+    normalize,
+    shingles,
+    signature,
+)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Prompt cache in a temporary directory."""
+    cache = PromptCache(tmp_path / "prompts.sqlite3")
+    yield cache
+    cache.close()
+
+
+def test_normalize():
+    """Test stopwords, synonyms, plurals and extensions are normalized."""
+    assert normalize("Find all *.py files changed this week") == [
+        "find",
+        "py",
+        "file",
+        "modified",
+        "week",
+    ]
+    assert normalize("find python files modified this week") == normalize(
+        "find all py files changed this week"
+    )
+    assert normalize("show the last 10 lines") == ["show", "last", "10", "line"]
+    assert normalize("the") == []
+
+
+def test_literals():
+    """Test numbers and paths are treated as literals."""
+    assert literals(["copy", "config.txt", "to", "~/downloads", "8080"]) == (
+        "config.txt",
+        "~/downloads",
+        "8080",
+    )
+
+
+def test_shingles():
+    """Test shingles include unigrams and bigrams."""
+    assert shingles(["a", "b", "c"]) == {"a", "b", "c", "a b", "b c"}
+
+
+def test_signature_deterministic():
+    """Test signatures are stable and sized to the number of permutations."""
+    sig = signature({"find", "py", "find py"})
+
+    assert sig == signature({"find py", "py", "find"})
+    assert len(sig) == NUM_PERM
+    assert len(band_keys(sig)) == BANDS
+
+
+def test_jaccard():
+    """Test Jaccard similarity."""
+    assert jaccard({"a", "b"}, {"b", "c"}) == pytest.approx(1 / 3)
+    assert jaccard(set(), set()) == 1.0
+
+
+def test_lookup_near_duplicate(cache):
+    """Test a reworded prompt returns the cached command."""
+    cache.store("find all py files changed this week", "find . -name '*.py' -mtime -7")
+
+    hit = cache.lookup("find python files modified this week")
+
+    assert hit is not None
+    assert hit.prompt == "find all py files changed this week"
+    assert hit.command == "find . -name '*.py' -mtime -7"
+    assert hit.score == 1.0
+
+
+def test_lookup_below_threshold(cache):
+    """Test dissimilar prompts miss."""
+    cache.store("find all py files changed this week", "find . -name '*.py' -mtime -7")
+
+    assert cache.lookup("delete py files changed this week") is None
+    assert cache.lookup("compress the logs directory") is None
+
+
+def test_lookup_literals_must_match(cache):
+    """Test prompts that differ only in a number do not share an answer."""
+    cache.store("kill process on port 8080", "lsof -ti tcp:8080 | xargs kill")
+
+    assert cache.lookup("kill process on port 3000") is None
+    assert cache.lookup("terminate the process on port 8080").command == (
+        "lsof -ti tcp:8080 | xargs kill"
+    )
+
+
+def test_lookup_threshold_configurable(tmp_path):
+    """Test a lower threshold accepts looser matches."""
+    path = tmp_path / "prompts.sqlite3"
+    cache = PromptCache(path)
+    cache.store("show disk usage of each directory sorted", "du -sh * | sort -h")
+    cache.close()
+
+    strict = PromptCache(path, threshold=0.9)
+    loose = PromptCache(path, threshold=0.3)
+
+    assert strict.lookup("show each directory sorted disk usage") is None
+    hit = loose.lookup("show each directory sorted disk usage")
+    assert hit is not None and 0.3 <= hit.score < 0.9
+    strict.close()
+    loose.close()
+
+
+@pytest.mark.parametrize(
+    ("cached", "prompt"),
+    [
+        (
+            "recursively delete empty files under the current directory tree",
+            "recursively delete non-empty files under the current directory tree",
+        ),
+        (
+            "show the 20 newest files in the current directory sorted by size",
+            "show the 20 oldest files in the current directory sorted by size",
+        ),
+        (
+            "find files in the current directory tree owned by root",
+            "find files in the current directory tree not owned by root",
+        ),
+        ("show disk usage of each directory sorted", "show disk usage of each"),
+    ],
+)
+def test_lookup_requires_same_words(tmp_path, cached, prompt):
+    """Test prompts with a different or negated word never share an answer."""
+    cache = PromptCache(tmp_path / "prompts.sqlite3", threshold=0.5)
+    cache.store(cached, "find . -type f -empty -delete")
+
+    assert jaccard(shingles(normalize(cached)), shingles(normalize(prompt))) >= 0.5
+    assert cache.lookup(prompt) is None
+    cache.close()
+
+
+@pytest.mark.parametrize(
+    ("cached", "prompt"),
+    [
+        ("show the first 10 lines of app.log", "show the last 10 lines of app.log"),
+        ("move file from a.txt to b.txt", "move file to a.txt from b.txt"),
+        ("copy a.txt to b.txt", "copy b.txt to a.txt"),
+        ("show files in src", "show files src"),
+    ],
+)
+def test_lookup_keeps_direction(cache, cached, prompt):
+    """Test prompts that differ in direction, position or argument order miss."""
+    cache.store(cached, "head -n 10 app.log")
+
+    assert cache.lookup(prompt) is None
+
+
+def test_store_replaces_answer(cache):
+    """Test storing the same prompt again replaces its answer."""
+    cache.store("list files", "ls")
+    cache.store("List files.", "ls -la")
+
+    assert cache.lookup("list files").command == "ls -la"
+    count = cache.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    assert count == 1
+
+
+def test_store_persists(tmp_path):
+    """Test entries survive reopening the database."""
+    path = tmp_path / "prompts.sqlite3"
+    cache = PromptCache(path)
+    cache.store("list files", "ls")
+    cache.close()
+
+    reopened = PromptCache(path)
+    assert reopened.lookup("list files").command == "ls"
+    reopened.close()
+
+
+def test_store_evicts_oldest(cache):
+    """Test the cache is bounded."""
+    with patch("ask.prompt_cache.MAX_ENTRIES", 2):
+        cache.store("list files", "ls")
+        cache.store("show disk usage", "du -sh")
+        cache.store("show git status", "git status")
+
+    assert cache.lookup("list files") is None
+    assert cache.lookup("show git status").command == "git status"
+    orphans = cache.connection.execute(
+        "SELECT COUNT(*) FROM buckets WHERE entry_id NOT IN (SELECT id FROM entries)"
+    ).fetchone()[0]
+    assert orphans == 0
+
+
+def test_default_path(isolated_cache_dir):
+    """Test the cache lives in the cache directory."""
+    cache = PromptCache()
+
+    assert cache.path == isolated_cache_dir / CACHE_FILE
+    cache.close()
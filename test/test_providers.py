@@ -1,10 +1,25 @@
 """Tests for the provider registry."""
 
+import time
+
 import pytest
 
+from ask.config import SYSTEM_PROMPT
 from ask.exceptions import ConfigurationError
-from ask.providers import get_provider, list_providers, register_provider
-from ask.providers.base import ProviderInterface
+from ask.providers import (
+    get_provider,
+    get_provider_class,
+    get_provider_name,
+    list_providers,
+    register_provider,
+)
+from ask.providers.base import (
+    CommandResult,
+    ProviderInterface,
+    find_command_end,
+    read_until_complete,
+    strip_code_fence,
+)
 
 
 class MockProvider(ProviderInterface):
@@ -75,3 +90,144 @@ def test_provider_registry_isolation():
     # Clean up
     del _PROVIDER_REGISTRY["temp_provider"]
     assert "temp_provider" not in _PROVIDER_REGISTRY
+
+
+def test_strip_code_fence():
+    """Test markdown code fence removal."""
+    assert strip_code_fence("ls -la") == "ls -la"
+    assert strip_code_fence("```bash\nls -la\n```") == "ls -la"
+    assert strip_code_fence("```\nls -la\n```\n") == "ls -la"
+    assert strip_code_fence("```sh\nls -la") == "ls -la"
+    assert strip_code_fence("echo ```") == "echo ```"
+
+
+def test_find_command_end():
+    """Test detection of a complete command in partial output."""
+    assert find_command_end("ls -la") is None
+    assert find_command_end("ls -la\n\nThis lists", ["\n\n"]) == 6
+    assert find_command_end("```bash\nls -la") is None
+    assert find_command_end("```bash\nls -la\n```\nThis lists") == 18
+    assert find_command_end("ls\n\n```", ["\n\n", "```"]) == 2
+
+
+class _Stream:
+    """Iterable stream that records whether it was closed."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.consumed = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def test_read_until_complete_stops_early():
+    """Test streaming stops as soon as a command is complete."""
+    stream = _Stream(["```bash\n", "ls -la", "\n```", "\nThis lists", " files"])
+
+    text = read_until_complete(stream, lambda chunk: chunk)
+
+    assert text == "```bash\nls -la\n```"
+    assert stream.consumed == 3
+    assert stream.closed
+
+
+def test_read_until_complete_stop_sequence():
+    """Test streaming truncates at a stop sequence."""
+    stream = _Stream(["find . ", "-name x\n", "\nExplanation"])
+
+    text = read_until_complete(stream, lambda chunk: chunk, ["\n\n"])
+
+    assert text == "find . -name x"
+    assert stream.closed
+
+
+def test_read_until_complete_whole_stream():
+    """Test streams without a stop point are read to the end."""
+    stream = _Stream(["ls", None, " -la"])
+
+    assert read_until_complete(stream, lambda chunk: chunk) == "ls -la"
+    assert stream.closed
+
+
+def test_get_provider_class():
+    """Test provider class lookup."""
+    register_provider("test_provider", MockProvider)
+
+    assert get_provider_class("test_provider") is MockProvider
+    assert get_provider_class("unknown_provider") is None
+
+
+def test_get_provider_name():
+    """Test registered name lookup for provider instances."""
+    register_provider("test_provider", MockProvider)
+
+    assert get_provider_name(MockProvider({})) == "test_provider"
+    assert get_provider_name(object()) is None
+
+
+def test_get_system_prompt():
+    """Test system context is appended to the system prompt."""
+    assert MockProvider({}).get_system_prompt() == SYSTEM_PROMPT
+    assert MockProvider({"system_prompt": "Custom"}).get_system_prompt() == "Custom"
+
+    provider = MockProvider({"system_prompt": "Custom", "system_context": "OS: Linux"})
+    assert provider.get_system_prompt() == "Custom\n\nOS: Linux"
+
+
+def test_generate_wraps_get_bash_command():
+    """Test providers that only implement get_bash_command still return results."""
+    register_provider("test_provider", MockProvider)
+    provider = MockProvider({"model_name": "mock-1"})
+
+    result = provider.generate("list files")
+
+    assert isinstance(result, CommandResult)
+    assert result.command == "mock command for: list files"
+    assert result.raw_text == result.command
+    assert result.provider == "test_provider"
+    assert result.model == "mock-1"
+    assert result.latency is not None
+    assert result.usage is None
+    assert not result.truncated
+
+
+def test_command_result_finish_reason():
+    """Test finish reasons are normalized and truncation is detected."""
+    assert CommandResult("ls", finish_reason="MAX_TOKENS").truncated
+    assert CommandResult("ls", finish_reason="length").truncated
+    assert not CommandResult("ls", finish_reason="stop").truncated
+    assert CommandResult("ls", finish_reason=object()).finish_reason is None
+    with pytest.raises(AttributeError):
+        CommandResult("ls").extra = 1
+
+
+def test_read_stream_records_first_token_latency():
+    """Test streamed results report when the first text arrived."""
+    provider = MockProvider({})
+    start = time.perf_counter()
+    text = provider.read_stream(_Stream([None, "ls", " -la"]), lambda chunk: chunk)
+    time.sleep(0.01)
+
+    result = provider._result(text, text, start)
+
+    assert result.command == "ls -la"
+    assert result.first_token_latency < result.latency
+    # The mark is used once, so a later request without streaming has none
+    later = provider._result(text, text, start)
+    assert later.first_token_latency == later.latency
+
+
+def test_command_result_first_token_latency_defaults_to_latency():
+    """Test responses that were not streamed arrive all at once."""
+    assert CommandResult("ls", latency=1.5).first_token_latency == 1.5
+    assert (
+        CommandResult("ls", latency=1.5, first_token_latency=0.2).first_token_latency
+        == 0.2
+    )
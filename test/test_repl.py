@@ -0,0 +1,102 @@
+"""Tests for the interactive session."""
+
+from unittest.mock import MagicMock, patch
+
+from ask.repl import Conversation, estimate_tokens, run
+
+
+def _reader(*lines):
+    """Return a read function that yields lines, then signals end of input."""
+    remaining = list(lines)
+
+    def read(prompt):
+        if not remaining:
+            raise EOFError
+        return remaining.pop(0)
+
+    return read
+
+
+def test_estimate_tokens():
+    """Test tokens are estimated from the text length, rounding up."""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("ls") == 1
+    assert estimate_tokens("a" * 9) == 3
+
+
+def test_build_prompt_without_history():
+    """Test the first prompt is sent unchanged."""
+    assert Conversation().build_prompt("list files") == "list files"
+
+
+def test_build_prompt_includes_earlier_turns():
+    """Test follow-ups carry earlier prompts and commands in order."""
+    conversation = Conversation()
+    conversation.add("find python files", "find . -name '*.py'")
+    conversation.add("larger than 1MB", "find . -name '*.py' -size +1M")
+
+    prompt = conversation.build_prompt("now only in src/")
+
+    assert prompt.index("find python files") < prompt.index("larger than 1MB")
+    assert "Command: find . -name '*.py' -size +1M" in prompt
+    assert prompt.endswith("now only in src/")
+
+
+def test_add_trims_oldest_turns_to_budget():
+    """Test the oldest turns are dropped once history exceeds its budget."""
+    conversation = Conversation(budget=9)
+    conversation.add("a" * 16, "b" * 8)
+    conversation.add("c" * 8, "d" * 8)
+
+    assert conversation.turns == [("c" * 8, "d" * 8)]
+
+
+def test_add_drops_turn_larger_than_budget():
+    """Test a single turn over budget is not kept."""
+    conversation = Conversation(budget=2)
+    conversation.add("a" * 40, "ls")
+
+    assert conversation.turns == []
+
+
+def test_run_answers_until_end_of_input():
+    """Test prompts are answered and recorded until input ends."""
+    answer = MagicMock(side_effect=["ls", "ls src"])
+    conversation = Conversation()
+
+    with patch("builtins.print") as mock_print:
+        run(answer, conversation, _reader("list files", "", "now only in src/"))
+
+    assert answer.call_args_list[0].args == ("list files", False)
+    follow_up, is_follow_up = answer.call_args_list[1].args
+    assert is_follow_up is True
+    assert "list files" in follow_up and follow_up.endswith("now only in src/")
+    assert [call.args for call in mock_print.call_args_list[:2]] == [
+        ("ls",),
+        ("ls src",),
+    ]
+    assert conversation.turns == [("list files", "ls"), ("now only in src/", "ls src")]
+
+
+def test_run_reset_and_exit():
+    """Test /reset forgets history and exit ends the session."""
+    answer = MagicMock(return_value="ls")
+    conversation = Conversation()
+
+    with patch("builtins.print"):
+        run(answer, conversation, _reader("list files", "/reset", "exit", "pwd"))
+
+    assert answer.call_count == 1
+    assert conversation.turns == []
+
+
+def test_run_skips_failed_answers():
+    """Test prompts that could not be answered are not recorded."""
+    answer = MagicMock(return_value=None)
+    conversation = Conversation()
+
+    with patch("builtins.print") as mock_print:
+        run(answer, conversation, _reader("list files"))
+
+    assert conversation.turns == []
+    mock_print.assert_called_once_with()
@@ -0,0 +1,188 @@
+"""Tests for latency-aware provider routing."""
+
+import json
+import os
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ask.providers.anthropic import AnthropicProvider
+from ask.routing import (
+    FAILURE_LATENCY,
+    ProviderStats,
+    choose_model,
+    has_credentials,
+    provider_stats_key,
+    stats_key,
+)
+
+
+@pytest.fixture
+def stats(tmp_path):
+    """Provider stats stored in a temporary file."""
+    return ProviderStats(path=tmp_path / "stats.json")
+
+
+def test_record_success(stats):
+    """Test latency moving average on success."""
+    stats.record("anthropic:haiku", 1.0, ok=True)
+    stats.record("anthropic:haiku", 2.0, ok=True)
+
+    entry = stats.stats["anthropic:haiku"]
+    assert entry["latency"] == pytest.approx(1.2)
+    assert entry["error_rate"] == 0.0
+    assert entry["calls"] == 2
+
+
+def test_record_persists(stats):
+    """Test stats are written to disk after every call."""
+    stats.record("openai:gpt-4o-mini", 0.5, ok=True)
+
+    data = json.loads(stats.path.read_text())
+    assert data["openai:gpt-4o-mini"]["latency"] == 0.5
+    assert ProviderStats(path=stats.path).expected_latency("openai:gpt-4o-mini") == (
+        0.5
+    )
+
+
+def test_record_from_threads_keeps_every_call(stats):
+    """Test stats loaded by separate threads do not overwrite each other."""
+    instances = [ProviderStats(path=stats.path) for _ in range(8)]
+    barrier = threading.Barrier(len(instances))
+
+    def record(instance):
+        barrier.wait()
+        for _ in range(5):
+            instance.record("openai:gpt-4o-mini", 0.5, ok=True)
+
+    threads = [
+        threading.Thread(target=record, args=(instance,)) for instance in instances
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert ProviderStats(path=stats.path).stats["openai:gpt-4o-mini"]["calls"] == 40
+    assert list(stats.path.parent.glob("*.tmp")) == []
+
+
+def test_expected_latency_penalizes_errors(stats):
+    """Test error rate increases expected latency."""
+    stats.record("gemini:flash", 1.0, ok=True)
+    stats.record("gemini:flash", 5.0, ok=False)
+
+    entry = stats.stats["gemini:flash"]
+    assert entry["latency"] == 1.0
+    assert stats.expected_latency("gemini:flash") == pytest.approx(1.0 / 0.8)
+
+
+def test_expected_latency_unknown_and_failed(stats):
+    """Test unmeasured keys are tried first and failing keys are avoided."""
+    assert stats.expected_latency("never:called") == 0.0
+
+    stats.record("always:fails", 1.0, ok=False)
+    assert stats.expected_latency("always:fails") == pytest.approx(
+        FAILURE_LATENCY / 0.8
+    )
+
+
+def test_stats_key():
+    """Test stats keys use the default model when none is configured."""
+    assert stats_key("anthropic", {"model_name": "claude-x"}) == "anthropic:claude-x"
+    assert stats_key("anthropic", {}) == "anthropic:claude-3-haiku-20240307"
+    assert stats_key("unregistered", {}) == "unregistered:default"
+
+
+def test_provider_stats_key():
+    """Test stats key for provider instances."""
+    provider = AnthropicProvider({"model_name": "claude-x"})
+    assert provider_stats_key(provider) == "anthropic:claude-x"
+    assert provider_stats_key(MagicMock()) is None
+
+
+def test_has_credentials(mock_anthropic_key):
+    """Test credential detection."""
+    assert has_credentials("anthropic", {})
+    assert not has_credentials("openai", {})
+    assert has_credentials("openai", {"api_key_env": "ANTHROPIC_API_KEY"})
+    assert not has_credentials("unregistered", {})
+
+
+def test_has_credentials_ollama():
+    """Test Ollama credentials depend on the configured server being up."""
+    with patch("ask.config.check_ollama_available", return_value=False) as check:
+        assert not has_credentials("ollama", {})
+    check.assert_called_once_with("http://localhost:11434")
+    with patch("ask.config.check_ollama_available", return_value=True) as check:
+        assert has_credentials("ollama", {"host": "gpu1", "port": 8080})
+    check.assert_called_once_with("http://gpu1:8080")
+
+
+def test_has_credentials_ollama_hosts():
+    """Test Ollama with several hosts needs one of them to be up."""
+    with patch("ollama.Client") as mock_client_class:
+        mock_client_class.return_value.list.side_effect = ConnectionError("refused")
+        assert not has_credentials("ollama", {"hosts": ["gpu1", "gpu2"]})
+
+        mock_client_class.return_value.list.side_effect = None
+        mock_client_class.return_value.list.return_value = {"models": []}
+        assert has_credentials("ollama", {"hosts": ["gpu3"]})
+
+    assert not has_credentials("ollama", {"hosts": ["gpu4"], "host_strategy": "x"})
+
+
+def test_choose_model_prefers_fastest(stats):
+    """Test the fastest credentialed candidate is chosen."""
+    config_data = {"ask": {"auto_candidates": ["anthropic", "openai", "gemini"]}}
+    stats.record("anthropic:claude-3-haiku-20240307", 2.0, ok=True)
+    stats.record("openai:gpt-4o-mini", 0.5, ok=True)
+
+    with patch.dict(
+        os.environ,
+        {"ANTHROPIC_API_KEY": "key", "OPENAI_API_KEY": "key"},
+        clear=True,
+    ):
+        assert choose_model(config_data, stats) == "openai"
+
+
+def test_choose_model_explores_unmeasured(stats):
+    """Test candidates without stats are tried first."""
+    config_data = {"ask": {"auto_candidates": ["anthropic", "openai"]}}
+    stats.record("anthropic:claude-3-haiku-20240307", 0.1, ok=True)
+
+    with patch.dict(
+        os.environ,
+        {"ANTHROPIC_API_KEY": "key", "OPENAI_API_KEY": "key"},
+        clear=True,
+    ):
+        assert choose_model(config_data, stats) == "openai"
+
+
+def test_choose_model_uses_model_sections(stats):
+    """Test provider:model candidates are keyed by their model."""
+    config_data = {
+        "ask": {"auto_candidates": ["anthropic", "anthropic:sonnet"]},
+        "anthropic": {"model_name": "haiku", "sonnet": {"model_name": "sonnet"}},
+    }
+    stats.record("anthropic:haiku", 3.0, ok=True)
+    stats.record("anthropic:sonnet", 1.0, ok=True)
+
+    with patch.dict(os.environ, {"ANTHROPIC_API_KEY": "key"}, clear=True):
+        assert choose_model(config_data, stats) == "anthropic:sonnet"
+
+
+def test_choose_model_no_credentials(stats, mock_env_vars):
+    """Test no candidate is chosen without credentials."""
+    with patch("ask.config.check_ollama_available", return_value=False):
+        assert choose_model({}, stats) is None
+
+
+def test_record_escalation(stats):
+    """Test escalation counts."""
+    stats.record_escalation("ollama:qwen")
+    stats.record_escalation("ollama:qwen")
+
+    assert stats.stats["ollama:qwen"]["escalations"] == 2
+    assert stats.expected_latency("ollama:qwen") == 0.0
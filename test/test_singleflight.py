@@ -0,0 +1,161 @@
+"""Tests for cross-process request coalescing."""
+
+import fcntl
+import os
+import subprocess  # nosec B404
+import sys
+import threading
+import time
+
+import pytest
+
+from ask.singleflight import STALE_AFTER, SUPPORTED, Flight, flight_key
+
+pytestmark = pytest.mark.skipif(not SUPPORTED, reason="fcntl is not available")
+
+
+def _follow(key, directory, timeout=5.0):
+    """Enter a flight in a thread, returning the thread and its flight."""
+    flight = Flight(key, timeout=timeout, directory=directory)
+    thread = threading.Thread(target=lambda: flight.__enter__())
+    thread.start()
+    return thread, flight
+
+
+def test_flight_key():
+    """Test keys ignore spacing but not the model."""
+    assert flight_key("list  files ") == flight_key("list files")
+    assert flight_key("list files") != flight_key("list files", "anthropic")
+
+
+def test_first_request_leads(tmp_path):
+    """Test an uncontended request leads, ignoring answers from earlier flights."""
+    with Flight("key", directory=tmp_path) as flight:
+        flight.publish("ls -la")
+
+    with Flight("key", directory=tmp_path) as flight:
+        assert flight.leader is True
+        assert flight.result is None
+
+
+def test_waiting_request_shares_answer(tmp_path):
+    """Test a request made while an identical one is in flight reuses its answer."""
+    with Flight("key", directory=tmp_path) as leader:
+        thread, follower = _follow("key", tmp_path)
+        time.sleep(0.1)
+        leader.publish("ls -la")
+    thread.join(timeout=5)
+
+    assert follower.result == "ls -la"
+    assert follower.leader is False
+    follower.__exit__(None, None, None)
+
+
+def test_failed_leader_hands_over(tmp_path):
+    """Test a waiting request leads itself when the leader publishes nothing."""
+    with Flight("key", directory=tmp_path):
+        thread, follower = _follow("key", tmp_path)
+        time.sleep(0.1)
+    thread.join(timeout=5)
+
+    assert follower.result is None
+    assert follower.leader is True
+    follower.publish("ls -la")
+    follower.__exit__(None, None, None)
+
+
+def test_waiting_times_out(tmp_path):
+    """Test waiting for a hung leader gives up after the timeout."""
+    with Flight("key", directory=tmp_path):
+        with Flight("key", timeout=0.1, directory=tmp_path) as follower:
+            assert follower.result is None
+            assert follower.leader is False
+            follower.publish("ls")
+
+    assert not (tmp_path / "key.json").exists()
+
+
+def test_dead_leader_releases_lock(tmp_path):
+    """Test the lock of a leader that is killed is released."""
+    # Runs this interpreter on a fixed script, with no shell
+    holder = subprocess.Popen(  # nosec B603
+        [
+            sys.executable,
+            "-c",
+            "import fcntl, sys, time\n"
+            "f = open(sys.argv[1], 'a')\n"
+            "fcntl.flock(f, fcntl.LOCK_EX)\n"
+            "print('locked', flush=True)\n"
+            "time.sleep(30)\n",
+            str(tmp_path / "key.lock"),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        thread, follower = _follow("key", tmp_path)
+        time.sleep(0.1)
+        assert follower.leader is False
+        holder.kill()
+        thread.join(timeout=5)
+    finally:
+        holder.kill()
+        holder.wait()
+
+    assert follower.leader is True
+    follower.__exit__(None, None, None)
+
+
+def _age(path, seconds):
+    path.touch()
+    stale = time.time() - seconds
+    os.utime(path, (stale, stale))
+
+
+def test_leader_removes_stale_files(tmp_path):
+    """Test unused locks and answers are removed once a leader finishes."""
+    for name in ["old.lock", "old.json", "recent.lock", "recent.json"]:
+        _age(tmp_path / name, STALE_AFTER + 1 if name.startswith("old") else 1)
+
+    with Flight("key", directory=tmp_path) as flight:
+        flight.publish("ls -la")
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "key.json",
+        "key.lock",
+        "recent.json",
+        "recent.lock",
+    ]
+
+
+def test_held_lock_is_not_removed(tmp_path):
+    """Test a lock that is still held is kept however old it is."""
+    lock_path = tmp_path / "old.lock"
+    _age(lock_path, STALE_AFTER + 1)
+
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        with Flight("key", directory=tmp_path):
+            pass
+
+        assert lock_path.exists()
+
+
+def test_removed_lock_is_not_shared(tmp_path):
+    """Test a request waiting on a removed lock waits for its replacement."""
+    first = Flight("key", directory=tmp_path).__enter__()
+    thread, follower = _follow("key", tmp_path)
+    time.sleep(0.1)
+    # The file is removed as stale, and a new request locks a new one
+    (tmp_path / "key.lock").unlink()
+    second = Flight("key", directory=tmp_path).__enter__()
+    first.__exit__(None, None, None)
+    time.sleep(0.1)
+
+    assert second.leader is True
+    assert follower.leader is False
+    second.__exit__(None, None, None)
+    thread.join(timeout=5)
+    assert follower.leader is True
+    follower.__exit__(None, None, None)
@@ -0,0 +1,170 @@
+"""Tests for the usage store."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from ask.exceptions import ConfigurationError
+from ask.providers.base import TokenUsage
+from ask.usage import (
+    SOURCE_CACHE,
+    SOURCE_INSTANT,
+    SOURCE_PROVIDER,
+    SOURCE_SHARED,
+    UsageStore,
+    estimate_cost,
+    format_summary,
+    parse_window,
+    percentile,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Usage store in a temporary directory."""
+    store = UsageStore(tmp_path / "usage.sqlite3")
+    yield store
+    store.close()
+
+
+def test_parse_window():
+    """Test time windows are converted to seconds."""
+    assert parse_window("24h") == 86400
+    assert parse_window("7d") == 7 * 86400
+    assert parse_window("2W") == 14 * 86400
+    with pytest.raises(ConfigurationError, match="Invalid time window"):
+        parse_window("week")
+
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) is None
+
+
+def test_estimate_cost():
+    """Test cached tokens are billed at the cached price."""
+    assert estimate_cost("gpt-4o-mini", 1_000_000, 0, 0) == pytest.approx(0.15)
+    assert estimate_cost("gpt-4o-mini", 1_000_000, 0, 1_000_000) == pytest.approx(0.075)
+    assert estimate_cost("llama3.2", 1000, 1000, 0) == 0.0
+    assert estimate_cost(
+        "llama3.2", 1_000_000, 1_000_000, 0, {"llama3.2": [1.0, 2.0]}
+    ) == pytest.approx(3.0)
+
+
+def test_token_usage_ignores_non_integers():
+    """Test counts that are not integers are dropped."""
+    usage = TokenUsage(input_tokens=10, output_tokens="5", cached_tokens=True)
+
+    assert (usage.input_tokens, usage.output_tokens, usage.cached_tokens) == (
+        10,
+        None,
+        None,
+    )
+
+
+def test_summarize(store):
+    """Test requests are summarized per provider and model."""
+    for latency in (1.0, 2.0, 3.0):
+        store.record(
+            SOURCE_PROVIDER,
+            latency,
+            provider="openai",
+            model="gpt-4o-mini",
+            usage=TokenUsage(input_tokens=100, output_tokens=10, cached_tokens=50),
+        )
+    store.record(SOURCE_PROVIDER, 9.0, ok=False, provider="openai", model="gpt-4o-mini")
+    store.record(SOURCE_CACHE, 0.01)
+    store.record(SOURCE_INSTANT, 0.001)
+
+    summary = store.summarize()
+
+    assert summary["sources"] == {
+        SOURCE_PROVIDER: 4,
+        SOURCE_CACHE: 1,
+        SOURCE_INSTANT: 1,
+    }
+    (row,) = summary["models"]
+    assert row["requests"] == 4
+    assert row["errors"] == 1
+    assert row["latency"] == {50: 2.0, 95: 3.0, 99: 3.0}
+    assert row["input_per_request"] == 100
+    assert row["output_per_request"] == 10
+    assert row["cached_per_request"] == 50
+    assert row["cost"] == pytest.approx(estimate_cost("gpt-4o-mini", 300, 30, 150))
+
+
+def test_summarize_window(store):
+    """Test requests before the window are left out."""
+    with patch("ask.usage.time.time", return_value=1000.0):
+        store.record(SOURCE_CACHE, 0.01)
+    store.record(SOURCE_INSTANT, 0.01)
+
+    summary = store.summarize(since=time.time() - 60)
+
+    assert summary["sources"] == {SOURCE_INSTANT: 1}
+    assert summary["models"] == []
+
+
+def test_format_summary(store):
+    """Test the report lists local answers and a row per model."""
+    store.record(
+        SOURCE_PROVIDER,
+        0.5,
+        provider="anthropic",
+        model="claude-3-haiku-20240307",
+        usage=TokenUsage(input_tokens=400, output_tokens=20),
+    )
+    store.record(SOURCE_CACHE, 0.01)
+
+    report = format_summary(store.summarize(), "7d")
+
+    lines = report.splitlines()
+    assert lines[0] == "Last 7d: 2 requests, 1 answered locally (instant 0, cache 1)"
+    assert lines[2].split() == [
+        "model",
+        "requests",
+        "errors",
+        "p50",
+        "p95",
+        "p99",
+        "in/req",
+        "out/req",
+        "cached/req",
+        "cost",
+    ]
+    assert lines[3].split() == [
+        "anthropic:claude-3-haiku-20240307",
+        "1",
+        "0",
+        "0.50s",
+        "0.50s",
+        "0.50s",
+        "400",
+        "20",
+        "0",
+        "$0.0001",
+    ]
+
+
+def test_format_summary_empty(store):
+    """Test an empty store reports no requests."""
+    assert format_summary(store.summarize(), "24h") == (
+        "Last 24h: 0 requests, 0 answered locally (instant 0, cache 0)"
+    )
+
+
+def test_format_summary_shared(store):
+    """Test answers shared with an identical request count as local."""
+    store.record(SOURCE_SHARED, 0.8)
+    store.record(SOURCE_INSTANT, 0.01)
+
+    assert format_summary(store.summarize(), "7d") == (
+        "Last 7d: 2 requests, 2 answered locally (instant 1, cache 0, shared 1)"
+    )
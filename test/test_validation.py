@@ -0,0 +1,183 @@
+"""Tests for generated command validation."""
+
+import json
+import os
+import subprocess  # nosec B404
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ask.validation import (
+    check_syntax,
+    check_tokens,
+    find_problems,
+    retry_prompt,
+    validate_command,
+    warn_missing_commands,
+)
+
+
+def test_check_syntax_valid():
+    """Test valid commands parse."""
+    assert check_syntax("find . -name '*.py' | xargs wc -l") is None
+
+
+def test_check_syntax_invalid():
+    """Test unbalanced quoting is reported."""
+    assert check_syntax("echo 'unterminated") is not None
+
+
+def test_check_syntax_does_not_execute(tmp_path):
+    """Test the command is parsed, not run."""
+    marker = tmp_path / "marker"
+    assert check_syntax(f"touch {marker}") is None
+    assert not marker.exists()
+
+
+def test_check_syntax_no_bash():
+    """Test the check is skipped when bash is not installed."""
+    with patch("shutil.which", return_value=None):
+        assert check_syntax("echo 'unterminated") is None
+
+
+def test_check_syntax_timeout():
+    """Test a hanging syntax check is reported."""
+    with patch("subprocess.run", side_effect=subprocess.TimeoutExpired(["bash"], 2.0)):
+        assert check_syntax("ls") == "syntax check timed out"
+
+
+def test_check_syntax_error_without_message():
+    """Test a failing check without stderr output."""
+    with patch("subprocess.run", return_value=MagicMock(returncode=2, stderr="")):
+        assert check_syntax("ls") == "invalid bash syntax"
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        "ls -la",
+        "du -sh * | sort -hr",
+        "find . -mtime -7 -name '*.py'",
+        'for f in *.txt; do\n  wc -l "$f"\ndone',
+    ],
+)
+def test_find_problems_valid(command):
+    """Test valid commands have no problems."""
+    assert find_problems(command) == []
+
+
+def test_find_problems_empty():
+    """Test empty output."""
+    assert find_problems("  \n") == ["empty output"]
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        "Here is the command:\nls -la",
+        "Sure! ls -la",
+        "ls -la\nThis command lists all files",
+        "To list files, run ls",
+    ],
+)
+def test_find_problems_prose(command):
+    """Test prose is rejected."""
+    problems = find_problems(command)
+    assert any("prose" in problem for problem in problems)
+
+
+def test_find_problems_code_fence():
+    """Test leftover code fences are rejected."""
+    problems = find_problems("```bash\nls\n```")
+    assert any("code fence" in problem for problem in problems)
+
+
+def test_find_problems_syntax_error():
+    """Test syntax errors are rejected."""
+    problems = find_problems("if true; then echo hi")
+    assert any(problem.startswith("bash syntax error") for problem in problems)
+
+
+def test_check_tokens():
+    """Test shlex tokenizer check."""
+    assert check_tokens("echo 'hello world' # comment") is None
+    assert check_tokens("echo 'unterminated") == "No closing quotation"
+
+
+def test_check_syntax_sandboxed_environment():
+    """Test bash runs without startup files or the caller's environment."""
+    with patch.dict(os.environ, {"BASH_ENV": "/home/user/evil.sh"}):
+        with patch(
+            "subprocess.run", return_value=MagicMock(returncode=0, stderr="")
+        ) as mock_run:
+            check_syntax("ls")
+
+    args, kwargs = mock_run.call_args
+    assert "--norc" in args[0] and "--noprofile" in args[0]
+    assert "BASH_ENV" not in kwargs["env"]
+    assert kwargs["start_new_session"] is True
+
+
+def test_find_problems_without_bash_uses_tokenizer():
+    """Test the shlex tokenizer is used when bash is not installed."""
+    with patch("shutil.which", return_value=None):
+        problems = find_problems("echo 'unterminated")
+
+    assert problems == ["invalid quoting: No closing quotation"]
+
+
+def test_find_problems_heredoc_quotes():
+    """Test bash grammar shlex does not understand is accepted."""
+    assert find_problems("cat <<EOF\nit's here\nEOF") == []
+
+
+def test_validate_command_caches_verdicts(tmp_path):
+    """Test verdicts are cached by command hash."""
+    cache_path = tmp_path / "verdicts.json"
+
+    with patch("ask.validation.find_problems", return_value=["bad"]) as mock_find:
+        assert validate_command("ls -z", cache_path=cache_path) == ["bad"]
+        assert validate_command("ls -z", cache_path=cache_path) == ["bad"]
+        mock_find.assert_called_once_with("ls -z")
+
+    assert len(json.loads(cache_path.read_text())) == 1
+
+
+def test_validate_command_cache_is_bounded(tmp_path):
+    """Test the oldest verdicts are evicted."""
+    cache_path = tmp_path / "verdicts.json"
+
+    with patch("ask.validation.MAX_CACHED_VERDICTS", 2):
+        with patch("ask.validation.find_problems", return_value=[]):
+            for command in ["a", "b", "c"]:
+                validate_command(command, cache_path=cache_path)
+
+    assert len(json.loads(cache_path.read_text())) == 2
+
+
+def test_retry_prompt():
+    """Test errors are fed back in the retry prompt."""
+    prompt = retry_prompt("list files", "ls 'x", ["bash syntax error: EOF"])
+
+    assert prompt.startswith("list files\n\n")
+    assert "ls 'x" in prompt
+    assert "bash syntax error: EOF" in prompt
+
+
+def test_validate_command_missing_binary_not_a_problem(tmp_path):
+    """Test programs that are not installed do not fail validation."""
+    with patch("ask.binaries.missing_commands", return_value=["fd"]):
+        assert validate_command("fd -e py", cache_path=tmp_path / "v.json") == []
+
+
+def test_warn_missing_commands():
+    """Test programs that are not installed are warned about on every call."""
+    with patch("ask.validation.module_logger") as mock_logger:
+        with patch("ask.binaries.missing_commands", return_value=["fd"]):
+            assert warn_missing_commands("fd -e py") == ["fd"]
+            assert warn_missing_commands("fd -e py") == ["fd"]
+        with patch("ask.binaries.missing_commands", return_value=[]):
+            assert warn_missing_commands("fd -e py") == []
+
+    assert mock_logger.warning.call_count == 2
+    assert "fd" in mock_logger.warning.call_args.args[0]
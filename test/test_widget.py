@@ -0,0 +1,146 @@
+"""Tests for the shell integration and prefetch sockets."""
+
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from ask.exceptions import APIError, ConfigurationError
+from ask.widget import fetch, serve, shell_script, socket_path
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="Unix sockets are not available"
+)
+
+
+@pytest.fixture
+def socket_dir():
+    """Return a directory with a path short enough for Unix sockets."""
+    # The default temporary directory can be too long for a socket path, as on
+    # macOS; the directory made inside /tmp is private to this user
+    with tempfile.TemporaryDirectory(dir="/tmp") as directory:  # nosec B108
+        yield Path(directory)
+
+
+def _serve_in_background(path, produce, linger=5.0):
+    thread = threading.Thread(target=serve, args=(path, produce, linger))
+    thread.start()
+    for _ in range(200):
+        if path.exists():
+            break
+        time.sleep(0.01)
+    return thread
+
+
+def test_shell_script():
+    """Test scripts are returned by shell name or $SHELL."""
+    assert "bindkey" in shell_script("zsh")
+    assert "bind -x" in shell_script("bash")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("SHELL", "/usr/bin/zsh")
+        assert shell_script() == shell_script("zsh")
+
+
+def test_shell_script_unsupported():
+    """Test unsupported shells are reported."""
+    with pytest.raises(ConfigurationError, match="Unsupported shell 'fish'"):
+        shell_script("fish")
+
+
+def test_socket_path(socket_dir):
+    """Test sockets are keyed by prompt, ignoring spacing, and model."""
+    path = socket_path("list  files ", directory=socket_dir)
+
+    assert path == socket_path("list files", directory=socket_dir)
+    assert path != socket_path("list files", "anthropic", directory=socket_dir)
+    assert path.parent == socket_dir
+
+
+def test_serve_hands_answer_to_fetch(socket_dir):
+    """Test a prefetch hands its answer over and removes its socket."""
+
+    def produce():
+        time.sleep(0.1)
+        return "ls -la"
+
+    thread = _serve_in_background(
+        socket_path("list files", directory=socket_dir), produce
+    )
+
+    assert fetch("list files", directory=socket_dir) == "ls -la"
+    thread.join(timeout=5)
+    assert not socket_path("list files", directory=socket_dir).exists()
+
+
+def test_fetch_failed_prefetch(socket_dir):
+    """Test a prefetch that failed hands over no answer."""
+
+    def produce():
+        raise APIError("Error: API request failed")
+
+    path = socket_path("list files", directory=socket_dir)
+    thread = _serve_in_background(path, produce)
+
+    assert fetch("list files", directory=socket_dir) is None
+    thread.join(timeout=5)
+
+
+def test_fetch_without_prefetch(socket_dir):
+    """Test nothing is fetched without a prefetch or from a stale socket."""
+    assert fetch("list files", directory=socket_dir) is None
+
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(socket_path("list files", directory=socket_dir)))
+    stale.close()
+
+    assert fetch("list files", directory=socket_dir) is None
+
+
+def test_serve_leaves_running_prefetch_alone(socket_dir):
+    """Test a second prefetch of the same prompt defers to the first."""
+    path = socket_path("list files", directory=socket_dir)
+    release = threading.Event()
+
+    def produce():
+        release.wait(5)
+        return "ls -la"
+
+    thread = _serve_in_background(path, produce)
+    second = []
+    serve(path, lambda: second.append(True) or "ls")
+
+    assert second == []
+    release.set()
+    assert fetch("list files", directory=socket_dir) == "ls -la"
+    thread.join(timeout=5)
+
+
+def test_serve_replaces_stale_socket(socket_dir):
+    """Test a socket left by a killed prefetch is replaced."""
+    path = socket_path("list files", directory=socket_dir)
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+
+    thread = threading.Thread(target=serve, args=(path, lambda: "ls -la", 5.0))
+    thread.start()
+    for _ in range(200):
+        command = fetch("list files", directory=socket_dir)
+        if command is not None:
+            break
+        time.sleep(0.01)
+
+    assert command == "ls -la"
+    thread.join(timeout=5)
+
+
+def test_serve_gives_up_after_linger(socket_dir):
+    """Test an answer nobody collects is dropped along with the socket."""
+    path = socket_path("list files", directory=socket_dir)
+
+    serve(path, lambda: "ls -la", linger=0.05)
+
+    assert not path.exists()